@@ -0,0 +1,54 @@
+"""store tool embeddings as halfvec
+
+Revision ID: 5e2f0a9c7b13
+Revises: 9c41e7b2d8f0
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+try:
+    from pgvector.sqlalchemy import HALFVEC
+    PGVECTOR_AVAILABLE = True
+except ImportError:
+    PGVECTOR_AVAILABLE = False
+    HALFVEC = None
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2f0a9c7b13"
+down_revision: Union[str, None] = "9c41e7b2d8f0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # fp16 halves the bytes read per distance; cosine rankings of the 384-d
+    # all-MiniLM-L6-v2 embeddings are effectively unchanged. Needs pgvector >= 0.7.
+    if PGVECTOR_AVAILABLE:
+        # Databases created from an older image still carry the old extension.
+        op.execute("ALTER EXTENSION vector UPDATE")
+        op.execute("DROP INDEX IF EXISTS idx_tools_embedding_hnsw")
+        op.execute(
+            "ALTER TABLE tools ALTER COLUMN embedding TYPE halfvec(384) "
+            "USING embedding::halfvec(384)"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tools_embedding_hnsw ON tools "
+            "USING hnsw (embedding halfvec_cosine_ops)"
+        )
+
+
+def downgrade() -> None:
+    if PGVECTOR_AVAILABLE:
+        op.execute("DROP INDEX IF EXISTS idx_tools_embedding_hnsw")
+        op.execute(
+            "ALTER TABLE tools ALTER COLUMN embedding TYPE vector(384) "
+            "USING embedding::vector(384)"
+        )
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tools_embedding_hnsw ON tools "
+            "USING hnsw (embedding vector_cosine_ops)"
+        )
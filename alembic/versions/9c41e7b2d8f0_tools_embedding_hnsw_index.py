@@ -0,0 +1,45 @@
+"""replace tools embedding ivfflat index with hnsw
+
+Revision ID: 9c41e7b2d8f0
+Revises: f3a8d2c61b47
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+try:
+    from pgvector.sqlalchemy import Vector
+    PGVECTOR_AVAILABLE = True
+except ImportError:
+    PGVECTOR_AVAILABLE = False
+    Vector = None
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c41e7b2d8f0"
+down_revision: Union[str, None] = "f3a8d2c61b47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # HNSW (pgvector >= 0.5) needs no training data, unlike ivfflat built on a
+    # near-empty table, and serves ORDER BY <=> LIMIT k directly.
+    if PGVECTOR_AVAILABLE:
+        op.execute("DROP INDEX IF EXISTS idx_tools_embedding")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tools_embedding_hnsw ON tools "
+            "USING hnsw (embedding vector_cosine_ops)"
+        )
+
+
+def downgrade() -> None:
+    if PGVECTOR_AVAILABLE:
+        op.execute("DROP INDEX IF EXISTS idx_tools_embedding_hnsw")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tools_embedding ON tools "
+            "USING ivfflat (embedding vector_cosine_ops) "
+            "WITH (lists = 100)"
+        )
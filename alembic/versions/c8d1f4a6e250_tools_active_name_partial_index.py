@@ -0,0 +1,32 @@
+"""add partial index on active tool names
+
+Revision ID: c8d1f4a6e250
+Revises: 5e2f0a9c7b13
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c8d1f4a6e250"
+down_revision: Union[str, None] = "5e2f0a9c7b13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_tools_active_name",
+        "tools",
+        ["name"],
+        unique=False,
+        postgresql_where=sa.text("is_active"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tools_active_name", table_name="tools")
@@ -0,0 +1,25 @@
+"""add jobs created_at index
+
+Revision ID: e4b1c7a9d305
+Revises: d2a4c86f1e12
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b1c7a9d305"
+down_revision: Union[str, None] = "d2a4c86f1e12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f("ix_jobs_created_at"), "jobs", ["created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_jobs_created_at"), table_name="jobs")
@@ -0,0 +1,41 @@
+"""store job arguments and result as jsonb
+
+Revision ID: f3a8d2c61b47
+Revises: e4b1c7a9d305
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a8d2c61b47"
+down_revision: Union[str, None] = "e4b1c7a9d305"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for column in ("arguments", "result"):
+        op.alter_column(
+            "jobs",
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f"{column}::jsonb",
+        )
+
+
+def downgrade() -> None:
+    for column in ("arguments", "result"):
+        op.alter_column(
+            "jobs",
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f"{column}::json",
+        )
@@ -16,8 +16,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.database import AsyncSessionLocal
 from src.registry.models import Tool, RiskLevel
-from src.registry.embedding import generate_embedding
-from src.registry.repository import get_tool_by_name
+from src.registry.embedding import batch_generate_embeddings
+from src.registry.repository import get_tools_by_names
 from sqlalchemy import select
 
 
@@ -239,18 +239,24 @@ async def seed_tools():
         created_count = 0
         updated_count = 0
         
-        for tool_def in all_tools:
+        # Embed every description in one batched encode
+        try:
+            embeddings = await batch_generate_embeddings(
+                [tool_def["description"] for tool_def in all_tools]
+            )
+        except RuntimeError as e:
+            print(f"Warning: Could not generate embeddings: {e}")
+            embeddings = [None] * len(all_tools)
+        
+        # Look up every existing tool in one query
+        existing_by_name = await get_tools_by_names(
+            db, [tool_def["name"] for tool_def in all_tools]
+        )
+        
+        for tool_def, embedding in zip(all_tools, embeddings):
             print(f"Processing: {tool_def['name']}")
             
-            # Check if tool exists
-            existing = await get_tool_by_name(db, tool_def["name"])
-            
-            # Generate embedding
-            try:
-                embedding = await generate_embedding(tool_def["description"])
-            except RuntimeError as e:
-                print(f"Warning: Could not generate embedding for {tool_def['name']}: {e}")
-                embedding = None
+            existing = existing_by_name.get(tool_def["name"])
             
             if existing:
                 # Update existing tool
@@ -26,6 +26,16 @@ class AuditContext:
         status: Final status of the invocation.
         error_code: Error code if failed.
     """
+
+    __slots__ = (
+        "request_id",
+        "user_id",
+        "tool_name",
+        "endpoint_path",
+        "start_time",
+        "status",
+        "error_code",
+    )
     
     def __init__(
         self,
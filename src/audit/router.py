@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Query
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_db
@@ -21,6 +22,9 @@ from .repository import get_audit_logs
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Validates a whole page of ORM rows in one core-validator call.
+_AUDIT_LOG_LIST_ADAPTER = TypeAdapter(list[AuditLogResponse])
+
 
 def require_admin(user: AuthenticatedUser) -> AuthenticatedUser:
     """Verify user has admin role.
@@ -91,7 +95,7 @@ async def query_audit_logs(
     )
     
     return AuditLogListResponse(
-        items=[AuditLogResponse.model_validate(log) for log in logs],
+        items=_AUDIT_LOG_LIST_ADAPTER.validate_python(logs),
         total=total,
         limit=limit,
         offset=offset,
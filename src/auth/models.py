@@ -1,5 +1,7 @@
 """Pydantic models for authentication and user identity."""
 
+from functools import cached_property
+
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -40,10 +42,14 @@ class AuthenticatedUser(BaseModel):
         """Convenience property to access user_id."""
         return self.claims.user_id
     
-    @property
-    def roles(self) -> list[str]:
-        """Convenience property to access roles."""
-        return self.claims.roles
+    @cached_property
+    def roles(self) -> frozenset[str]:
+        """The user's roles as a set, for O(1) membership checks.
+        
+        Built once per request from the claims; unordered, so use
+        ``claims.roles`` where the token's role order matters.
+        """
+        return frozenset(self.claims.roles)
     
     def can_use_tool(self, tool_name: str) -> bool:
         """Check if user has permission to use a specific tool.
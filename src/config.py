@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Literal
 
 class Settings(BaseSettings):
     # App
@@ -29,6 +30,16 @@ class Settings(BaseSettings):
     # MCP
     MCP_LOG_LEVEL: str = "INFO"
 
+    # Rate limiting (empty = per-process in-memory buckets)
+    RATE_LIMIT_REDIS_URL: str = ""
+    # Redis algorithm: "token_bucket" (allows bursts) or "sliding_window" (strict rolling minute)
+    RATE_LIMIT_ALGORITHM: Literal["token_bucket", "sliding_window"] = "token_bucket"
+
+    # Embeddings: load the int8-quantized ONNX build of the model (needs onnxruntime)
+    EMBEDDING_QUANTIZED: bool = False
+    # HNSW candidate list size for pgvector tool search (raised to top_k when smaller)
+    EMBEDDING_HNSW_EF_SEARCH: int = 40
+
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, extra="ignore")
 
 @lru_cache()
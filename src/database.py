@@ -1,18 +1,34 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .config import get_settings
 
 settings = get_settings()
 
+# Gateway queries are short point lookups; Postgres JIT only adds planning latency.
+_connect_args = (
+    {"server_settings": {"jit": "off"}}
+    if settings.DATABASE_URL.startswith("postgresql+asyncpg")
+    else {}
+)
+
 # Create Async Engine
 # echo=True will log SQL queries for debugging
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     future=True,
+    # The asyncio-safe queue pool (the default for async engines), named so a
+    # sync pool class cannot be swapped in by accident.
+    poolclass=AsyncAdaptedQueuePool,
     pool_size=20,
     max_overflow=10,
+    pool_timeout=30,
+    # Drop connections the server or a proxy may have closed while idle.
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    connect_args=_connect_args,
 )
 
 # Create Session Factory
@@ -4,6 +4,27 @@ import httpx
 from fastapi import Request
 
 
+# Backends are a handful of internal tool containers; keep warm connections
+# to them instead of reconnecting on every tools/call burst.
+HTTP_CLIENT_LIMITS = httpx.Limits(
+    max_connections=256,
+    max_keepalive_connections=64,
+    keepalive_expiry=30,
+)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the shared HTTP client used to reach tool backends.
+    
+    Called once from the application lifespan. ``timeout=None`` removes the
+    global default timeout so each backend call sets its own.
+    
+    Returns:
+        A pooled httpx.AsyncClient.
+    """
+    return httpx.AsyncClient(timeout=None, limits=HTTP_CLIENT_LIMITS)
+
+
 async def get_http_client(request: Request) -> httpx.AsyncClient:
     """Dependency to get the global shared HTTP client.
     
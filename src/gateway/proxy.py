@@ -6,7 +6,7 @@ from typing import Any
 import httpx
 
 from src.config import get_settings
-from .schemas import MCPRequest, MCPResponse, MCPErrorCodes
+from .schemas import MCPRequest, MCPResponse, MCPErrorCodes, MCPToolCallParams
 from .exceptions import BackendTimeoutError, BackendUnavailableError, BackendError
 
 
@@ -79,7 +79,7 @@ async def forward_to_backend(
         
         # Parse the JSON-RPC response
         data = response.json()
-        return MCPResponse(**data)
+        return MCPResponse.model_validate(data)
         
     except httpx.TimeoutException:
         raise BackendTimeoutError(
@@ -123,8 +123,6 @@ async def forward_tool_call(
     Returns:
         MCPResponse from the backend server.
     """
-    from .schemas import MCPToolCallParams
-    
     if request_id is None:
         request_id = str(uuid.uuid4())
     
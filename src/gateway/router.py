@@ -12,18 +12,10 @@ from src.auth.dependencies import get_current_user
 from src.auth.models import AuthenticatedUser
 from src.database import get_db
 from src.dependencies import get_http_client
-from src.ratelimit import check_rate_limit, RateLimitExceededError, RateLimitResult
+from src.ratelimit import check_rate_limit, RateLimitExceededError
 
-from .schemas import MCPResponse, MCPErrorCodes, InvokeToolRequest
+from .schemas import MCPResponse, InvokeToolRequest
 from .service import invoke_tool
-from .exceptions import (
-    GatewayError,
-    ToolNotFoundError,
-    BackendTimeoutError,
-    BackendUnavailableError,
-    PayloadTooLargeError,
-    BackendError,
-)
 
 
 router = APIRouter(prefix="/mcp", tags=["gateway"])
@@ -60,7 +52,7 @@ async def invoke_tool_endpoint(
         request.request_id = str(uuid.uuid4())
     
     # Check rate limit (user-level + tool-level)
-    rate_result = check_rate_limit(user_id=user.user_id, tool_name=request.tool_name)
+    rate_result = await check_rate_limit(user_id=user.user_id, tool_name=request.tool_name)
     if not rate_result.allowed:
         raise RateLimitExceededError(
             limit=rate_result.limit,
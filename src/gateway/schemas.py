@@ -1,5 +1,6 @@
 """Pydantic schemas for MCP JSON-RPC protocol messages."""
 
+from functools import lru_cache
 from typing import Any, Literal
 from pydantic import BaseModel, Field
 
@@ -94,7 +95,17 @@ class MCPResponse(BaseModel):
         Returns:
             MCPResponse with error field populated.
         """
-        return cls(id=id, error=MCPErrorDetail(code=code, message=message, data=data))
+        if data is None:
+            error = _error_detail_template(code, message).model_copy()
+        else:
+            error = MCPErrorDetail(code=code, message=message, data=data)
+        return cls.model_construct(id=id, error=error)
+
+
+@lru_cache(maxsize=256)
+def _error_detail_template(code: int, message: str) -> MCPErrorDetail:
+    # Error paths repeat a small set of (code, message) pairs; validate each once.
+    return MCPErrorDetail(code=code, message=message)
 
 
 # Standard JSON-RPC error codes
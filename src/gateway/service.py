@@ -1,6 +1,5 @@
 """Service layer for MCP Gateway with validation and routing logic."""
 
-import inspect
 import uuid
 from typing import Any
 import httpx
@@ -9,8 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.models import AuthenticatedUser
 from src.auth.exceptions import ToolNotAllowedError
-from src.registry.service import get_all_tools_cached
-from src.audit import audit_tool_invocation
+from src.registry.service import get_tools_by_name_cached
+from src.audit import AuditContext, log_tool_invocation
+from src.serialization import json_dumps
 
 from .schemas import MCPResponse, InvokeToolRequest
 from .exceptions import (
@@ -41,9 +41,8 @@ def validate_payload_size(
     Raises:
         PayloadTooLargeError: If payload exceeds limit.
     """
-    import json
-    payload_str = json.dumps(arguments)
-    size = len(payload_str.encode("utf-8"))
+    # Compact UTF-8, matching what httpx sends for json= bodies.
+    size = len(json_dumps(arguments))
     
     if size > max_bytes:
         raise PayloadTooLargeError(size_bytes=size, max_bytes=max_bytes)
@@ -54,14 +53,21 @@ def generate_request_id() -> str:
     return str(uuid.uuid4())
 
 
-async def _maybe_await(result: object) -> None:
-    """Await async results while tolerating sync audit helpers.
+# Failures recorded under the exception's own error code.
+_AUDITED_ERRORS = (
+    BackendUnavailableError,
+    BackendError,
+    ToolNotFoundError,
+    ToolNotAllowedError,
+    PayloadTooLargeError,
+)
 
-    Args:
-        result: Return value from an audit helper method.
-    """
-    if inspect.isawaitable(result):
-        await result
+
+def _mark_audit_failure(audit_ctx: AuditContext, exc: BaseException) -> None:
+    if isinstance(exc, BackendTimeoutError):
+        audit_ctx.mark_timeout()
+    elif isinstance(exc, _AUDITED_ERRORS):
+        audit_ctx.mark_error(exc.code)
 
 
 async def invoke_tool(
@@ -103,74 +109,56 @@ async def invoke_tool(
     """
     request_id = request.request_id or generate_request_id()
     
-    # Wrap entire operation in audit context
-    async with audit_tool_invocation(
-        db=db,
+    audit_ctx = AuditContext(
         request_id=request_id,
         user_id=user.user_id,
         tool_name=request.tool_name,
         endpoint_path=endpoint_path,
-    ) as audit_ctx:
-        try:
-            # 1. Validate payload size
-            validate_payload_size(request.arguments, max_payload_bytes)
-            
-            # 2. Check user has permission
-            if not user.can_use_tool(request.tool_name):
-                # Also check wildcard access
-                if "*" not in user.allowed_tools:
-                    raise ToolNotAllowedError(
-                        tool_name=request.tool_name,
-                        user_id=user.user_id
-                    )
-            
-            # 3. Look up tool from registry
-            all_tools = await get_all_tools_cached(db)
-            tool = next((t for t in all_tools if t.name == request.tool_name), None)
-            
-            if tool is None:
-                raise ToolNotFoundError(request.tool_name)
-            
-            # 4. Check tool-specific role requirements
-            if tool.required_roles:
-                if not any(role in user.roles for role in tool.required_roles):
-                    raise ToolNotAllowedError(
-                        tool_name=request.tool_name,
-                        user_id=user.user_id
-                    )
-            
-            # 5. Forward to backend
-            response = await forward_tool_call(
-                client=client,
-                backend_url=tool.backend_url,
-                tool_name=request.tool_name,
-                arguments=request.arguments,
-                timeout=timeout,
-                request_id=request_id,
-                user_id=user.user_id,
-            )
-            
-            # Map tool_id back to response for usage tracking
-            if tool:
-                response.tool_id = tool.id
-            
-            return response
-            
-        except BackendTimeoutError as e:
-            await _maybe_await(audit_ctx.mark_timeout())
-            raise
-        except BackendUnavailableError as e:
-            await _maybe_await(audit_ctx.mark_error("BACKEND_UNAVAILABLE"))
-            raise
-        except BackendError as e:
-            await _maybe_await(audit_ctx.mark_error(e.code))
-            raise
-        except ToolNotFoundError as e:
-            await _maybe_await(audit_ctx.mark_error("TOOL_NOT_FOUND"))
-            raise
-        except ToolNotAllowedError as e:
-            await _maybe_await(audit_ctx.mark_error("TOOL_NOT_ALLOWED"))
-            raise
-        except PayloadTooLargeError as e:
-            await _maybe_await(audit_ctx.mark_error("PAYLOAD_TOO_LARGE"))
-            raise
+    )
+    try:
+        # 1. Validate payload size
+        validate_payload_size(request.arguments, max_payload_bytes)
+        
+        # 2. Check user has permission
+        if not user.can_use_tool(request.tool_name):
+            # Also check wildcard access
+            if "*" not in user.allowed_tools:
+                raise ToolNotAllowedError(
+                    tool_name=request.tool_name,
+                    user_id=user.user_id
+                )
+        
+        # 3. Look up tool from registry
+        tool = (await get_tools_by_name_cached(db)).get(request.tool_name)
+        
+        if tool is None:
+            raise ToolNotFoundError(request.tool_name)
+        
+        # 4. Check tool-specific role requirements
+        if tool.required_roles:
+            if user.roles.isdisjoint(tool.required_roles):
+                raise ToolNotAllowedError(
+                    tool_name=request.tool_name,
+                    user_id=user.user_id
+                )
+        
+        # 5. Forward to backend
+        response = await forward_tool_call(
+            client=client,
+            backend_url=tool.backend_url,
+            tool_name=request.tool_name,
+            arguments=request.arguments,
+            timeout=timeout,
+            request_id=request_id,
+            user_id=user.user_id,
+        )
+    except BaseException as exc:
+        _mark_audit_failure(audit_ctx, exc)
+        await log_tool_invocation(db, audit_ctx)
+        raise
+    
+    # Map tool_id back to response for usage tracking
+    response.tool_id = tool.id
+    
+    await log_tool_invocation(db, audit_ctx)
+    return response
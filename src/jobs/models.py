@@ -4,9 +4,9 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any, Optional
 
-from sqlalchemy import String, JSON, DateTime, Enum as SAEnum
+from sqlalchemy import String, DateTime, Enum as SAEnum
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 
 from src.database import Base
 from .schemas import JobStatus
@@ -21,13 +21,13 @@ class Job(Base):
     )
     user_id: Mapped[str] = mapped_column(String, index=True, nullable=False)
     tool_name: Mapped[str] = mapped_column(String, nullable=False)
-    arguments: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    arguments: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
     
     status: Mapped[JobStatus] = mapped_column(
         SAEnum(JobStatus), default=JobStatus.PENDING, nullable=False, index=True
     )
     
-    result: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    result: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB, nullable=True)
     error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     
     request_id: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
@@ -35,7 +35,8 @@ class Job(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
         default=lambda: datetime.now(timezone.utc),
-        nullable=False
+        nullable=False,
+        index=True,
     )
     completed_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True
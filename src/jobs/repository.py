@@ -92,22 +92,39 @@ async def update_job_status(
 from sqlalchemy import delete
 from datetime import timedelta
 
-async def cleanup_old_jobs(db: AsyncSession, retention_hours: int = 24) -> int:
+CLEANUP_BATCH_SIZE = 10_000
+
+
+async def cleanup_old_jobs(
+    db: AsyncSession,
+    retention_hours: int = 24,
+    batch_size: int = CLEANUP_BATCH_SIZE,
+) -> int:
     """Delete jobs older than retention period.
     
+    Rows are removed in batches of ``batch_size`` (each committed on its own)
+    so a large backlog does not hold locks or WAL for one huge statement.
+    
     Args:
         db: Database session.
         retention_hours: Age in hours to delete.
+        batch_size: Maximum rows deleted per statement.
         
     Returns:
         Number of deleted jobs.
     """
     cutoff = datetime.now(timezone.utc) - timedelta(hours=retention_hours)
-    
-    result = await db.execute(
-        delete(Job).where(Job.created_at < cutoff)
+    expired_ids = (
+        select(Job.id)
+        .where(Job.created_at < cutoff)
+        .limit(batch_size)
+        .scalar_subquery()
     )
     
-    await db.commit()
-    return result.rowcount
-
+    deleted = 0
+    while True:
+        result = await db.execute(delete(Job).where(Job.id.in_(expired_ids)))
+        await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
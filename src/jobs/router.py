@@ -3,12 +3,14 @@
 from typing import Annotated
 from uuid import UUID
 
+import httpx
 from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.dependencies import get_current_user
 from src.auth.models import AuthenticatedUser
 from src.database import get_db
+from src.dependencies import get_http_client
 
 from .schemas import JobCreate, JobRead
 from .repository import get_job
@@ -23,6 +25,7 @@ async def submit_job_endpoint(
     user: Annotated[AuthenticatedUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     background_tasks: BackgroundTasks,
+    client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
 ) -> JobRead:
     """Submit a new tool invocation job.
     
@@ -31,11 +34,12 @@ async def submit_job_endpoint(
         user: Authenticated user.
         db: Database session.
         background_tasks: FastAPI background tasks.
+        client: Shared HTTP client from app state.
         
     Returns:
         The created Job in PENDING status.
     """
-    job = await submit_job(db, user, job_create, background_tasks)
+    job = await submit_job(db, user, job_create, background_tasks, client)
     return job
 
 
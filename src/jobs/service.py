@@ -25,6 +25,7 @@ async def submit_job(
     user: AuthenticatedUser,
     job_create: JobCreate,
     background_tasks: BackgroundTasks,
+    client: httpx.AsyncClient | None = None,
 ) -> Job:
     """Submit a new async job.
     
@@ -35,6 +36,7 @@ async def submit_job(
         user: Authenticated user.
         job_create: Job creation details.
         background_tasks: FastAPI BackgroundTasks object.
+        client: Shared HTTP client to reuse for the backend call.
         
     Returns:
         The created Job instance.
@@ -48,7 +50,8 @@ async def submit_job(
         process_job_task,
         job_id=job.id,
         user=user,
-        job_create=job_create
+        job_create=job_create,
+        client=client,
     )
     
     logger.info("job_submitted", job_id=str(job.id), tool_name=job.tool_name, user_id=user.user_id)
@@ -58,65 +61,82 @@ async def submit_job(
 async def process_job_task(
     job_id: UUID,
     user: AuthenticatedUser,
-    job_create: JobCreate
+    job_create: JobCreate,
+    client: httpx.AsyncClient | None = None,
 ) -> None:
     """Background task to process a job.
     
     This runs in the background, invokes the tool, and updates the job status.
-    It creates its own DB session and HTTP client.
+    It creates its own DB session. The backend call reuses the app's pooled
+    HTTP client when one is passed; per-backend timeouts are applied per
+    request by the gateway proxy, so the shared client needs no default.
+    A short-lived client is only created when none is supplied.
     """
     logger.info("job_started", job_id=str(job_id))
     
     async with AsyncSessionLocal() as db:
-        async with httpx.AsyncClient() as client:
-            try:
-                # 1. Mark as RUNNING
-                await update_job_status(db, job_id, JobStatus.RUNNING)
-                
-                # 2. Invoke tool via Gateway Service
-                # We need to reconstruct InvokeToolRequest
-                request = InvokeToolRequest(
-                    tool_name=job_create.tool_name,
-                    arguments=job_create.arguments,
-                    request_id=job_create.request_id or str(job_id)
-                )
-                
-                response = await gateway_invoke_tool(
-                    db=db,
-                    user=user,
-                    request=request,
-                    client=client,
-                    endpoint_path="/mcp/jobs",
-                )
-                
-                # 3. Check for error in response
-                if response.error:
-                    await update_job_status(
-                        db, 
-                        job_id, 
-                        JobStatus.FAILED, 
-                        error=response.error.message
-                    )
-                    logger.info("job_failed", job_id=str(job_id), error=response.error.message)
-                else:
-                    await update_job_status(
-                        db, 
-                        job_id, 
-                        JobStatus.COMPLETED, 
-                        result=response.result
-                    )
-                    logger.info("job_completed", job_id=str(job_id))
-                    
-            except Exception as e:
-                logger.error("job_exception", job_id=str(job_id), error=str(e))
-                # Catch-all for unexpected errors (e.g. gateway exceptions that bubbled up)
-                try:
-                    await update_job_status(
-                        db, 
-                        job_id, 
-                        JobStatus.FAILED, 
-                        error=str(e)
-                    )
-                except Exception as update_error:
-                    # If we can't even update the DB, just log it
-                    logger.critical("job_status_update_failed", job_id=str(job_id), error=str(update_error))
+        if client is not None:
+            await _run_job(db, client, job_id, user, job_create)
+        else:
+            async with httpx.AsyncClient() as own_client:
+                await _run_job(db, own_client, job_id, user, job_create)
+
+
+async def _run_job(
+    db: AsyncSession,
+    client: httpx.AsyncClient,
+    job_id: UUID,
+    user: AuthenticatedUser,
+    job_create: JobCreate,
+) -> None:
+    try:
+        # 1. Mark as RUNNING
+        await update_job_status(db, job_id, JobStatus.RUNNING)
+        
+        # 2. Invoke tool via Gateway Service
+        # We need to reconstruct InvokeToolRequest
+        request = InvokeToolRequest(
+            tool_name=job_create.tool_name,
+            arguments=job_create.arguments,
+            request_id=job_create.request_id or str(job_id)
+        )
+        
+        response = await gateway_invoke_tool(
+            db=db,
+            user=user,
+            request=request,
+            client=client,
+            endpoint_path="/mcp/jobs",
+        )
+        
+        # 3. Check for error in response
+        if response.error:
+            await update_job_status(
+                db, 
+                job_id, 
+                JobStatus.FAILED, 
+                error=response.error.message
+            )
+            logger.info("job_failed", job_id=str(job_id), error=response.error.message)
+        else:
+            await update_job_status(
+                db, 
+                job_id, 
+                JobStatus.COMPLETED, 
+                result=response.result
+            )
+            logger.info("job_completed", job_id=str(job_id))
+            
+    except Exception as e:
+        logger.error("job_exception", job_id=str(job_id), error=str(e))
+        # Catch-all for unexpected errors (e.g. gateway exceptions that bubbled up)
+        try:
+            await update_job_status(
+                db, 
+                job_id, 
+                JobStatus.FAILED, 
+                error=str(e)
+            )
+        except Exception as update_error:
+            # If we can't even update the DB, just log it
+            logger.critical("job_status_update_failed", job_id=str(job_id), error=str(update_error))
@@ -1,8 +1,9 @@
-import httpx
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from .config import get_settings
+from .dependencies import create_http_client
 from .database import engine, Base, AsyncSessionLocal
 from .auth.exceptions import (
     AuthenticationError,
@@ -11,6 +12,7 @@ from .auth.exceptions import (
 )
 from .registry import router as registry_router
 from .registry.service import sync_tools_from_config, clear_tool_cache
+from .registry.usage import flush_tool_usage, usage_flush_loop
 from .registry.models import Tool  # noqa: F401 - Import so Base.metadata sees it
 from src.gateway.router import router as gateway_router
 from src.jobs.router import router as jobs_router
@@ -27,7 +29,7 @@ from .gateway.exceptions import (
     PayloadTooLargeError,
     BackendError,
 )
-from .ratelimit import RateLimitExceededError
+from .ratelimit import RateLimitExceededError, get_rate_limiter
 
 settings = get_settings()
 
@@ -42,12 +44,21 @@ async def lifespan(app: FastAPI):
     clear_tool_cache()
     
     # Initialize global HTTP client for connection pooling
-    # timeouts=None removes global default timeout, allowing per-request timeouts
-    app.state.http_client = httpx.AsyncClient(timeout=None)
+    app.state.http_client = create_http_client()
+    
+    # Expire idle rate-limit buckets off the request path
+    cleanup_task = asyncio.create_task(get_rate_limiter().cleanup_loop())
+    # Write buffered tool usage counts periodically
+    usage_task = asyncio.create_task(usage_flush_loop())
     
     yield
     
-    # Shutdown: Close database connection and HTTP client
+    # Shutdown: Stop background tasks, flush usage counts, close database connection and HTTP client
+    for task in (cleanup_task, usage_task):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await flush_tool_usage()
     await app.state.http_client.aclose()
     await engine.dispose()
 
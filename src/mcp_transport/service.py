@@ -1,25 +1,30 @@
 """Business logic for MCP protocol handlers."""
 
-import json
+import asyncio
+import heapq
 import re
-from typing import Any, Literal
+from typing import Any, AsyncIterator, Callable, Literal, NamedTuple
 from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
 
 from src.audit import log_denied_tool_invocation
 from src.auth.models import AuthenticatedUser
 from src.auth.exceptions import ToolNotAllowedError
-from src.registry.service import get_tools_for_user, get_all_tools_cached, get_tools_by_scope_cached
+from src.registry.service import (
+    get_all_tools_cached,
+    get_tools_by_scope_cached,
+    get_tools_by_name_cached,
+    get_core_tools_cached,
+    search_tools_by_embedding_cached,
+    search_tools_semantic_cached,
+)
 from src.gateway.service import invoke_tool
 from src.gateway.schemas import InvokeToolRequest
 from src.registry.filtering import extract_categories_from_prompt
 from src.registry.embedding import generate_embedding
-from src.registry.repository import (
-    get_tools_by_categories,
-    get_core_tools,
-    search_tools_by_embedding,
-    increment_tool_usage,
-)
+from src.registry.repository import get_tools_by_categories
+from src.registry.usage import record_tool_usage
+from src.serialization import json_dumps
 
 from .schemas import (
     MCPTool,
@@ -29,61 +34,69 @@ from .schemas import (
     MCPInitializeParams,
 )
 
-META_TOOL_NAMES = {"find_tools", "call_tool"}
-
+_DEFAULT_INPUT_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {},
+    "additionalProperties": True,
+}
+
+# Built once; every tools/list response shares these instances.
+_META_TOOLS: tuple[MCPTool, ...] = (
+    MCPTool(
+        name="find_tools",
+        description="Discover available tools by intent and return tool schemas.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "User intent or task description."},
+                "max_results": {"type": "integer", "minimum": 1, "maximum": 20, "default": 5},
+            },
+            "required": ["query"],
+            "additionalProperties": False,
+        },
+    ),
+    MCPTool(
+        name="call_tool",
+        description="Invoke a discovered tool by name with explicit arguments.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Discovered tool name to invoke."},
+                "arguments": {"type": "object", "default": {}},
+            },
+            "required": ["name"],
+            "additionalProperties": False,
+        },
+    ),
+)
 
-def _default_input_schema() -> dict[str, Any]:
-    return {
-        "type": "object",
-        "properties": {},
-        "additionalProperties": True,
-    }
+META_TOOL_NAMES = frozenset(tool.name for tool in _META_TOOLS)
 
 
-def _build_meta_tools() -> list[MCPTool]:
-    return [
-        MCPTool(
-            name="find_tools",
-            description="Discover available tools by intent and return tool schemas.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string", "description": "User intent or task description."},
-                    "max_results": {"type": "integer", "minimum": 1, "maximum": 20, "default": 5},
-                },
-                "required": ["query"],
-                "additionalProperties": False,
-            },
-        ),
-        MCPTool(
-            name="call_tool",
-            description="Invoke a discovered tool by name with explicit arguments.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Discovered tool name to invoke."},
-                    "arguments": {"type": "object", "default": {}},
-                },
-                "required": ["name"],
-                "additionalProperties": False,
-            },
-        ),
-    ]
+def _default_input_schema() -> dict[str, Any]:
+    # Shared constant; callers only read or serialize it.
+    return _DEFAULT_INPUT_SCHEMA
 
 
-def _to_mcp_tool(tool: Any) -> MCPTool:
-    return MCPTool(
+def _build_mcp_tool(tool: Any) -> MCPTool:
+    # Registry rows are already validated; skip per-field re-validation.
+    return MCPTool.model_construct(
         name=getattr(tool, "name"),
         description=getattr(tool, "description"),
         inputSchema=getattr(tool, "input_schema", None) or _default_input_schema(),
     )
 
 
+def _to_mcp_tool(tool: Any) -> MCPTool:
+    view = _cached_view(tool)
+    return view.mcp_tool if view is not None else _build_mcp_tool(tool)
+
+
 def _merge_with_meta_tools(tools: list[MCPTool]) -> list[MCPTool]:
-    merged: list[MCPTool] = []
-    seen_names: set[str] = set()
+    merged: list[MCPTool] = list(_META_TOOLS)
+    seen_names: set[str] = set(META_TOOL_NAMES)
 
-    for tool in [*_build_meta_tools(), *tools]:
+    for tool in tools:
         if tool.name in seen_names:
             continue
         merged.append(tool)
@@ -92,18 +105,28 @@ def _merge_with_meta_tools(tools: list[MCPTool]) -> list[MCPTool]:
     return merged
 
 
-def _is_tool_accessible(tool: Any, user: AuthenticatedUser) -> bool:
-    if "*" not in user.allowed_tools and getattr(tool, "name", "") not in user.allowed_tools:
-        return False
+def _tool_access_checker(user: AuthenticatedUser) -> Callable[[Any], bool]:
+    # Resolve the user's permissions once per request, not once per tool.
+    allow_all = "*" in user.allowed_tools
+    allowed_tools = user.allowed_tools
+    user_roles = user.roles
 
-    required_roles = getattr(tool, "required_roles", None) or []
-    if required_roles and not any(role in user.roles for role in required_roles):
-        return False
+    def is_accessible(tool: Any) -> bool:
+        if not allow_all and getattr(tool, "name", "") not in allowed_tools:
+            return False
+        required_roles = getattr(tool, "required_roles", None)
+        return not required_roles or not user_roles.isdisjoint(required_roles)
 
-    return True
+    return is_accessible
 
 
-def _tool_discovery_payload(tool: Any) -> dict[str, Any]:
+async def _accessible_tools(db: AsyncSession, user: AuthenticatedUser) -> list[Any]:
+    # Filter the cached registry rows in memory; same rules as get_tools_for_user.
+    is_accessible = _tool_access_checker(user)
+    return [tool for tool in await get_all_tools_cached(db) if is_accessible(tool)]
+
+
+def _build_discovery_payload(tool: Any) -> dict[str, Any]:
     return {
         "name": getattr(tool, "name"),
         "description": getattr(tool, "description"),
@@ -111,28 +134,100 @@ def _tool_discovery_payload(tool: Any) -> dict[str, Any]:
     }
 
 
-def _tool_match_score(tool: Any, query: str, categories: set[str]) -> int:
-    query_lower = query.lower().strip()
+def _tool_discovery_payload(tool: Any) -> dict[str, Any]:
+    view = _cached_view(tool)
+    return view.discovery_payload if view is not None else _build_discovery_payload(tool)
+
+
+def _format_result_text(result: Any) -> str:
+    # Compact output: the text goes to a model, where indentation only costs tokens.
+    return json_dumps(result).decode()
+
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+def _query_terms(query_lower: str) -> tuple[str, ...]:
+    return tuple(term for term in _TOKEN_SPLIT.split(query_lower) if term)
+
+
+class _ToolView(NamedTuple):
+    """Read-only snapshot of the tool attributes discovery needs."""
+
+    tool: Any
+    name: str
+    required_roles: list[str] | None
+    name_lower: str
+    description_lower: str
+    search_text: str
+    categories: frozenset[str]
+    # Shared across requests; callers only read or serialize them.
+    mcp_tool: MCPTool
+    discovery_payload: dict[str, Any]
+
+
+# Views per cached tool list ("all", "core", or a scope), each memoized on
+# the identity of the registry's snapshot-derived list, so they are built
+# once per registry refresh and never stored on the ORM rows themselves.
+_tool_views_memo: dict[str, tuple[list[Any], list[_ToolView], dict[int, _ToolView]]] = {}
+
+
+def _tool_views(tools: list[Any], slot: str = "all") -> list[_ToolView]:
+    memo = _tool_views_memo.get(slot)
+    if memo is not None and memo[0] is tools:
+        return memo[1]
+
+    views: list[_ToolView] = []
+    for tool in tools:
+        name = getattr(tool, "name", "") or ""
+        name_lower = name.lower()
+        description_lower = (getattr(tool, "description", "") or "").lower()
+        views.append(_ToolView(
+            tool=tool,
+            name=name,
+            required_roles=getattr(tool, "required_roles", None),
+            name_lower=name_lower,
+            description_lower=description_lower,
+            search_text=f"{name_lower} {description_lower}",
+            categories=frozenset(getattr(tool, "categories", None) or ()),
+            mcp_tool=_build_mcp_tool(tool),
+            discovery_payload=_build_discovery_payload(tool),
+        ))
+    # The memo keeps ``tools`` alive, so the ids used as keys cannot be reused.
+    _tool_views_memo[slot] = (tools, views, {id(view.tool): view for view in views})
+    return views
+
+
+def _cached_view(tool: Any) -> _ToolView | None:
+    # Rows from the active-tool snapshot (e.g. semantic search hits) reuse
+    # the payloads built for it; anything else is converted on demand.
+    memo = _tool_views_memo.get("all")
+    if memo is None:
+        return None
+    view = memo[2].get(id(tool))
+    return view if view is not None and view.tool is tool else None
+
+
+def _tool_match_score(
+    view: _ToolView,
+    query_lower: str,
+    query_terms: tuple[str, ...],
+    categories: frozenset[str],
+) -> int:
     if not query_lower:
         return 0
 
-    name = (getattr(tool, "name", "") or "").lower()
-    description = (getattr(tool, "description", "") or "").lower()
-    text = f"{name} {description}"
-
     score = 0
-    if query_lower in text:
+    if query_lower in view.search_text:
         score += 5
 
-    terms = [term for term in re.split(r"[^a-z0-9]+", query_lower) if term]
-    for term in terms:
-        if term in name:
+    for term in query_terms:
+        if term in view.name_lower:
             score += 3
-        elif term in description:
+        elif term in view.description_lower:
             score += 1
 
-    tool_categories = set(getattr(tool, "categories", []) or [])
-    if categories and tool_categories.intersection(categories):
+    if categories and not categories.isdisjoint(view.categories):
         score += 2
 
     return score
@@ -181,83 +276,73 @@ async def handle_tools_list_smart(
         Filtered list of relevant tools
     """
     if strategy == "minimal":
-        core_tools = await get_core_tools(db)
-        mcp_tools = [_to_mcp_tool(tool) for tool in core_tools]
-        return MCPToolListResult(tools=_merge_with_meta_tools(mcp_tools))
+        core_tools = await get_core_tools_cached(db)
+        mcp_tools = [view.mcp_tool for view in _tool_views(core_tools, "core")]
+        return MCPToolListResult.model_construct(tools=_merge_with_meta_tools(mcp_tools))
     
     # LEGACY: Full smart routing for other strategies
-    tools_to_return = []
+    # Insertion-ordered and keyed by name: dedup and size checks in one structure.
+    selected: dict[str, Any] = {}
+
+    def add_tools(tools: list[Any], limit: int | None = None) -> None:
+        for tool in tools:
+            if limit is not None and len(selected) >= limit:
+                return
+            selected.setdefault(tool.name, tool)
+    
+    embed_task: asyncio.Future[list[float]] | None = None
+    if context and strategy == "rag":
+        # RAG always needs the embedding, which runs in a worker thread; overlap
+        # it with the core lookup. Hybrid only embeds once categories fall short,
+        # since cancelling would not stop work already handed to the encoder.
+        embed_task = asyncio.ensure_future(generate_embedding(context))
+        embed_task.add_done_callback(lambda task: task.cancelled() or task.exception())
     
     # Core strategy: Always get core tools first
-    core_tools = await get_core_tools(db)
-    tools_to_return.extend(core_tools)
-    existing_names = {t.name for t in tools_to_return}
+    add_tools(await get_core_tools_cached(db))
     
     if strategy == "all" or not context:
         # No filtering (beyond core), return all available tools
-        tool_response = await get_tools_for_user(db, user)
-        for t_resp in tool_response.tools:
-            if t_resp.name not in existing_names:
-                # Add enough info for MCPTool conversion later
-                tools_to_return.append(t_resp)
-                existing_names.add(t_resp.name)
+        add_tools(await _accessible_tools(db, user))
                 
     elif strategy == "rule":
         # Tier 2: Category-based filtering
         categories = extract_categories_from_prompt(context)
         if categories:
-            category_tools = await get_tools_by_categories(db, list(categories), user.user_id)
-            for tool in category_tools:
-                if tool.name not in existing_names and len(tools_to_return) < max_tools:
-                    tools_to_return.append(tool)
-                    existing_names.add(tool.name)
+            add_tools(await get_tools_by_categories(db, list(categories), user.user_id), max_tools)
         
     elif strategy == "rag":
         # Tier 3: Pure RAG-MCP approach
         try:
-            query_embedding = await generate_embedding(context)
-            rag_tools = await search_tools_by_embedding(
-                db, query_embedding, top_k=max_tools - len(tools_to_return)
+            query_embedding = await embed_task
+            rag_tools = await search_tools_by_embedding_cached(
+                db, query_embedding, top_k=max_tools - len(selected)
             )
-            for tool in rag_tools:
-                if tool.name not in existing_names and len(tools_to_return) < max_tools:
-                    tools_to_return.append(tool)
-                    existing_names.add(tool.name)
+            add_tools(rag_tools, max_tools)
         except Exception:
             # Fallback to all if RAG fails
-            tool_response = await get_tools_for_user(db, user)
-            for t_resp in tool_response.tools:
-                if t_resp.name not in existing_names and len(tools_to_return) < max_tools:
-                    tools_to_return.append(t_resp)
-                    existing_names.add(t_resp.name)
+            add_tools(await _accessible_tools(db, user), max_tools)
         
     elif strategy == "hybrid":
         # Tier 2: Rule-based category filtering
         categories = extract_categories_from_prompt(context)
         if categories:
-            category_tools = await get_tools_by_categories(db, list(categories), user.user_id)
-            for tool in category_tools:
-                if tool.name not in existing_names and len(tools_to_return) < max_tools:
-                    tools_to_return.append(tool)
-                    existing_names.add(tool.name)
+            add_tools(await get_tools_by_categories(db, list(categories), user.user_id), max_tools)
         
         # Tier 3: RAG fallback if we have < 10 tools
-        if len(tools_to_return) < 10:
+        if len(selected) < 10:
             try:
                 query_embedding = await generate_embedding(context)
-                rag_tools = await search_tools_by_embedding(
-                    db, query_embedding, top_k=max_tools - len(tools_to_return)
+                rag_tools = await search_tools_by_embedding_cached(
+                    db, query_embedding, top_k=max_tools - len(selected)
                 )
-                for tool in rag_tools:
-                    if tool.name not in existing_names and len(tools_to_return) < max_tools:
-                        tools_to_return.append(tool)
-                        existing_names.add(tool.name)
+                add_tools(rag_tools, max_tools)
             except Exception:
                 pass
     
     # Convert to MCP format
-    mcp_tools = [_to_mcp_tool(tool) for tool in tools_to_return]
-    return MCPToolListResult(tools=_merge_with_meta_tools(mcp_tools))
+    mcp_tools = [_to_mcp_tool(tool) for tool in selected.values()]
+    return MCPToolListResult.model_construct(tools=_merge_with_meta_tools(mcp_tools))
 
 
 async def handle_find_tools(
@@ -286,20 +371,20 @@ async def handle_find_tools(
     semantic_tools: list[Any] = []
     if query:
         try:
-            query_embedding = await generate_embedding(query)
-            semantic_tools = await search_tools_by_embedding(
+            semantic_tools = await search_tools_semantic_cached(
                 db,
-                query_embedding,
+                query,
                 top_k=max_results,
                 threshold=0.3,
             )
         except Exception as e:
             errors.append(str(e))
 
+    is_accessible = _tool_access_checker(user)
     discovered_tools: list[dict[str, Any]] = []
     seen_names: set[str] = set()
     for tool in semantic_tools:
-        if not _is_tool_accessible(tool, user):
+        if not is_accessible(tool):
             continue
         name = getattr(tool, "name", "")
         if name in seen_names:
@@ -309,27 +394,26 @@ async def handle_find_tools(
 
     if len(discovered_tools) < max_results:
         all_tools = await get_all_tools_cached(db)
-        accessible_tools = [tool for tool in all_tools if _is_tool_accessible(tool, user)]
         categories = extract_categories_from_prompt(query)
+        query_lower = query.lower()
+        query_terms = _query_terms(query_lower)
 
-        ranked = sorted(
-            accessible_tools,
-            key=lambda tool: (
-                _tool_match_score(tool, query, categories),
-                getattr(tool, "name", ""),
-            ),
-            reverse=True,
-        )
-        for tool in ranked:
-            name = getattr(tool, "name", "")
-            if name in seen_names:
+        candidates: list[tuple[int, str, Any]] = []
+        for view in _tool_views(all_tools):
+            if view.name in seen_names or not is_accessible(view):
                 continue
-            if query and _tool_match_score(tool, query, categories) <= 0:
+            score = _tool_match_score(view, query_lower, query_terms, categories)
+            if query and score <= 0:
                 continue
-            discovered_tools.append(_tool_discovery_payload(tool))
-            seen_names.add(name)
-            if len(discovered_tools) >= max_results:
-                break
+            candidates.append((score, view.name, view.tool))
+            seen_names.add(view.name)
+
+        ranked = heapq.nlargest(
+            max_results - len(discovered_tools),
+            candidates,
+            key=lambda candidate: (candidate[0], candidate[1]),
+        )
+        discovered_tools.extend(_tool_discovery_payload(tool) for _, _, tool in ranked)
 
     response: dict[str, Any] = {
         "query": query,
@@ -342,6 +426,31 @@ async def handle_find_tools(
     return response
 
 
+async def iter_tools_list(
+    db: AsyncSession,
+    user: AuthenticatedUser,
+    scope: str,
+) -> AsyncIterator[MCPTool]:
+    """Yield the tools a user can see on a scoped endpoint, one at a time.
+    
+    Lets a streaming transport emit each tool as soon as it passes the
+    access filter instead of waiting for the full list.
+    
+    Args:
+        db: Database session.
+        user: Authenticated user.
+        scope: Endpoint scope.
+        
+    Yields:
+        Accessible, non-meta tools in registry order.
+    """
+    scoped_tools = await get_tools_by_scope_cached(db, scope)
+    is_accessible = _tool_access_checker(user)
+    for view in _tool_views(scoped_tools, f"scope:{scope}"):
+        if is_accessible(view) and view.name not in META_TOOL_NAMES:
+            yield view.mcp_tool
+
+
 async def handle_tools_list(
     db: AsyncSession,
     user: AuthenticatedUser,
@@ -359,13 +468,8 @@ async def handle_tools_list(
     Returns:
         List of tools available to the user.
     """
-    scoped_tools = await get_tools_by_scope_cached(db, scope)
-    visible_tools = [
-        _to_mcp_tool(tool)
-        for tool in scoped_tools
-        if _is_tool_accessible(tool, user) and getattr(tool, "name", "") not in META_TOOL_NAMES
-    ]
-    return MCPToolListResult(tools=visible_tools)
+    visible_tools = [tool async for tool in iter_tools_list(db, user, scope)]
+    return MCPToolListResult.model_construct(tools=visible_tools)
 
 
 async def handle_tools_call(
@@ -391,8 +495,7 @@ async def handle_tools_call(
     Returns:
         Tool execution result.
     """
-    all_tools = await get_all_tools_cached(db)
-    tool = next((t for t in all_tools if t.name == name), None)
+    tool = (await get_tools_by_name_cached(db)).get(name)
     if tool is None:
         await log_denied_tool_invocation(
             db=db,
@@ -401,8 +504,8 @@ async def handle_tools_call(
             endpoint_path=endpoint_path,
             error_code="TOOL_NOT_FOUND",
         )
-        return MCPToolCallResult(
-            content=[MCPContent(type="text", text=f"Error: Tool '{name}' not found")],
+        return MCPToolCallResult.model_construct(
+            content=[MCPContent.model_construct(type="text", text=f"Error: Tool '{name}' not found")],
             isError=True,
         )
 
@@ -432,14 +535,14 @@ async def handle_tools_call(
             endpoint_path=endpoint_path,
         )
         
-        # Increment usage counter if successful
+        # Count usage if successful; written to the database in batches
         if not response.error and response.tool_id:
-            await increment_tool_usage(db, response.tool_id)
+            record_tool_usage(response.tool_id)
         
         # Convert gateway response to MCP format
         if response.error:
-            return MCPToolCallResult(
-                content=[MCPContent(
+            return MCPToolCallResult.model_construct(
+                content=[MCPContent.model_construct(
                     type="text",
                     text=f"Error: {response.error.message}"
                 )],
@@ -447,9 +550,9 @@ async def handle_tools_call(
             )
         
         # Format successful result as text content
-        result_text = json.dumps(response.result, indent=2)
-        return MCPToolCallResult(
-            content=[MCPContent(
+        result_text = _format_result_text(response.result)
+        return MCPToolCallResult.model_construct(
+            content=[MCPContent.model_construct(
                 type="text",
                 text=result_text
             )],
@@ -459,8 +562,8 @@ async def handle_tools_call(
     except ToolNotAllowedError:
         raise
     except Exception as e:
-        return MCPToolCallResult(
-            content=[MCPContent(
+        return MCPToolCallResult.model_construct(
+            content=[MCPContent.model_construct(
                 type="text",
                 text=f"Exception: {str(e)}"
             )],
@@ -1,11 +1,16 @@
 """SSE transport implementation for MCP protocol."""
 
 import asyncio
-from typing import Annotated
+import logging
+import math
+from typing import Annotated, Any, Awaitable, Callable, NamedTuple
 import httpx
+import orjson
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.convertors import Convertor, register_url_convertor
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.dependencies import get_current_user
@@ -14,21 +19,59 @@ from src.auth.exceptions import MCPGatewayError, ToolNotAllowedError
 from src.database import get_db
 from src.dependencies import get_http_client
 from src.ratelimit import check_rate_limit, RateLimitExceededError
+from src.serialization import json_dumps
 
 from .schemas import MCPJSONRPCRequest, MCPJSONRPCResponse, MCPInitializeParams, MCPToolCallParams
 from .service import handle_initialize, handle_tools_list, handle_tools_call
 
 
-router = APIRouter(prefix="", tags=["mcp-sse"])
-ALLOWED_SCOPES = {"calculator", "git", "docs"}
+logger = logging.getLogger(__name__)
+
+
+class _ORJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson, with the stdlib encoder as fallback."""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+router = APIRouter(prefix="", tags=["mcp-sse"], default_response_class=_ORJSONResponse)
+ALLOWED_SCOPES = frozenset({"calculator", "git", "docs"})
 INVALID_SCOPE_ERROR_CODE = -32010
 TOOL_NOT_IN_SCOPE_ERROR_CODE = -32011
 META_TOOL_REMOVED_ERROR_CODE = -32012
+RATE_LIMITED_ERROR_CODE = -32013
+INVALID_REQUEST_ERROR_CODE = -32600
+METHOD_NOT_FOUND_ERROR_CODE = -32601
+INTERNAL_ERROR_CODE = -32603
+GATEWAY_ERROR_CODE = -32000
+PARSE_ERROR_CODE = -32700
+# Entries run one after another, so an unbounded batch could hold a request open indefinitely.
+MAX_BATCH_SIZE = 50
+SSE_PING_INTERVAL_SECONDS = 30
+_SSE_PING_FRAME = b": ping\n\n"
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # Stops Nginx-style proxies buffering the stream even without proxy_buffering off.
+    "X-Accel-Buffering": "no",
+}
+
+
+class _ScopeConvertor(Convertor[str]):
+    """Path converter that only matches allowed scopes, so unknown scopes
+    are rejected during route matching instead of inside the endpoint."""
 
+    regex = "|".join(sorted(ALLOWED_SCOPES))
 
-def _validate_scope(scope: str) -> None:
-    if scope not in ALLOWED_SCOPES:
-        raise HTTPException(status_code=404, detail="Not Found")
+    def convert(self, value: str) -> str:
+        return value
+
+    def to_string(self, value: str) -> str:
+        return value
+
+
+register_url_convertor("mcp_scope", _ScopeConvertor())
 
 
 def _jsonrpc_error_response(
@@ -37,145 +80,351 @@ def _jsonrpc_error_response(
     message: str,
     status_code: int = 200,
 ) -> JSONResponse:
-    return JSONResponse(
+    return _ORJSONResponse(
         status_code=status_code,
-        content=MCPJSONRPCResponse(
-            id=request_id,
-            error={"code": code, "message": message},
-        ).model_dump(),
+        content=_jsonrpc_error_payload(request_id, code, message),
+    )
+
+
+def _jsonrpc_error_payload(request_id: str | int | None, code: int, message: str) -> dict[str, Any]:
+    # Same shape as MCPJSONRPCResponse.model_dump(), without model construction.
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "result": None,
+        "error": {"code": code, "message": message},
+    }
+
+
+def _jsonrpc_error(request_id: str | int | None, code: int, message: str) -> MCPJSONRPCResponse:
+    return MCPJSONRPCResponse.model_construct(
+        id=request_id, error={"code": code, "message": message}
     )
 
 
+class _Heartbeat:
+    """Single ticker per event loop that wakes every idle SSE stream at once.
+
+    Streams await a shared event instead of owning their own sleep timer.
+    The ticker starts with the first waiter and exits once no stream is
+    waiting, so it needs no lifespan wiring.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._event: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._waiters = 0
+
+    async def wait(self) -> None:
+        task = self._task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._event = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        event = self._event
+        self._waiters += 1
+        try:
+            await event.wait()
+        finally:
+            self._waiters -= 1
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            # Swap before setting so streams re-arm on the next tick's event.
+            event, self._event = self._event, asyncio.Event()
+            event.set()
+            if not self._waiters:
+                return
+
+
+_heartbeat = _Heartbeat(SSE_PING_INTERVAL_SECONDS)
+
+
+def _sse_event(event: str, data: str) -> bytes:
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
 async def _handle_sse_get(request: Request, scope: str) -> StreamingResponse:
-    # SSE Stream for server-to-client messages
+    # SSE Stream for server-to-client messages; frames are yielded pre-encoded.
+    # The endpoint frame is built before streaming starts, once per connection.
+    url = request.url
+    endpoint_frame = _sse_event("endpoint", f"{url.scheme}://{url.netloc}/{scope}/sse")
+
     async def event_stream():
         # Send endpoint configuration
-        message_endpoint = f"{request.url.scheme}://{request.url.netloc}/{scope}/sse"
-        yield f"event: endpoint\\ndata: {message_endpoint}\\n\\n"
+        yield endpoint_frame
 
         # Keep connection alive
         try:
             while True:
-                await asyncio.sleep(30)
-                yield f": ping\\n\\n"
+                await _heartbeat.wait()
+                yield _SSE_PING_FRAME
         except asyncio.CancelledError:
             pass
 
     return StreamingResponse(
         event_stream(),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        },
+        headers=_SSE_HEADERS,
     )
 
 
+class _SSECallContext(NamedTuple):
+    scope: str
+    request: Request
+    user: AuthenticatedUser
+    db: AsyncSession
+    client: httpx.AsyncClient
+
+
+_SSEPostResult = MCPJSONRPCResponse | None
+
+# Built once at import; each validate call goes straight to pydantic-core.
+_INIT_PARAMS_ADAPTER = TypeAdapter(MCPInitializeParams)
+_TOOL_CALL_PARAMS_ADAPTER = TypeAdapter(MCPToolCallParams)
+_BATCH_ADAPTER = TypeAdapter(list[MCPJSONRPCRequest])
+
+
+async def _do_initialize(
+    jsonrpc_request: MCPJSONRPCRequest, params: dict[str, Any], ctx: _SSECallContext
+) -> _SSEPostResult:
+    init_params = _INIT_PARAMS_ADAPTER.validate_python(params)
+    result = await handle_initialize(init_params)
+    return MCPJSONRPCResponse(id=jsonrpc_request.id, result=result)
+
+
+async def _do_notifications_initialized(
+    jsonrpc_request: MCPJSONRPCRequest, params: dict[str, Any], ctx: _SSECallContext
+) -> _SSEPostResult:
+    # Client is confirming initialization, just acknowledge
+    return None
+
+
+async def _do_tools_list(
+    jsonrpc_request: MCPJSONRPCRequest, params: dict[str, Any], ctx: _SSECallContext
+) -> _SSEPostResult:
+    # Extract context if available (standard in some MCP clients)
+    context = params.get("context")
+    result = await handle_tools_list(ctx.db, ctx.user, scope=ctx.scope, context=context)
+    # Keep the result model; it is serialized once, straight to JSON.
+    return MCPJSONRPCResponse.model_construct(id=jsonrpc_request.id, result=result)
+
+
+async def _do_tools_call(
+    jsonrpc_request: MCPJSONRPCRequest, params: dict[str, Any], ctx: _SSECallContext
+) -> _SSEPostResult:
+    call_params = _TOOL_CALL_PARAMS_ADAPTER.validate_python(params)
+
+    if call_params.name in {"find_tools", "call_tool"}:
+        return _jsonrpc_error(
+            request_id=jsonrpc_request.id,
+            code=META_TOOL_REMOVED_ERROR_CODE,
+            message=(
+                f"Meta-tool '{call_params.name}' was removed in v2. "
+                "Use scoped tools/list and tools/call directly."
+            ),
+        )
+
+    rate_result = await check_rate_limit(user_id=ctx.user.user_id, tool_name=call_params.name)
+    if not rate_result.allowed:
+        raise RateLimitExceededError(
+            limit=rate_result.limit,
+            retry_after=rate_result.retry_after,
+            reset_at=rate_result.reset_at,
+        )
+
+    # Regular tool call
+    try:
+        result = await handle_tools_call(
+            db=ctx.db,
+            user=ctx.user,
+            client=ctx.client,
+            scope=ctx.scope,
+            name=call_params.name,
+            arguments=call_params.arguments,
+            endpoint_path=ctx.request.url.path,
+        )
+    except ToolNotAllowedError:
+        return _jsonrpc_error(
+            request_id=jsonrpc_request.id,
+            code=TOOL_NOT_IN_SCOPE_ERROR_CODE,
+            message=(
+                f"Tool '{call_params.name}' is not available on endpoint "
+                f"'/{ctx.scope}/sse'."
+            ),
+        )
+    # Keep the result model; it is serialized once, straight to JSON.
+    return MCPJSONRPCResponse.model_construct(id=jsonrpc_request.id, result=result)
+
+
+_METHOD_HANDLERS: dict[
+    str,
+    Callable[[MCPJSONRPCRequest, dict[str, Any], _SSECallContext], Awaitable[_SSEPostResult]],
+] = {
+    "initialize": _do_initialize,
+    "notifications/initialized": _do_notifications_initialized,
+    "tools/list": _do_tools_list,
+    "tools/call": _do_tools_call,
+}
+
+
 async def _handle_sse_post(
     scope: str,
     request: Request,
     user: AuthenticatedUser,
     db: AsyncSession,
     client: httpx.AsyncClient,
-) -> MCPJSONRPCResponse | None:
-    # Parse the JSON-RPC request
-    body = await request.json()
-    jsonrpc_request = MCPJSONRPCRequest(**body)
+) -> MCPJSONRPCResponse | JSONResponse | None:
+    raw = await request.body()
+    ctx = _SSECallContext(scope, request, user, db, client)
+    if raw.lstrip()[:1] == b"[":
+        return await _run_to_completion(_handle_sse_batch(raw, ctx))
+
+    # Parse the JSON-RPC request straight from bytes, without an intermediate dict
+    jsonrpc_request = MCPJSONRPCRequest.model_validate_json(raw)
+    try:
+        return await _run_to_completion(_dispatch(jsonrpc_request, ctx))
+    except RateLimitExceededError as e:
+        return _rate_limited_response(jsonrpc_request.id, e)
+
+
+def _rate_limited_response(request_id: str | int | None, exc: RateLimitExceededError) -> JSONResponse:
+    # HTTP 429 + Retry-After lets proxies back off; the JSON-RPC body serves MCP clients.
+    headers = {
+        "Retry-After": str(math.ceil(exc.retry_after)),
+        "X-RateLimit-Limit": str(exc.limit),
+        "X-RateLimit-Remaining": "0",
+    }
+    if exc.reset_at is not None:
+        headers["X-RateLimit-Reset"] = str(exc.reset_at)
+    return _ORJSONResponse(
+        status_code=429, content=_rate_limited_payload(request_id, exc), headers=headers
+    )
+
+
+def _rate_limited_payload(request_id: str | int | None, exc: RateLimitExceededError) -> dict[str, Any]:
+    payload = _jsonrpc_error_payload(request_id, RATE_LIMITED_ERROR_CODE, exc.message)
+    payload["error"]["data"] = {"error": exc.code, "retry_after": exc.retry_after}
+    return payload
 
-    method = jsonrpc_request.method
-    params = jsonrpc_request.params or {}
 
+async def _run_to_completion(coro: Awaitable[Any]) -> Any:
+    # Once dispatched, a call has side effects (rate-limit debit, backend tool
+    # call, audit row). A client disconnect must not abandon it halfway, or a
+    # retry double-debits and double-invokes.
+    task = asyncio.ensure_future(coro)
     try:
-        if method == "initialize":
-            init_params = MCPInitializeParams(**params)
-            result = await handle_initialize(init_params)
-            return MCPJSONRPCResponse(id=jsonrpc_request.id, result=result)
-
-        elif method == "notifications/initialized":
-            # Client is confirming initialization, just acknowledge
-            return None
-
-        elif method == "tools/list":
-            # Extract context if available (standard in some MCP clients)
-            context = params.get("context")
-            result = await handle_tools_list(db, user, scope=scope, context=context)
-            return MCPJSONRPCResponse(id=jsonrpc_request.id, result=result.model_dump())
-
-        elif method == "tools/call":
-            call_params = MCPToolCallParams(**params)
-
-            if call_params.name in {"find_tools", "call_tool"}:
-                return _jsonrpc_error_response(
-                    request_id=jsonrpc_request.id,
-                    code=META_TOOL_REMOVED_ERROR_CODE,
-                    message=(
-                        f"Meta-tool '{call_params.name}' was removed in v2. "
-                        "Use scoped tools/list and tools/call directly."
-                    ),
-                )
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        # Finish before re-raising so the request's DB session is not torn
+        # down underneath the still-running call.
+        await asyncio.wait({task})
+        raise
 
-            rate_result = check_rate_limit(user_id=user.user_id, tool_name=call_params.name)
-            if not rate_result.allowed:
-                raise RateLimitExceededError(limit=rate_result.limit, retry_after=rate_result.retry_after)
-
-            # Regular tool call
-            try:
-                result = await handle_tools_call(
-                    db=db,
-                    user=user,
-                    client=client,
-                    scope=scope,
-                    name=call_params.name,
-                    arguments=call_params.arguments,
-                    endpoint_path=request.url.path,
-                )
-            except ToolNotAllowedError:
-                return _jsonrpc_error_response(
-                    request_id=jsonrpc_request.id,
-                    code=TOOL_NOT_IN_SCOPE_ERROR_CODE,
-                    message=(
-                        f"Tool '{call_params.name}' is not available on endpoint "
-                        f"'/{scope}/sse'."
-                    ),
-                )
-            return MCPJSONRPCResponse(id=jsonrpc_request.id, result=result.model_dump())
-
-        else:
-            return MCPJSONRPCResponse(
-                id=jsonrpc_request.id,
-                error={
-                    "code": -32601,
-                    "message": f"Method not found: {method}",
-                },
+
+def _validate_batch_entries(raw: bytes) -> list[MCPJSONRPCRequest | dict[str, Any]]:
+    try:
+        # Common case: the whole batch is valid and is parsed in one pass.
+        return list(_BATCH_ADAPTER.validate_json(raw))
+    except ValidationError:
+        pass
+
+    # Per JSON-RPC 2.0, an invalid entry only fails itself.
+    entries: list[MCPJSONRPCRequest | dict[str, Any]] = []
+    for item in orjson.loads(raw):
+        try:
+            entries.append(MCPJSONRPCRequest.model_validate(item))
+        except ValidationError:
+            request_id = item.get("id") if isinstance(item, dict) else None
+            if not isinstance(request_id, (str, int)):
+                request_id = None
+            entries.append(
+                _jsonrpc_error_payload(request_id, INVALID_REQUEST_ERROR_CODE, "Invalid Request")
             )
+    return entries
+
+
+async def _handle_sse_batch(raw: bytes, ctx: _SSECallContext) -> JSONResponse | None:
+    try:
+        entries = _validate_batch_entries(raw)
+    except orjson.JSONDecodeError:
+        return _jsonrpc_error_response(request_id=None, code=PARSE_ERROR_CODE, message="Parse error")
+    if not entries:
+        return _jsonrpc_error_response(
+            request_id=None,
+            code=INVALID_REQUEST_ERROR_CODE,
+            message="Invalid Request: empty batch",
+        )
+    if len(entries) > MAX_BATCH_SIZE:
+        return _jsonrpc_error_response(
+            request_id=None,
+            code=INVALID_REQUEST_ERROR_CODE,
+            message=f"Invalid Request: batch exceeds {MAX_BATCH_SIZE} entries",
+        )
+
+    # Entries share one database session, which does not allow concurrent
+    # use, so they run in order; the win is one HTTP round-trip for N calls.
+    responses: list[dict[str, Any]] = []
+    for jsonrpc_request in entries:
+        if isinstance(jsonrpc_request, dict):
+            responses.append(jsonrpc_request)
+            continue
+
+        # A notification (no "id" member) gets no response, not even an error.
+        is_notification = "id" not in jsonrpc_request.model_fields_set
+        try:
+            result = await _dispatch(jsonrpc_request, ctx)
+        except RateLimitExceededError as e:
+            # Same error object as a single call; the batch itself stays HTTP 200.
+            if not is_notification:
+                responses.append(_rate_limited_payload(jsonrpc_request.id, e))
+            continue
+        except MCPGatewayError as e:
+            # One failing entry must not fail the whole batch.
+            if not is_notification:
+                responses.append(
+                    _jsonrpc_error_payload(jsonrpc_request.id, GATEWAY_ERROR_CODE, e.message)
+                )
+            continue
+        if result is not None and not is_notification:
+            responses.append(result.model_dump())
+
+    if not responses:
+        # Batch of notifications only
+        return None
+    return _ORJSONResponse(content=responses)
 
+
+async def _dispatch(jsonrpc_request: MCPJSONRPCRequest, ctx: _SSECallContext) -> _SSEPostResult:
+    method = jsonrpc_request.method
+    params = jsonrpc_request.params or {}
+
+    handler = _METHOD_HANDLERS.get(method)
+    if handler is None:
+        return _jsonrpc_error(jsonrpc_request.id, METHOD_NOT_FOUND_ERROR_CODE, f"Method not found: {method}")
+
+    try:
+        return await handler(jsonrpc_request, params, ctx)
+
+    except MCPGatewayError:
+        raise
     except Exception as e:
-        if isinstance(e, MCPGatewayError):
-            raise
-        import logging
-        logger = logging.getLogger(__name__)
         logger.error(f"Internal error processing {method}: {e}", exc_info=True)
-        return MCPJSONRPCResponse(
-            id=jsonrpc_request.id,
-            error={
-                "code": -32603,
-                "message": f"Internal error: {str(e)}",
-            },
-        )
+        return _jsonrpc_error(jsonrpc_request.id, INTERNAL_ERROR_CODE, f"Internal error: {str(e)}")
 
 
-@router.get("/{scope}/sse", operation_id="sse_endpoint_get")
+@router.get("/{scope:mcp_scope}/sse", operation_id="sse_endpoint_get")
 async def sse_get_endpoint(
     scope: str,
     request: Request,
     user: Annotated[AuthenticatedUser, Depends(get_current_user)],
 ):
     """Establish SSE stream and send endpoint info."""
-    _validate_scope(scope)
     return await _handle_sse_get(request, scope)
 
 
-@router.post("/{scope}/sse", operation_id="sse_endpoint_post")
+@router.post("/{scope:mcp_scope}/sse", operation_id="sse_endpoint_post")
 async def sse_post_endpoint(
     scope: str,
     request: Request,
@@ -184,17 +433,43 @@ async def sse_post_endpoint(
     client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
 ):
     """Handle JSON-RPC 2.0 messages."""
-    if scope not in ALLOWED_SCOPES:
-        request_id: str | int | None = None
-        try:
-            body = await request.json()
-            request_id = body.get("id")
-        except Exception:
-            pass
-        return _jsonrpc_error_response(
-            request_id=request_id,
-            code=INVALID_SCOPE_ERROR_CODE,
-            message=f"Invalid endpoint scope '{scope}'.",
-            status_code=404,
-        )
-    return await _handle_sse_post(scope, request, user, db, client)
+    response = await _handle_sse_post(scope, request, user, db, client)
+    if isinstance(response, MCPJSONRPCResponse):
+        # Serialize in pydantic-core in one pass instead of dict -> jsonable_encoder -> JSON.
+        return Response(content=response.model_dump_json(), media_type="application/json")
+    return response
+
+
+# Registered after the scoped routes, so these only see paths the scope converter rejected.
+@router.get("/{scope}/sse", operation_id="sse_endpoint_get_invalid_scope", include_in_schema=False)
+async def sse_get_invalid_scope_endpoint(
+    scope: str,
+    user: Annotated[AuthenticatedUser, Depends(get_current_user)],
+):
+    """Reject streams opened on an unknown endpoint scope.
+
+    Authenticates first, so unauthenticated callers cannot probe which
+    scopes exist.
+    """
+    raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.post("/{scope}/sse", operation_id="sse_endpoint_post_invalid_scope", include_in_schema=False)
+async def sse_post_invalid_scope_endpoint(
+    scope: str,
+    request: Request,
+    user: Annotated[AuthenticatedUser, Depends(get_current_user)],
+):
+    """Reject JSON-RPC messages sent to an unknown endpoint scope."""
+    request_id: str | int | None = None
+    try:
+        body = orjson.loads(await request.body())
+        request_id = body.get("id")
+    except Exception:
+        pass
+    return _jsonrpc_error_response(
+        request_id=request_id,
+        code=INVALID_SCOPE_ERROR_CODE,
+        message=f"Invalid endpoint scope '{scope}'.",
+        status_code=404,
+    )
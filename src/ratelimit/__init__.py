@@ -8,6 +8,7 @@ from .limiter import (
     get_rate_limiter,
     check_rate_limit,
 )
+from .redis_backend import RedisRateLimiter
 from .exceptions import RateLimitExceededError
 from .middleware import RateLimitMiddleware, rate_limit_dependency
 
@@ -17,6 +18,7 @@ __all__ = [
     "RateLimitResult",
     "TokenBucket",
     "RateLimiter",
+    "RedisRateLimiter",
     "get_rate_limiter",
     "check_rate_limit",
     "RateLimitExceededError",
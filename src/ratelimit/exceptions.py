@@ -9,12 +9,14 @@ class RateLimitExceededError(MCPGatewayError):
     Attributes:
         limit: The rate limit that was exceeded.
         retry_after: Seconds until request can be retried.
+        reset_at: Optional Unix timestamp when the limit resets.
     """
     
-    def __init__(self, limit: int, retry_after: float):
+    def __init__(self, limit: int, retry_after: float, reset_at: int | None = None):
         super().__init__(
             message=f"Rate limit exceeded ({limit} requests/min). Retry after {retry_after:.1f}s",
             code="RATE_LIMIT_EXCEEDED"
         )
         self.limit = limit
         self.retry_after = retry_after
+        self.reset_at = reset_at
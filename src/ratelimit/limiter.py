@@ -1,9 +1,18 @@
 """Token bucket rate limiter with in-memory storage."""
 
+import asyncio
 import time
 import threading
-from typing import NamedTuple
-from pydantic import BaseModel, Field
+from collections import deque
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, NamedTuple
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.config import get_settings
+
+if TYPE_CHECKING:
+    from .redis_backend import RedisRateLimiter
 
 
 class RateLimitConfig(BaseModel):
@@ -14,11 +23,15 @@ class RateLimitConfig(BaseModel):
         burst_size: Maximum burst size (tokens available).
     """
     
+    # Configs are shared by every bucket built from them (e.g. the default
+    # per-tool config), so they cannot be changed after construction.
+    model_config = ConfigDict(frozen=True)
+    
     # Generous defaults as requested
     requests_per_minute: int = Field(default=1000, description="Requests per minute")
     burst_size: int = Field(default=2000, description="Max burst tokens")
     
-    @property
+    @cached_property
     def tokens_per_second(self) -> float:
         """Calculate token refill rate."""
         return self.requests_per_minute / 60.0
@@ -47,7 +60,25 @@ class TokenBucket:
     
     Tokens are added at a constant rate up to a maximum (burst_size).
     Each request consumes one token. If no tokens available, request is denied.
+    
+    State is kept as integers: tokens in thousandths and the last refill as
+    ``time.monotonic_ns()``, so wall-clock (NTP) steps cannot award or
+    withhold tokens.
     """
+
+    __slots__ = (
+        "config",
+        "tokens_milli",
+        "last_update_ns",
+        "_burst_milli",
+        "_tokens_per_second",
+        "_refill_per_ns",
+        "_refill_frac",
+        "_limit",
+        "_reset_at",
+        "_reset_at_refresh_ns",
+        "_lock",
+    )
     
     def __init__(self, config: RateLimitConfig):
         """Initialize token bucket.
@@ -55,60 +86,95 @@ class TokenBucket:
         Args:
             config: Rate limit configuration.
         """
-        self.config = config
-        self.tokens = float(config.burst_size)
-        self.last_update = time.time()
         self._lock = threading.Lock()
+        self.reset(config)
     
-    def _refill(self) -> None:
-        """Refill tokens based on elapsed time."""
-        now = time.time()
-        elapsed = now - self.last_update
-        self.tokens = min(
-            self.config.burst_size,
-            self.tokens + elapsed * self.config.tokens_per_second
-        )
-        self.last_update = now
+    def reset(self, config: RateLimitConfig) -> None:
+        """Re-initialize as a full bucket, e.g. when reused from a pool.
+        
+        Args:
+            config: Rate limit configuration.
+        """
+        self.config = config
+        self._burst_milli = config.burst_size * 1000
+        # Read once here rather than through the config property on every check.
+        self._tokens_per_second = config.tokens_per_second
+        # Milli-tokens per nanosecond as a 32.32 fixed-point integer.
+        self._refill_per_ns = int(self._tokens_per_second * 1000 * 2**32 / 1_000_000_000)
+        self._limit = config.requests_per_minute
+        self.tokens_milli = self._burst_milli
+        # Sub-milli-token refill carried between checks (low 32 bits).
+        self._refill_frac = 0
+        self.last_update_ns = time.monotonic_ns()
+        # Wall-clock reset hint, re-read from time.time() at most once a second.
+        self._reset_at = 0
+        self._reset_at_refresh_ns = self.last_update_ns
     
     def consume(self, tokens: int = 1) -> RateLimitResult:
         """Try to consume tokens from the bucket.
         
+        Refill and consumption happen in one pass over local values; both
+        outcomes are computed from the same refilled balance.
+        
         Args:
             tokens: Number of tokens to consume.
             
         Returns:
             RateLimitResult with allow/deny status and metadata.
         """
+        cost_milli = tokens * 1000
         with self._lock:
-            self._refill()
-            
-            if self.tokens >= tokens:
-                self.tokens -= tokens
-                return RateLimitResult(
-                    allowed=True,
-                    limit=self.config.requests_per_minute,
-                    remaining=int(self.tokens),
-                    reset_at=int(self.last_update + 60),
-                )
+            now_ns = time.monotonic_ns()
+            refill = (now_ns - self.last_update_ns) * self._refill_per_ns + self._refill_frac
+            self.last_update_ns = now_ns
+            available = self.tokens_milli + (refill >> 32)
+            if available >= self._burst_milli:
+                available = self._burst_milli
+                self._refill_frac = 0
             else:
-                # Calculate wait time until enough tokens available
-                tokens_needed = tokens - self.tokens
-                wait_time = tokens_needed / self.config.tokens_per_second
-                
-                return RateLimitResult(
-                    allowed=False,
-                    limit=self.config.requests_per_minute,
-                    remaining=0,
-                    reset_at=int(self.last_update + 60),
-                    retry_after=wait_time,
-                )
+                # Keep the fraction so checks closer together than one
+                # milli-token still add up to a refill.
+                self._refill_frac = refill & 0xFFFFFFFF
+            if now_ns >= self._reset_at_refresh_ns:
+                self._reset_at = int(time.time()) + 60
+                self._reset_at_refresh_ns = now_ns + 1_000_000_000
+            
+            # Positional construction skips keyword handling on the hot path.
+            if available >= cost_milli:
+                self.tokens_milli = available - cost_milli
+                return RateLimitResult(True, self._limit, self.tokens_milli // 1000, self._reset_at)
+            
+            self.tokens_milli = available
+            # Wait until enough tokens are available
+            return RateLimitResult(
+                False,
+                self._limit,
+                0,
+                self._reset_at,
+                (cost_milli - available) / 1000 / self._tokens_per_second,
+            )
+
+
+# Number of bucket dict shards; a power of two so the shard is a mask of the hash.
+BUCKET_SHARDS = 64
+
+# Buckets idle this long are full again and can be dropped.
+BUCKET_IDLE_TTL_NS = 600 * 1_000_000_000  # 10 minutes
+
+# Swept buckets kept for reuse by new keys.
+BUCKET_POOL_SIZE = 4096
 
 
 class RateLimiter:
     """Multi-key rate limiter using token buckets.
     
     Maintains separate token buckets per key (e.g., per user or per user+tool).
-    Old buckets are cleaned up periodically.
+    Checks on different keys never contend: bucket lookup relies on atomic
+    dict operations and only the per-bucket lock is taken to consume. Buckets
+    are spread over ``BUCKET_SHARDS`` dicts. Old buckets are removed by
+    ``cleanup_loop`` in the background, one small shard at a time, so no
+    request ever pays for the sweep; removed buckets are pooled and reset for
+    new keys instead of being reallocated.
     """
     
     def __init__(self, config: RateLimitConfig | None = None):
@@ -118,25 +184,46 @@ class RateLimiter:
             config: Default rate limit config. Uses generous defaults if not provided.
         """
         self.config = config or RateLimitConfig()
-        self._buckets: dict[str, TokenBucket] = {}
-        self._lock = threading.Lock()
-        self._last_cleanup = time.time()
+        self._shards: list[dict[str, TokenBucket]] = [{} for _ in range(BUCKET_SHARDS)]
+        self._bucket_pool: deque[TokenBucket] = deque(maxlen=BUCKET_POOL_SIZE)
         self._cleanup_interval = 300  # 5 minutes
     
+    def _shard(self, key: str) -> dict[str, TokenBucket]:
+        """Return the bucket dict that holds ``key``."""
+        return self._shards[hash(key) & (BUCKET_SHARDS - 1)]
+    
+    def _new_bucket(self, config: RateLimitConfig) -> TokenBucket:
+        """Take a bucket from the pool, or allocate one if it is empty."""
+        try:
+            bucket = self._bucket_pool.pop()
+        except IndexError:
+            return TokenBucket(config)
+        bucket.reset(config)
+        return bucket
+    
+    def _cleanup_shard(self, shard: dict[str, TokenBucket], stale_ns: int) -> None:
+        """Remove buckets in one shard that haven't been used since ``stale_ns``."""
+        # A bucket idle this long is full again, so racing with a check
+        # that still holds it loses nothing.
+        for key, bucket in list(shard.items()):
+            if bucket.last_update_ns < stale_ns and shard.pop(key, None) is bucket:
+                self._bucket_pool.append(bucket)
+    
     def _cleanup_old_buckets(self) -> None:
         """Remove buckets that haven't been used recently."""
-        if time.time() - self._last_cleanup < self._cleanup_interval:
-            return
-            
-        stale_time = time.time() - 600  # 10 minutes
-        stale_keys = [
-            key for key, bucket in self._buckets.items()
-            if bucket.last_update < stale_time
-        ]
-        for key in stale_keys:
-            del self._buckets[key]
-        
-        self._last_cleanup = time.time()
+        stale_ns = time.monotonic_ns() - BUCKET_IDLE_TTL_NS
+        for shard in self._shards:
+            self._cleanup_shard(shard, stale_ns)
+    
+    async def cleanup_loop(self) -> None:
+        """Periodically remove idle buckets; run as a background task."""
+        while True:
+            await asyncio.sleep(self._cleanup_interval)
+            stale_ns = time.monotonic_ns() - BUCKET_IDLE_TTL_NS
+            for shard in self._shards:
+                self._cleanup_shard(shard, stale_ns)
+                # Let requests run between shards.
+                await asyncio.sleep(0)
     
     def check(self, key: str, config: RateLimitConfig | None = None) -> RateLimitResult:
         """Check rate limit for a key.
@@ -148,34 +235,82 @@ class RateLimiter:
         Returns:
             RateLimitResult with status and headers.
         """
-        with self._lock:
-            self._cleanup_old_buckets()
-            
-            if key not in self._buckets:
-                self._buckets[key] = TokenBucket(config or self.config)
+        shard = self._shard(key)
+        bucket = shard.get(key)
+        if bucket is None:
+            # setdefault is atomic, so concurrent first checks share one bucket.
+            bucket = shard.setdefault(key, self._new_bucket(config or self.config))
+        
+        return bucket.consume()
+    
+    async def check_many(
+        self, checks: list[tuple[str, RateLimitConfig | None]]
+    ) -> RateLimitResult:
+        """Check several keys in order, stopping at the first denial.
+        
+        Args:
+            checks: ``(key, config)`` pairs; a ``None`` config uses the default.
             
-            return self._buckets[key].consume()
+        Returns:
+            RateLimitResult of the denying key, or of the last key if all allow.
+        """
+        for key, config in checks:
+            result = self.check(key, config)
+            if not result.allowed:
+                break
+        return result
+
+
+# Lower per-tool limit; built once rather than validated on every check.
+_DEFAULT_TOOL_CONFIG = RateLimitConfig(requests_per_minute=100, burst_size=200)
+
+
+# Repeat users and tools get the same key objects back: no per-request string
+# building, and the bucket dict lookup reuses the string's cached hash.
+@lru_cache(maxsize=8192)
+def _user_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+@lru_cache(maxsize=8192)
+def _tool_key(user_id: str, tool_name: str) -> str:
+    return f"{_user_key(user_id)}:tool:{tool_name}"
 
 
 # Global rate limiter instance
-_rate_limiter: RateLimiter | None = None
+_rate_limiter: "RateLimiter | RedisRateLimiter | None" = None
 
 
-def get_rate_limiter() -> RateLimiter:
-    """Get the global rate limiter instance."""
+def get_rate_limiter() -> "RateLimiter | RedisRateLimiter":
+    """Get the global rate limiter instance.
+    
+    Uses the shared Redis limiter when RATE_LIMIT_REDIS_URL is set, so limits
+    hold across replicas; otherwise buckets are kept in process memory.
+    """
     global _rate_limiter
     if _rate_limiter is None:
-        _rate_limiter = RateLimiter()
+        settings = get_settings()
+        if settings.RATE_LIMIT_REDIS_URL:
+            from .redis_backend import RedisRateLimiter
+
+            _rate_limiter = RedisRateLimiter.from_url(
+                settings.RATE_LIMIT_REDIS_URL, algorithm=settings.RATE_LIMIT_ALGORITHM
+            )
+        else:
+            _rate_limiter = RateLimiter()
     return _rate_limiter
 
 
-def check_rate_limit(
+async def check_rate_limit(
     user_id: str,
     tool_name: str | None = None,
     config: RateLimitConfig | None = None
 ) -> RateLimitResult:
     """Check rate limit for a user and optional tool.
     
+    Both limits are checked in one call to the limiter, so the Redis backend
+    needs a single round-trip.
+    
     Args:
         user_id: User identifier.
         tool_name: Optional tool name for per-tool limits.
@@ -184,22 +319,11 @@ def check_rate_limit(
     Returns:
         RateLimitResult with status and headers.
     """
-    limiter = get_rate_limiter()
-    
     # Check user-level limit first
-    user_key = f"user:{user_id}"
-    user_result = limiter.check(user_key, config)
-    
-    if not user_result.allowed:
-        return user_result
+    checks: list[tuple[str, RateLimitConfig | None]] = [(_user_key(user_id), config)]
     
     # Check per-tool limit if tool specified
     if tool_name:
-        tool_config = config or RateLimitConfig(
-            requests_per_minute=100,  # Lower limit per-tool
-            burst_size=200
-        )
-        tool_key = f"user:{user_id}:tool:{tool_name}"
-        return limiter.check(tool_key, tool_config)
-    
-    return user_result
+        checks.append((_tool_key(user_id, tool_name), config or _DEFAULT_TOOL_CONFIG))
+    
+    return await get_rate_limiter().check_many(checks)
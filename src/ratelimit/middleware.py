@@ -72,7 +72,7 @@ async def rate_limit_dependency(
         # This will be handled by the endpoint itself
         pass
     
-    result = check_rate_limit(user_id=user.user_id, tool_name=tool_name)
+    result = await check_rate_limit(user_id=user.user_id, tool_name=tool_name)
     
     if not result.allowed:
         raise RateLimitExceededError(
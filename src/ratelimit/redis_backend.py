@@ -0,0 +1,184 @@
+"""Redis-backed rate limiter shared across gateway replicas."""
+
+import math
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Literal
+
+from cachetools import TTLCache
+from structlog import get_logger
+
+from .limiter import RateLimitConfig, RateLimiter, RateLimitResult
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    aioredis = None
+    RedisError = OSError
+
+
+logger = get_logger()
+
+RateLimitAlgorithm = Literal["token_bucket", "sliding_window"]
+
+_SCRIPTS: dict[str, str] = {
+    "token_bucket": Path(__file__).with_name("token_bucket.lua").read_text(),
+    "sliding_window": Path(__file__).with_name("sliding_window.lua").read_text(),
+}
+
+# Sliding window length; limits are expressed per minute.
+SLIDING_WINDOW_MS = 60_000
+
+# Keep a slow or unreachable Redis from stalling request handling.
+REDIS_SOCKET_TIMEOUT_SECONDS = 0.05
+
+# Upper bound on locally remembered empty buckets.
+BLOCKED_KEYS_MAXSIZE = 100_000
+
+
+class RedisRateLimiter:
+    """Multi-key rate limiter whose state lives in Redis.
+
+    Every check runs one Lua script that updates the state of all its keys
+    atomically, so all replicas enforce one limit per key and a user+tool
+    check costs a single round-trip. ``token_bucket`` allows bursts up to
+    ``burst_size``; ``sliding_window`` keeps a sorted-set log and admits at
+    most ``requests_per_minute`` in any rolling minute. If Redis cannot be
+    reached, checks fall back to an in-process limiter.
+
+    Keys found empty are remembered locally until their retry time, so a
+    client hammering an exhausted bucket is rejected without a Redis call.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        config: RateLimitConfig | None = None,
+        key_prefix: str = "rl:",
+        algorithm: RateLimitAlgorithm = "token_bucket",
+    ):
+        """Initialize Redis rate limiter.
+
+        Args:
+            client: Asyncio Redis client.
+            config: Default rate limit config.
+            key_prefix: Prefix for bucket keys in Redis.
+            algorithm: ``token_bucket`` or ``sliding_window``.
+        """
+        if algorithm not in _SCRIPTS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        self.config = config or RateLimitConfig()
+        self.algorithm = algorithm
+        self._key_prefix = key_prefix
+        # register_script sends EVALSHA and reloads the script on NOSCRIPT.
+        self._script = client.register_script(_SCRIPTS[algorithm])
+        self._fallback = RateLimiter(self.config)
+        # (key, limits) -> (time.time() before which the key admits nothing,
+        # reset_at). Entries only shorten the path; the deadline makes them exact.
+        self._blocked: TTLCache[tuple[str, int, int], tuple[float, int]] = TTLCache(
+            maxsize=BLOCKED_KEYS_MAXSIZE, ttl=60
+        )
+
+    @classmethod
+    def from_url(
+        cls,
+        url: str,
+        config: RateLimitConfig | None = None,
+        algorithm: RateLimitAlgorithm = "token_bucket",
+    ) -> "RedisRateLimiter":
+        """Create a limiter connected to the Redis server at ``url``."""
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("The 'redis' package is required when RATE_LIMIT_REDIS_URL is set")
+        client = aioredis.Redis.from_url(
+            url,
+            socket_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+        return cls(client, config, algorithm=algorithm)
+
+    async def check(self, key: str, config: RateLimitConfig | None = None) -> RateLimitResult:
+        """Check rate limit for a key.
+
+        Args:
+            key: Rate limit key (e.g., user_id or user_id:tool_name).
+            config: Override config for this check.
+
+        Returns:
+            RateLimitResult with status and headers.
+        """
+        return await self.check_many([(key, config)])
+
+    async def check_many(
+        self, checks: list[tuple[str, RateLimitConfig | None]]
+    ) -> RateLimitResult:
+        """Check several keys in order, stopping at the first denial.
+
+        Args:
+            checks: ``(key, config)`` pairs; a ``None`` config uses the default.
+
+        Returns:
+            RateLimitResult of the denying key, or of the last key if all allow.
+        """
+        checks = [(key, config or self.config) for key, config in checks]
+        now = time.time()
+        for key, config in checks:
+            blocked = self._blocked.get(_blocked_key(key, config))
+            if blocked is not None and now < blocked[0]:
+                return RateLimitResult(
+                    allowed=False,
+                    limit=config.requests_per_minute,
+                    remaining=0,
+                    reset_at=blocked[1],
+                    retry_after=blocked[0] - now,
+                )
+
+        now_ms = int(now * 1000)
+        try:
+            allowed, remaining, retry_after_ms, reset_ms, index = await self._script(
+                keys=[self._key_prefix + key for key, _ in checks],
+                args=self._script_args(checks, now_ms),
+            )
+        except (RedisError, OSError) as e:
+            logger.warning("rate_limit_redis_unavailable", error=str(e))
+            return await self._fallback.check_many(checks)
+
+        key, config = checks[int(index) - 1]
+        retry_after = int(retry_after_ms) / 1000.0
+        reset_at = math.ceil((now_ms + int(reset_ms)) / 1000)
+        if not allowed and retry_after > 0:
+            self._blocked[_blocked_key(key, config)] = (now + retry_after, reset_at)
+
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=config.requests_per_minute,
+            remaining=int(remaining),
+            reset_at=reset_at,
+            retry_after=retry_after,
+        )
+
+    async def cleanup_loop(self) -> None:
+        """Expire idle buckets of the in-process fallback limiter."""
+        await self._fallback.cleanup_loop()
+
+    def _script_args(
+        self, checks: list[tuple[str, RateLimitConfig]], now_ms: int
+    ) -> list[Any]:
+        """Flatten per-key limits into the argument layout of the Lua script."""
+        if self.algorithm == "sliding_window":
+            args: list[Any] = [now_ms, f"{now_ms}:{uuid.uuid4().hex}"]
+            for _, config in checks:
+                args += [config.requests_per_minute, SLIDING_WINDOW_MS]
+        else:
+            args = [now_ms]
+            for _, config in checks:
+                args += [config.burst_size, config.tokens_per_second / 1000.0, 1]
+        return args
+
+
+def _blocked_key(key: str, config: RateLimitConfig) -> tuple[str, int, int]:
+    """Local block-cache key; a key checked under other limits is a new entry."""
+    return (key, config.requests_per_minute, config.burst_size)
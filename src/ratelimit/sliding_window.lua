@@ -0,0 +1,40 @@
+-- Sliding window log: one sorted-set member per admitted request.
+-- Keys are checked in order; the first full window stops the check.
+-- KEYS[i]: window key
+-- ARGV[1]: now (ms), ARGV[2]: unique member id; then per key: limit, window (ms)
+-- Returns {allowed, remaining, retry_after_ms, reset_ms, index of deciding key}
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local result = {1, 0, 0, 0, 0}
+
+for i, key in ipairs(KEYS) do
+    local base = 3 + (i - 1) * 2
+    local limit = tonumber(ARGV[base])
+    local window = tonumber(ARGV[base + 1])
+
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    local count = redis.call('ZCARD', key)
+
+    if count >= limit then
+        if count == 0 then
+            return {0, 0, window, window, i}
+        end
+        -- Next slot opens when the oldest request leaves the window;
+        -- the window is empty once the newest one has.
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local newest = redis.call('ZRANGE', key, -1, -1, 'WITHSCORES')
+        return {
+            0,
+            0,
+            math.max(1, tonumber(oldest[2]) + window - now),
+            math.max(1, tonumber(newest[2]) + window - now),
+            i,
+        }
+    end
+
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, window)
+    result = {1, limit - count - 1, 0, window, i}
+end
+
+return result
@@ -0,0 +1,38 @@
+-- Atomic token buckets: refill, consume, and persist in one round-trip.
+-- Keys are checked in order; the first empty bucket stops the check.
+-- KEYS[i]: bucket key
+-- ARGV[1]: now (ms); then per key: capacity, refill rate (tokens per ms), cost
+-- Returns {allowed, remaining, retry_after_ms, reset_ms, index of deciding key}
+local now = tonumber(ARGV[1])
+local result = {1, 0, 0, 0, 0}
+
+for i, key in ipairs(KEYS) do
+    local base = 2 + (i - 1) * 3
+    local capacity = tonumber(ARGV[base])
+    local rate = tonumber(ARGV[base + 1])
+    local cost = tonumber(ARGV[base + 2])
+
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if tokens == nil or ts == nil then
+        tokens = capacity
+        ts = now
+    end
+
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+    if tokens < cost then
+        -- Refill is derived from the stored timestamp, so a denial writes nothing.
+        return {0, 0, math.ceil((cost - tokens) / rate), math.ceil((capacity - tokens) / rate), i}
+    end
+
+    tokens = tokens - cost
+    local reset_ms = math.ceil((capacity - tokens) / rate)
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    -- Expire once the bucket would be full again; a full bucket needs no state.
+    redis.call('PEXPIRE', key, reset_ms + 1000)
+    result = {1, math.floor(tokens), 0, reset_ms, i}
+end
+
+return result
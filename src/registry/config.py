@@ -6,6 +6,9 @@ from typing import Any, Literal
 import yaml
 from pydantic import BaseModel, Field
 
+# libyaml's C parser when PyYAML was built with it (~10x faster); same safe subset.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class ToolConfig(BaseModel):
     """Tool definition loaded from static config."""
@@ -43,7 +46,6 @@ def load_tool_registry(config_path: str | None = None) -> ToolRegistryConfig:
     if not config_path.exists():
         return ToolRegistryConfig()
 
-    with config_path.open("r", encoding="utf-8") as handle:
-        data = yaml.safe_load(handle) or {}
+    data = yaml.load(config_path.read_bytes(), Loader=_YAML_LOADER) or {}
 
-    return ToolRegistryConfig(**data)
+    return ToolRegistryConfig.model_validate(data)
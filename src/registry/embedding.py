@@ -1,9 +1,16 @@
 """Embedding generation for tool descriptions using Sentence Transformers."""
 
 import asyncio
-from functools import lru_cache
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import List
 
+from cachetools import LRUCache
+
+from src.config import get_settings
+
 try:
     from sentence_transformers import SentenceTransformer
     SENTENCE_TRANSFORMERS_AVAILABLE = True
@@ -12,7 +19,10 @@ except ImportError:
     SentenceTransformer = None
 
 
-@lru_cache(maxsize=1)
+# Loaded on first use; a plain global keeps the hot path to one None check.
+_embedding_model: "SentenceTransformer | None" = None
+
+
 def get_embedding_model() -> SentenceTransformer:
     """Get or create the embedding model (cached singleton).
     
@@ -22,6 +32,14 @@ def get_embedding_model() -> SentenceTransformer:
     Raises:
         RuntimeError: If sentence-transformers is not installed
     """
+    global _embedding_model
+    if _embedding_model is None:
+        _embedding_model = _load_embedding_model()
+    return _embedding_model
+
+
+def _load_embedding_model() -> SentenceTransformer:
+    """Load the configured embedding model."""
     if not SENTENCE_TRANSFORMERS_AVAILABLE:
         raise RuntimeError(
             "sentence-transformers not installed. "
@@ -30,29 +48,113 @@ def get_embedding_model() -> SentenceTransformer:
     
     # all-MiniLM-L6-v2: 384 dimensions, lightweight, fast
     # Downloads automatically on first use (~80MB)
+    if get_settings().EMBEDDING_QUANTIZED:
+        # int8 ONNX export published with the model; near-identical similarities
+        # at roughly half the matmul cost on VNNI-capable CPUs.
+        return SentenceTransformer(
+            'all-MiniLM-L6-v2',
+            backend='onnx',
+            model_kwargs={'file_name': 'onnx/model_qint8_avx512_vnni.onnx'},
+        )
     return SentenceTransformer('all-MiniLM-L6-v2')
 
 
+# Texts per forward pass in model.encode.
+EMBEDDING_ENCODE_BATCH_SIZE = 64
+
+# Concurrent single-text requests are coalesced into one model.encode call;
+# a full batcher flush fills exactly one forward pass.
+EMBEDDING_BATCH_MAX_SIZE = EMBEDDING_ENCODE_BATCH_SIZE
+EMBEDDING_BATCH_WINDOW_SECONDS = 0.005
+
+# Model inference gets its own threads so it never queues behind other
+# blocking work on the loop's default executor (and vice versa).
+_EMBED_EXECUTOR = ThreadPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 2) // 2), thread_name_prefix="embed"
+)
+
+# Embeddings keyed by a hash of their text; tool descriptions and repeated
+# queries skip the model. Cached vectors are shared, so callers must not mutate them.
+EMBEDDING_CACHE_SIZE = 4096
+_embedding_cache: LRUCache[bytes, list[float]] = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+
+
+def clear_embedding_cache() -> None:
+    """Clear cached embeddings, e.g. after switching models."""
+    _embedding_cache.clear()
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+class _EmbeddingBatcher:
+    """Collects concurrent embedding requests and encodes them together."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self._pending: list[tuple[str, asyncio.Future[list[float]]]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # The loop only holds weak references to tasks; keep in-flight encodes alive.
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def embed(self, text: str) -> list[float]:
+        future: asyncio.Future[list[float]] = self.loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= EMBEDDING_BATCH_MAX_SIZE:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(EMBEDDING_BATCH_WINDOW_SECONDS, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self.loop.create_task(self._encode(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _encode(self, batch: list[tuple[str, asyncio.Future[list[float]]]]) -> None:
+        try:
+            embeddings = await batch_generate_embeddings([text for text, _ in batch])
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            # Cancellation (e.g. loop shutdown) skips both branches above;
+            # never leave a waiter hanging.
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+
+
+_batcher: _EmbeddingBatcher | None = None
+
+
 async def generate_embedding(text: str) -> list[float]:
     """Generate embedding vector for tool description.
     
+    Calls arriving within a few milliseconds of each other share a single
+    batched encode.
+    
     Args:
         text: Tool description to embed
         
     Returns:
         384-dimensional embedding vector
     """
-    model = get_embedding_model()
-    
-    # Run in thread pool to avoid blocking event loop
-    loop = asyncio.get_event_loop()
-    embedding = await loop.run_in_executor(
-        None,
-        model.encode,
-        text
-    )
-    
-    return embedding.tolist()
+    global _batcher
+    loop = asyncio.get_running_loop()
+    if _batcher is None or _batcher.loop is not loop:
+        _batcher = _EmbeddingBatcher(loop)
+    return await _batcher.embed(text)
 
 
 async def batch_generate_embeddings(texts: list[str]) -> list[list[float]]:
@@ -64,14 +166,29 @@ async def batch_generate_embeddings(texts: list[str]) -> list[list[float]]:
     Returns:
         List of 384-dimensional embedding vectors
     """
+    keys = [_text_key(text) for text in texts]
+    results = [_embedding_cache.get(key) for key in keys]
+    # Only texts not seen before reach the model, each once.
+    missing = {key: text for key, text, result in zip(keys, texts, results) if result is None}
+    if not missing:
+        return results
+    
     model = get_embedding_model()
     
-    # Run in thread pool to avoid blocking event loop
-    loop = asyncio.get_event_loop()
-    embeddings = await loop.run_in_executor(
-        None,
-        model.encode,
-        texts
+    # Run in the embedding thread pool to avoid blocking event loop
+    embeddings = await asyncio.get_running_loop().run_in_executor(
+        _EMBED_EXECUTOR,
+        partial(
+            model.encode,
+            list(missing.values()),
+            batch_size=EMBEDDING_ENCODE_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ),
     )
     
-    return [emb.tolist() for emb in embeddings]
+    # One conversion of the 2-D array instead of one per row
+    encoded = dict(zip(missing, embeddings.tolist()))
+    _embedding_cache.update(encoded)
+    return [result if result is not None else encoded[key] for key, result in zip(keys, results)]
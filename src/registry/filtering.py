@@ -1,7 +1,8 @@
 """Tool filtering logic for smart routing."""
 
 import re
-from typing import List, Set
+from functools import lru_cache
+from typing import FrozenSet, List, Set
 
 # Category keyword mappings
 CATEGORY_KEYWORDS = {
@@ -13,7 +14,28 @@ CATEGORY_KEYWORDS = {
 }
 
 
-def extract_categories_from_prompt(prompt: str) -> Set[str]:
+def _keyword_categories() -> dict[str, FrozenSet[str]]:
+    # Some keywords (e.g. "delete", "list") belong to more than one category.
+    categories: dict[str, Set[str]] = {}
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            categories.setdefault(keyword, set()).add(category)
+    return {keyword: frozenset(found) for keyword, found in categories.items()}
+
+
+_KEYWORD_TO_CATEGORIES = _keyword_categories()
+
+# Keywords are whole words, so a prompt is split into words once and matched
+# by set intersection: linear in the prompt, independent of keyword count.
+_WORD_PATTERN = re.compile(r"\w+")
+_SINGLE_WORD_KEYWORDS = frozenset(keyword for keyword in _KEYWORD_TO_CATEGORIES if " " not in keyword)
+_PHRASE_KEYWORDS = tuple(keyword for keyword in _KEYWORD_TO_CATEGORIES if " " in keyword)
+
+# Prompts longer than this are matched directly rather than kept in the cache.
+_MAX_CACHED_PROMPT_CHARS = 512
+
+
+def extract_categories_from_prompt(prompt: str) -> FrozenSet[str]:
     """Extract relevant tool categories from user prompt.
     
     Args:
@@ -23,20 +45,34 @@ def extract_categories_from_prompt(prompt: str) -> Set[str]:
         Set of category strings
     """
     if not prompt:
-        return set()
+        return frozenset()
     
     prompt_lower = prompt.lower()
-    matched_categories = set()
-    
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        for keyword in keywords:
-            # Use word boundaries to avoid partial matches
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, prompt_lower):
-                matched_categories.add(category)
-                break  # Found a match for this category
-    
-    return matched_categories
+    if len(prompt_lower) > _MAX_CACHED_PROMPT_CHARS:
+        return _match_categories(prompt_lower)
+    return _match_categories_cached(prompt_lower)
+
+
+def _match_categories(prompt_lower: str) -> FrozenSet[str]:
+    words = prompt_lower.split()
+    if not "".join(words).isalnum():
+        # Punctuation present: let the word pattern split e.g. "sum?" into "sum".
+        words = _WORD_PATTERN.findall(prompt_lower)
+    matched: Set[str] = set()
+    for keyword in _SINGLE_WORD_KEYWORDS.intersection(words):
+        matched |= _KEYWORD_TO_CATEGORIES[keyword]
+    if _PHRASE_KEYWORDS:
+        # Space-padded so a phrase only matches on whole words.
+        joined = f" {' '.join(words)} "
+        for phrase in _PHRASE_KEYWORDS:
+            if f" {phrase} " in joined:
+                matched |= _KEYWORD_TO_CATEGORIES[phrase]
+    return frozenset(matched)
+
+
+@lru_cache(maxsize=1024)
+def _match_categories_cached(prompt_lower: str) -> FrozenSet[str]:
+    return _match_categories(prompt_lower)
 
 
 def should_include_tool(tool_categories: List[str], matched_categories: Set[str]) -> bool:
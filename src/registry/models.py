@@ -17,16 +17,31 @@ from sqlalchemy import (
 from sqlalchemy.dialects.postgresql import ARRAY
 
 try:
-    from pgvector.sqlalchemy import Vector
+    from pgvector.sqlalchemy import HALFVEC
+    from pgvector.utils import HalfVector
     PGVECTOR_AVAILABLE = True
 except ImportError:
     PGVECTOR_AVAILABLE = False
-    Vector = None
+    HALFVEC = HalfVector = None
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database import Base
 
 
+if PGVECTOR_AVAILABLE:
+    class HalfVec(HALFVEC):
+        """fp16 ``halfvec`` column that reads back as a list of floats."""
+
+        cache_ok = True
+
+        def result_processor(self, dialect, coltype):
+            def process(value):
+                if value is None:
+                    return None
+                return HalfVector._from_db(value).to_list()
+            return process
+
+
 class RiskLevel(str, Enum):
     """Risk level classification for tools.
     
@@ -41,6 +56,16 @@ class RiskLevel(str, Enum):
     high = "high"
 
 
+# Value -> member map; a dict lookup skips EnumMeta.__call__ on bulk loads.
+_RISK_LEVELS: dict[str, RiskLevel] = {level.value: level for level in RiskLevel}
+
+
+def parse_risk_level(value: str) -> RiskLevel:
+    """Return the RiskLevel for ``value``; raises ValueError if unknown."""
+    level = _RISK_LEVELS.get(value)
+    return level if level is not None else RiskLevel(value)
+
+
 class ToolScope(str, Enum):
     """Scope classification used for endpoint-level tool segregation."""
 
@@ -133,7 +158,8 @@ class Tool(Base):
         comment="Tool categories for filtering"
     )
     embedding: Mapped[list[float] | None] = mapped_column(
-        Vector(384) if PGVECTOR_AVAILABLE else JSON,
+        # Stored as fp16: half the bytes per distance computation.
+        HalfVec(384) if PGVECTOR_AVAILABLE else JSON,
         nullable=True,
         comment="Tool description embedding for RAG"
     )
@@ -1,24 +1,79 @@
-"""Repository layer for tool registry data access."""
+"""Repository layer for tool registry data access.
 
-from sqlalchemy import select, update, func, cast, String
+Functions run queries on the caller's session and consume their results
+fully before returning, so no cursor outlives the call and callers can
+release the session (and its pooled connection) as soon as they return,
+including while filling the service-level caches.
+"""
+
+from typing import Any, Mapping
+
+from sqlalchemy import Integer, Row, all_, column, select, update, func, cast, or_, text, values, String
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert as pg_insert
+
+from src.config import get_settings
 
 from .models import Tool, ToolScope, PGVECTOR_AVAILABLE
 
 
+# Rows buffered per fetch when streaming the full tool list.
+TOOL_FETCH_BATCH_SIZE = 500
+
+# Hot full-registry reads, built once at import instead of on every call.
+_ALL_ACTIVE_TOOLS_STMT = (
+    select(Tool)
+    .where(Tool.is_active == True)
+    .order_by(Tool.name)
+    .execution_options(yield_per=TOOL_FETCH_BATCH_SIZE)
+)
+_ACTIVE_TOOL_ROWS_STMT = (
+    select(
+        Tool.name,
+        Tool.description,
+        Tool.backend_url,
+        Tool.risk_level,
+        Tool.required_roles,
+    )
+    .where(Tool.is_active == True)
+    .order_by(Tool.name)
+)
+
+
 async def get_all_active_tools(db: AsyncSession) -> list[Tool]:
     """Fetch all active tools from the database.
     
+    Rows are streamed through a server-side cursor in batches of
+    ``TOOL_FETCH_BATCH_SIZE``, so the driver never buffers the whole
+    registry at once. The partial index ``ix_tools_active_name``
+    returns active rows already in name order, with no sort step.
+    
     Args:
         db: Async database session.
         
     Returns:
         List of active Tool objects.
     """
-    stmt = select(Tool).where(Tool.is_active == True).order_by(Tool.name)
-    result = await db.execute(stmt)
-    return list(result.scalars().all())
+    result = await db.stream_scalars(_ALL_ACTIVE_TOOLS_STMT)
+    return [tool async for tool in result]
+
+
+async def get_all_active_tool_rows(db: AsyncSession) -> list[Row]:
+    """Fetch the listing columns of all active tools.
+    
+    Skips the heavy columns (embedding, input_schema) that a tool
+    listing never shows. Scans the partial index ``ix_tools_active_name``
+    in name order.
+    
+    Args:
+        db: Async database session.
+        
+    Returns:
+        Rows with name, description, backend_url, risk_level and
+        required_roles, ordered by name.
+    """
+    result = await db.execute(_ACTIVE_TOOL_ROWS_STMT)
+    return list(result.all())
 
 
 async def get_active_tools_by_scope(db: AsyncSession, scope: str) -> list[Tool]:
@@ -47,6 +102,23 @@ async def get_tool_by_name(db: AsyncSession, name: str) -> Tool | None:
     return result.scalar_one_or_none()
 
 
+async def get_tools_by_names(db: AsyncSession, names: list[str]) -> dict[str, Tool]:
+    """Fetch the tools with the given names in one query.
+    
+    Args:
+        db: Async database session.
+        names: Tool names to look up.
+        
+    Returns:
+        Mapping of tool name to Tool for the names that exist.
+    """
+    if not names:
+        return {}
+    stmt = select(Tool).where(Tool.name.in_(names))
+    result = await db.execute(stmt)
+    return {tool.name: tool for tool in result.scalars()}
+
+
 async def create_tool(
     db: AsyncSession,
     name: str,
@@ -73,14 +145,14 @@ async def create_tool(
     Returns:
         Created Tool object.
     """
-    from .models import RiskLevel
+    from .models import parse_risk_level
     
     tool = Tool(
         name=name,
         description=description,
         backend_url=backend_url,
         scope=ToolScope(scope),
-        risk_level=RiskLevel(risk_level),
+        risk_level=parse_risk_level(risk_level),
         required_roles=required_roles,
         is_active=is_active,
         input_schema=input_schema,
@@ -122,6 +194,12 @@ async def get_core_tools(db: AsyncSession) -> list[Tool]:
     return list(result.scalars().all())
 
 
+
+def _as_embedding(query_embedding: list[float]):
+    # Cast to the column's halfvec type so the index operator class matches.
+    return cast(query_embedding, Tool.embedding.type)
+
+
 async def search_tools_by_embedding(
     db: AsyncSession,
     query_embedding: list[float],
@@ -132,42 +210,136 @@ async def search_tools_by_embedding(
     if not PGVECTOR_AVAILABLE:
         raise RuntimeError("pgvector not available")
     
-    # Cosine similarity search with threshold
-    # pgvector distance = 1 - cosine_similarity
+    # pgvector distance = 1 - cosine_similarity. The HNSW index only serves
+    # ORDER BY distance LIMIT k, so the threshold is applied to those k rows.
+    distance = Tool.embedding.cosine_distance(_as_embedding(query_embedding)).label("distance")
+    query = select(Tool, distance).where(
+        Tool.is_active == True,
+        Tool.embedding.isnot(None),
+    ).order_by(distance).limit(top_k)
+    
+    # ef_search below k would cap the index scan at fewer than k rows.
+    ef_search = max(get_settings().EMBEDDING_HNSW_EF_SEARCH, top_k)
+    await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+    result = await db.execute(query)
+    max_distance = 1.0 - threshold
+    return [tool for tool, tool_distance in result.all() if tool_distance < max_distance]
+
+
+
+async def search_tools_prefiltered(
+    db: AsyncSession,
+    categories: list[str],
+    query_embedding: list[float],
+    top_k: int = 10,
+) -> list[Tool]:
+    """Rank the tools in any of ``categories`` by vector similarity.
+
+    One query: the GIN index on ``categories`` selects the candidates and
+    Postgres sorts that subset by exact cosine distance. Prefer this over
+    ``search_tools_by_embedding`` when the categories keep only a few
+    percent of the tools; for broad filters the HNSW search is cheaper.
+    """
+    if not PGVECTOR_AVAILABLE:
+        raise RuntimeError("pgvector not available")
+    if not categories or top_k <= 0:
+        return []
+    
     query = select(Tool).where(
         Tool.is_active == True,
         Tool.embedding.isnot(None),
-        Tool.embedding.cosine_distance(query_embedding) < (1.0 - threshold)
+        Tool.categories.overlap(cast(categories, ARRAY(String(50)))),
     ).order_by(
-        Tool.embedding.cosine_distance(query_embedding)
+        Tool.embedding.cosine_distance(_as_embedding(query_embedding))
     ).limit(top_k)
     
     result = await db.execute(query)
     return list(result.scalars().all())
 
 
-async def increment_tool_usage(
+async def add_tool_usage(
     db: AsyncSession,
-    tool_id: int
+    counts: Mapping[int, int]
 ) -> None:
-    """Increment usage counter for a tool."""
+    """Add buffered invocation counts to several tools in one statement.
+    
+    Args:
+        db: Async database session.
+        counts: Invocations to add, keyed by tool id.
+    """
+    if not counts:
+        return
+    usage = values(
+        column("id", Integer), column("calls", Integer), name="usage"
+    ).data(list(counts.items()))
     await db.execute(
         update(Tool)
-        .where(Tool.id == tool_id)
+        .where(Tool.id == usage.c.id)
         .values(
-            usage_count=Tool.usage_count + 1,
-            last_used_at=func.now()
+            usage_count=Tool.usage_count + usage.c.calls,
+            last_used_at=func.now(),
+            # Usage is not a definition change; keep the onupdate hook off
+            # so cached tool fingerprints stay valid.
+            updated_at=Tool.updated_at,
         )
     )
     await db.commit()
 
 
+# Columns written by upsert_tools; ``name`` is the conflict key.
+_UPSERT_COLUMNS = (
+    "description",
+    "backend_url",
+    "scope",
+    "risk_level",
+    "required_roles",
+    "is_active",
+    "input_schema",
+)
+
+
+async def upsert_tools(db: AsyncSession, tools: list[dict[str, Any]]) -> None:
+    """Insert or update tools by name in a single statement.
+
+    Existing rows are only rewritten (and get a new ``updated_at``) when
+    one of their configured columns actually changed. Does not commit;
+    the caller owns the transaction.
+
+    Args:
+        db: Async database session.
+        tools: Rows keyed by Tool column name, each including ``name``.
+    """
+    if not tools:
+        return
+
+    stmt = pg_insert(Tool).values(tools)
+    current = Tool.__table__.c
+    changed = [
+        # json has no equality operator; compare input schemas as jsonb.
+        cast(current[name], JSONB).is_distinct_from(cast(stmt.excluded[name], JSONB))
+        if name == "input_schema"
+        else current[name].is_distinct_from(stmt.excluded[name])
+        for name in _UPSERT_COLUMNS
+    ]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Tool.name],
+        set_={
+            **{name: stmt.excluded[name] for name in _UPSERT_COLUMNS},
+            "updated_at": func.now(),
+        },
+        where=or_(*changed),
+    )
+    await db.execute(stmt)
+
+
 async def deactivate_tools_not_in_list(
     db: AsyncSession,
     active_names: set[str]
 ) -> int:
     """Deactivate tools that are not present in the provided name set.
 
+    Does not commit; the caller owns the transaction.
+
     Args:
         db: Async database session.
         active_names: Tool names that should remain active.
@@ -178,10 +350,12 @@ async def deactivate_tools_not_in_list(
     if not active_names:
         return 0
 
+    # One array parameter (name <> ALL(...)) instead of one bind per name,
+    # so the statement has the same shape whatever the registry size.
+    names = cast(sorted(active_names), ARRAY(String(100)))
     result = await db.execute(
         update(Tool)
-        .where(Tool.name.notin_(active_names))
+        .where(Tool.is_active == True, Tool.name != all_(names))
         .values(is_active=False)
     )
-    await db.commit()
     return result.rowcount or 0
@@ -2,7 +2,7 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.auth.dependencies import get_current_user
@@ -10,7 +10,7 @@ from src.auth.models import AuthenticatedUser
 from src.database import get_db
 
 from .schemas import ToolListResponse
-from .service import get_tools_for_user
+from .service import get_tools_for_user_json
 
 
 router = APIRouter(prefix="/mcp", tags=["tools"])
@@ -20,7 +20,7 @@ router = APIRouter(prefix="/mcp", tags=["tools"])
 async def list_tools(
     user: Annotated[AuthenticatedUser, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
-) -> ToolListResponse:
+) -> Response:
     """List all tools the authenticated user can access.
     
     Returns tools filtered by the user's roles and permissions
@@ -31,4 +31,6 @@ async def list_tools(
     Returns:
         ToolListResponse with list of accessible tools and count.
     """
-    return await get_tools_for_user(db, user)
+    # The body is cached pre-serialized, so skip FastAPI's response encoding.
+    body = await get_tools_for_user_json(db, user)
+    return Response(content=body, media_type="application/json")
@@ -1,33 +1,126 @@
 """Service layer for tool registry with caching."""
 
-from typing import TYPE_CHECKING
+import asyncio
+import itertools
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 from cachetools import TTLCache
+from structlog import get_logger
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
 
 from src.auth.models import AuthenticatedUser
+from src.database import AsyncSessionLocal
 
-from .models import RiskLevel, Tool, ToolScope
+from .models import Tool, ToolScope, parse_risk_level
 from .repository import (
     get_all_active_tools,
-    get_active_tools_by_scope,
-    get_tool_by_name,
-    create_tool,
+    get_all_active_tool_rows,
     deactivate_tools_not_in_list,
+    search_tools_by_embedding,
+    upsert_tools,
 )
 from .config import load_tool_registry
+from .embedding import generate_embedding
 from .schemas import ToolResponse, ToolListResponse
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
 
+logger = get_logger()
+
 # Cache for tool definitions (5 minute TTL, max 1000 entries)
-_tool_cache: TTLCache[str, list[Tool]] = TTLCache(maxsize=1000, ttl=300)
+TOOL_CACHE_TTL_SECONDS = 300
+_tool_cache: TTLCache[str, Any] = TTLCache(maxsize=1000, ttl=TOOL_CACHE_TTL_SECONDS)
+
+# The active tool list is read on every request: keep it as one
+# (fresh_until, stale_until, tools) snapshot, refilled by a single coroutine
+# at a time. Past fresh_until it is still served while a background task
+# refetches it, so no request waits on the database until stale_until.
+TOOL_CACHE_STALE_SECONDS = 60
+_all_tools_snapshot: tuple[float, float, list[Tool]] | None = None
+_all_tools_lock = asyncio.Lock()
+_all_tools_refresh: asyncio.Task[None] | None = None
+# Bumped by clear_tool_cache so a fetch that started earlier is not stored.
+_all_tools_generation = 0
+
+# Serialized /mcp/tools bodies keyed by (allowed tools, roles, response
+# version); the result is a pure function of those three.
+_user_view_cache: TTLCache[tuple[frozenset[str], frozenset[str], int], bytes] = TTLCache(
+    maxsize=10_000, ttl=60
+)
+_tool_response_versions = itertools.count()
+
+# Semantic search results keyed by (normalized query, top_k, threshold).
+SEMANTIC_CACHE_TTL_SECONDS = 300
+_semantic_search_cache: TTLCache[tuple[str, int, float], list[Tool]] = TTLCache(
+    maxsize=1024, ttl=SEMANTIC_CACHE_TTL_SECONDS
+)
+SEMANTIC_CACHE_SIMILARITY = 0.85
+# Recent query embeddings kept per (top_k, threshold) for paraphrase reuse.
+SIMILAR_QUERY_INDEX_SIZE = 256
+
+
+class _SimilarQueryIndex:
+    """Ring buffer of recent unit-length query embeddings and their results.
+
+    Each miss writes one row of a preallocated matrix, so a lookup is a single
+    matrix-vector product over at most ``capacity`` rows; nothing is rebuilt
+    from the result cache.
+    """
+
+    def __init__(self, capacity: int, ttl: float) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self._matrix: "np.ndarray | None" = None
+        self._stored_at = np.full(capacity, -np.inf)
+        self._results: list[list[Tool] | None] = [None] * capacity
+        self._next = 0
+
+    def add(self, vector: "np.ndarray", tools: list[Tool]) -> None:
+        if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+            self._matrix = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            self._stored_at.fill(-np.inf)
+            self._next = 0
+        row = self._next % self.capacity
+        self._matrix[row] = vector
+        self._stored_at[row] = time.monotonic()
+        self._results[row] = tools
+        self._next += 1
+
+    def find(self, vector: "np.ndarray") -> list[Tool] | None:
+        if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+            return None
+        filled = min(self._next, self.capacity)
+        similarities = self._matrix[:filled] @ vector
+        similarities[self._stored_at[:filled] < time.monotonic() - self.ttl] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] >= SEMANTIC_CACHE_SIMILARITY:
+            return self._results[best]
+        return None
+
+
+_similar_query_indexes: dict[tuple[int, float], _SimilarQueryIndex] = {}
 
 
 def clear_tool_cache() -> None:
     """Clear the tool cache. Useful after tool updates."""
+    global _all_tools_snapshot, _all_tools_generation, _tool_embedding_index, _active_tool_views
+    _all_tools_snapshot = None
+    _active_tool_views = None
+    _all_tools_generation += 1
     _tool_cache.clear()
+    _user_view_cache.clear()
+    _tool_embedding_index = None
+    _semantic_search_cache.clear()
+    _similar_query_indexes.clear()
 
 
 async def sync_tools_from_config(db: "AsyncSession", config_path: str | None = None) -> None:
@@ -43,62 +136,36 @@ async def sync_tools_from_config(db: "AsyncSession", config_path: str | None = N
         return
 
     seen_names: set[str] = set()
+    rows: list[dict[str, Any]] = []
     for tool in registry_config.tools:
         if tool.name in seen_names:
             raise ValueError(f"duplicate tool name in config: {tool.name}")
         seen_names.add(tool.name)
+        rows.append({
+            "name": tool.name,
+            "description": tool.description,
+            "backend_url": tool.backend_url,
+            "scope": ToolScope(tool.scope),
+            "risk_level": parse_risk_level(tool.risk_level),
+            "required_roles": tool.required_roles or None,
+            "is_active": tool.is_active,
+            "input_schema": tool.input_schema,
+        })
 
-        existing = await get_tool_by_name(db, tool.name)
-        if existing is None:
-            await create_tool(
-                db=db,
-                name=tool.name,
-                description=tool.description,
-                backend_url=tool.backend_url,
-                scope=tool.scope,
-                risk_level=tool.risk_level,
-                required_roles=tool.required_roles or None,
-                is_active=tool.is_active,
-                input_schema=tool.input_schema,
-            )
-            continue
-
-        updated = False
-        if existing.description != tool.description:
-            existing.description = tool.description
-            updated = True
-        if existing.backend_url != tool.backend_url:
-            existing.backend_url = tool.backend_url
-            updated = True
-        if existing.scope.value != tool.scope:
-            existing.scope = ToolScope(tool.scope)
-            updated = True
-        if existing.risk_level.value != tool.risk_level:
-            existing.risk_level = RiskLevel(tool.risk_level)
-            updated = True
-        if (existing.required_roles or None) != (tool.required_roles or None):
-            existing.required_roles = tool.required_roles or None
-            updated = True
-        if existing.is_active != tool.is_active:
-            existing.is_active = tool.is_active
-            updated = True
-        if existing.input_schema != tool.input_schema:
-            existing.input_schema = tool.input_schema
-            updated = True
-
-        if updated:
-            await db.commit()
-            await db.refresh(existing)
-
+    # One upsert plus one deactivation, committed together.
+    await upsert_tools(db, rows)
     await deactivate_tools_not_in_list(db, seen_names)
+    await db.commit()
     clear_tool_cache()
 
 
 async def get_all_tools_cached(db: "AsyncSession") -> list[Tool]:
     """Get all active tools with caching.
     
-    Returns cached results if available and within TTL.
-    Otherwise fetches from database and caches the result.
+    Returns cached results if available and within TTL. Slightly stale
+    results are returned as-is while a background refresh runs. Otherwise
+    fetches from database and caches the result; concurrent misses wait
+    for one fetch instead of each querying the database.
     
     Args:
         db: Async database session.
@@ -106,25 +173,300 @@ async def get_all_tools_cached(db: "AsyncSession") -> list[Tool]:
     Returns:
         List of active Tool objects.
     """
-    cache_key = "all_active_tools"
-    
-    if cache_key in _tool_cache:
-        return _tool_cache[cache_key]
+    snapshot = _all_tools_snapshot
+    if snapshot is not None:
+        now = time.monotonic()
+        if now < snapshot[0]:
+            return snapshot[2]
+        if now < snapshot[1]:
+            _schedule_all_tools_refresh()
+            return snapshot[2]
     
+    async with _all_tools_lock:
+        snapshot = _all_tools_snapshot
+        if snapshot is not None and time.monotonic() < snapshot[0]:
+            return snapshot[2]
+        return await _fetch_all_tools(db)
+
+
+async def _fetch_all_tools(db: "AsyncSession") -> list[Tool]:
+    # Callers hold _all_tools_lock.
+    global _all_tools_snapshot
+    generation = _all_tools_generation
     tools = await get_all_active_tools(db)
-    _tool_cache[cache_key] = tools
+    if generation == _all_tools_generation:
+        fresh_until = time.monotonic() + TOOL_CACHE_TTL_SECONDS
+        _all_tools_snapshot = (fresh_until, fresh_until + TOOL_CACHE_STALE_SECONDS, tools)
     return tools
 
 
+def _schedule_all_tools_refresh() -> None:
+    global _all_tools_refresh
+    if _all_tools_refresh is None or _all_tools_refresh.done():
+        _all_tools_refresh = asyncio.create_task(_refresh_all_tools())
+
+
+async def _refresh_all_tools() -> None:
+    # Runs detached from the request, so it opens its own session.
+    try:
+        async with _all_tools_lock:
+            snapshot = _all_tools_snapshot
+            if snapshot is not None and time.monotonic() < snapshot[0]:
+                return
+            async with AsyncSessionLocal() as db:
+                await _fetch_all_tools(db)
+    except Exception as e:
+        logger.warning("tool_cache_refresh_failed", error=str(e))
+
+
+class _ActiveToolViews(NamedTuple):
+    """Lookups derived from one active-tool snapshot."""
+
+    source: list[Tool]
+    by_name: dict[str, Tool]
+    by_scope: dict[ToolScope, list[Tool]]
+    core: list[Tool]
+
+
+_active_tool_views: _ActiveToolViews | None = None
+
+
+def _views_for(tools: list[Tool]) -> _ActiveToolViews:
+    # Rebuilt whenever the snapshot list is replaced, so name, scope and
+    # core lookups never disagree with get_all_tools_cached.
+    global _active_tool_views
+    views = _active_tool_views
+    if views is not None and views.source is tools:
+        return views
+    by_scope: dict[ToolScope, list[Tool]] = {}
+    for tool in tools:
+        by_scope.setdefault(tool.scope, []).append(tool)
+    _active_tool_views = _ActiveToolViews(
+        source=tools,
+        by_name={tool.name: tool for tool in tools},
+        by_scope=by_scope,
+        core=[tool for tool in tools if "core" in (tool.categories or ())],
+    )
+    return _active_tool_views
+
+
+async def get_tools_by_name_cached(db: "AsyncSession") -> dict[str, Tool]:
+    """Get active tools indexed by name, for O(1) lookups per invocation.
+
+    Derived from the active-tool snapshot and rebuilt whenever it is
+    refreshed, so it always matches get_all_tools_cached.
+
+    Args:
+        db: Async database session.
+
+    Returns:
+        Mapping of tool name to active Tool.
+    """
+    return _views_for(await get_all_tools_cached(db)).by_name
+
+
 async def get_tools_by_scope_cached(db: "AsyncSession", scope: str) -> list[Tool]:
-    """Get active tools for a scope with cache support."""
-    cache_key = f"active_tools_scope:{scope}"
+    """Get active tools for a scope from the active-tool snapshot."""
+    views = _views_for(await get_all_tools_cached(db))
+    return views.by_scope.get(ToolScope(scope), [])
+
+
+async def get_core_tools_cached(db: "AsyncSession") -> list[Tool]:
+    """Get always-available core tools from the active-tool snapshot."""
+    return _views_for(await get_all_tools_cached(db)).core
+
+
+class _ToolResponses(NamedTuple):
+    """Prebuilt API responses for the active tools."""
+
+    responses: list[ToolResponse]
+    required_roles: dict[str, frozenset[str]]
+    # name -> (position in responses, response)
+    by_name: dict[str, tuple[int, ToolResponse]]
+    # Changes on every rebuild; keys per-user views built from this data.
+    version: int
+
+
+async def _get_tool_responses_cached(db: "AsyncSession") -> _ToolResponses:
+    """Build ToolResponse objects once per cache fill instead of per request.
+
+    Loads only the listed columns rather than full Tool rows, so the
+    listing never pulls embeddings or input schemas.
+    """
+    cache_key = "all_active_tools_response"
 
     if cache_key in _tool_cache:
         return _tool_cache[cache_key]
 
-    tools = await get_active_tools_by_scope(db, scope)
-    _tool_cache[cache_key] = tools
+    tools = await get_all_active_tool_rows(db)
+    responses = [
+        ToolResponse(
+            name=tool.name,
+            description=tool.description,
+            backend_url=tool.backend_url,
+            risk_level=tool.risk_level.value,
+        )
+        for tool in tools
+    ]
+    cached = _ToolResponses(
+        responses=responses,
+        required_roles={tool.name: frozenset(tool.required_roles or ()) for tool in tools},
+        by_name={response.name: (i, response) for i, response in enumerate(responses)},
+        version=next(_tool_response_versions),
+    )
+    _tool_cache[cache_key] = cached
+    return cached
+
+
+def _tool_fingerprint(tools: list[Tool]) -> tuple[tuple[int, Any, bool], ...]:
+    return tuple((tool.id, tool.updated_at, tool.embedding is not None) for tool in tools)
+
+
+class _ToolEmbeddingIndex:
+    """Active tool embeddings as one L2-normalized float32 matrix.
+
+    Row ``i`` belongs to ``tools[i]``; ranking a query is a single
+    matrix-vector product plus a partial sort of the candidates.
+    """
+
+    def __init__(self, tools: list[Tool]) -> None:
+        self.source = tools
+        self.fingerprint = _tool_fingerprint(tools)
+        self.tools = [tool for tool in tools if tool.embedding is not None]
+        if not self.tools:
+            self.matrix = np.empty((0, 0), dtype=np.float32)
+            return
+        matrix = np.asarray([tool.embedding for tool in self.tools], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        self.matrix = matrix
+
+    def rebind(self, tools: list[Tool]) -> None:
+        """Point the rows at a refetched tool list with the same fingerprint."""
+        self.source = tools
+        self.tools = [tool for tool in tools if tool.embedding is not None]
+
+    def rank(self, query_embedding: list[float], top_k: int, threshold: float) -> list[Tool]:
+        if not self.tools or top_k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+        similarities = self.matrix @ (query / query_norm)
+
+        candidates = np.flatnonzero(similarities > threshold)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-similarities[candidates], top_k - 1)[:top_k]]
+        ranked = candidates[np.argsort(-similarities[candidates], kind="stable")]
+        return [self.tools[i] for i in ranked]
+
+
+_tool_embedding_index: _ToolEmbeddingIndex | None = None
+
+
+def _embedding_index_for(tools: list[Tool]) -> _ToolEmbeddingIndex:
+    # The tool list is refetched whenever _tool_cache expires; the matrix is
+    # only rebuilt when a tool was added, removed, or updated.
+    global _tool_embedding_index
+    index = _tool_embedding_index
+    if index is not None and index.source is tools:
+        return index
+    if index is not None and index.fingerprint == _tool_fingerprint(tools):
+        index.rebind(tools)
+        return index
+    _tool_embedding_index = _ToolEmbeddingIndex(tools)
+    return _tool_embedding_index
+
+
+async def search_tools_by_embedding_cached(
+    db: "AsyncSession",
+    query_embedding: list[float],
+    top_k: int = 10,
+    threshold: float = 0.7,
+) -> list[Tool]:
+    """Vector search over the cached active tools, in process.
+
+    Matches the pgvector query in the repository (cosine similarity above
+    ``threshold``, most similar first) without a database round trip.
+    The normalized embedding matrix is kept until the tools change.
+    Falls back to the database search when numpy is unavailable.
+
+    Args:
+        db: Async database session.
+        query_embedding: Query vector.
+        top_k: Maximum tools to return.
+        threshold: Minimum cosine similarity for a match.
+
+    Returns:
+        List of matching Tool objects, most similar first.
+    """
+    if not NUMPY_AVAILABLE:
+        return await search_tools_by_embedding(db, query_embedding, top_k=top_k, threshold=threshold)
+
+    index = _embedding_index_for(await get_all_tools_cached(db))
+    return index.rank(query_embedding, top_k, threshold)
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _unit_vector(embedding: list[float]) -> "np.ndarray":
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _similar_query_index(top_k: int, threshold: float) -> _SimilarQueryIndex:
+    index = _similar_query_indexes.get((top_k, threshold))
+    if index is None:
+        index = _similar_query_indexes.setdefault(
+            (top_k, threshold),
+            _SimilarQueryIndex(SIMILAR_QUERY_INDEX_SIZE, SEMANTIC_CACHE_TTL_SECONDS),
+        )
+    return index
+
+
+async def search_tools_semantic_cached(
+    db: "AsyncSession",
+    query: str,
+    top_k: int = 10,
+    threshold: float = 0.7,
+) -> list[Tool]:
+    """Semantic tool search with a query-level cache.
+
+    Repeated queries (after case/whitespace normalization) skip both the
+    embedding call and the vector search. New queries whose embedding is
+    close to a cached one reuse that result instead of querying pgvector.
+
+    Args:
+        db: Async database session.
+        query: Natural-language search text.
+        top_k: Maximum tools to return.
+        threshold: Minimum cosine similarity for a tool match.
+
+    Returns:
+        List of matching Tool objects, most similar first.
+    """
+    cache_key = (_normalize_query(query), top_k, threshold)
+    cached = _semantic_search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    embedding = await generate_embedding(query)
+    tools = None
+    if NUMPY_AVAILABLE:
+        vector = _unit_vector(embedding)
+        index = _similar_query_index(top_k, threshold)
+        tools = index.find(vector)
+    if tools is None:
+        tools = await search_tools_by_embedding_cached(db, embedding, top_k=top_k, threshold=threshold)
+        if NUMPY_AVAILABLE:
+            index.add(vector, tools)
+
+    _semantic_search_cache[cache_key] = tools
     return tools
 
 
@@ -136,6 +478,8 @@ async def get_tools_for_user(
     
     Fetches active tools from the database (with caching) and filters
     them based on the user's allowed_tools set from their JWT claims.
+    The session is closed once the tools are loaded, so its pooled
+    connection is not held while the response is filtered and sent.
     
     Args:
         db: Async database session.
@@ -144,25 +488,59 @@ async def get_tools_for_user(
     Returns:
         ToolListResponse with filtered tool list.
     """
-    all_tools = await get_all_tools_cached(db)
+    cached = await _get_tool_responses_cached(db)
+    # Everything below is in memory; return the connection to the pool now
+    # (a no-op on cache hits, which never check one out).
+    await db.close()
+    return _filter_tool_responses(cached, user)
+
+
+async def get_tools_for_user_json(
+    db: "AsyncSession",
+    user: AuthenticatedUser
+) -> bytes:
+    """Get the serialized tool list for a user.
+    
+    Same result as ``get_tools_for_user`` rendered as JSON, cached per
+    (allowed tools, roles) so repeat requests skip filtering and
+    serialization.
+    
+    Args:
+        db: Async database session.
+        user: Authenticated user with claims and permissions.
+        
+    Returns:
+        JSON-encoded ToolListResponse.
+    """
+    cached = await _get_tool_responses_cached(db)
+    await db.close()
     
+    key = (frozenset(user.allowed_tools), user.roles, cached.version)
+    body = _user_view_cache.get(key)
+    if body is None:
+        body = _filter_tool_responses(cached, user).model_dump_json().encode()
+        _user_view_cache[key] = body
+    return body
+
+
+def _filter_tool_responses(cached: _ToolResponses, user: AuthenticatedUser) -> ToolListResponse:
     # Filter tools based on user permissions
+    if "*" in user.allowed_tools:
+        candidates = cached.responses
+    else:
+        # Look up only the user's tools; sorting keeps the registry order.
+        found = [cached.by_name[name] for name in user.allowed_tools if name in cached.by_name]
+        found.sort(key=lambda entry: entry[0])
+        candidates = [tool for _, tool in found]
+    
+    user_roles = user.roles
     filtered_tools: list[ToolResponse] = []
     
-    for tool in all_tools:
-        # Check if user has wildcard access or specific tool access
-        if "*" in user.allowed_tools or tool.name in user.allowed_tools:
-            # Also check tool-specific required_roles if set
-            if tool.required_roles:
-                # Tool has role requirements - check if user has any required role
-                if not any(role in user.roles for role in tool.required_roles):
-                    continue
-            
-            filtered_tools.append(ToolResponse(
-                name=tool.name,
-                description=tool.description,
-                backend_url=tool.backend_url,
-                risk_level=tool.risk_level.value
-            ))
+    for tool in candidates:
+        # Tool has role requirements - check if user has any required role
+        required_roles = cached.required_roles[tool.name]
+        if required_roles and required_roles.isdisjoint(user_roles):
+            continue
+        filtered_tools.append(tool)
     
     return ToolListResponse(tools=filtered_tools, count=len(filtered_tools))
@@ -0,0 +1,59 @@
+"""Tool usage counters buffered in memory and written in batches."""
+
+import asyncio
+from collections import Counter
+
+from structlog import get_logger
+
+from src.database import AsyncSessionLocal
+
+from .repository import add_tool_usage
+
+
+logger = get_logger()
+
+# Buffered counts are written at least this often...
+USAGE_FLUSH_INTERVAL_SECONDS = 5.0
+# ...and as soon as this many invocations are waiting.
+USAGE_FLUSH_THRESHOLD = 1000
+
+_usage_buffer: Counter[int] = Counter()
+_buffered_calls = 0
+_flush_task: asyncio.Task[None] | None = None
+
+
+def record_tool_usage(tool_id: int) -> None:
+    """Count one successful invocation of a tool.
+
+    The count reaches the database on the next flush, so a burst of tool
+    calls costs one UPDATE and one commit instead of one per call.
+    """
+    global _buffered_calls, _flush_task
+    _usage_buffer[tool_id] += 1
+    _buffered_calls += 1
+    if _buffered_calls >= USAGE_FLUSH_THRESHOLD and (_flush_task is None or _flush_task.done()):
+        _flush_task = asyncio.create_task(flush_tool_usage())
+
+
+async def flush_tool_usage() -> None:
+    """Write all buffered usage counts in a single statement."""
+    global _usage_buffer, _buffered_calls
+    if not _usage_buffer:
+        return
+    counts, _usage_buffer = _usage_buffer, Counter()
+    _buffered_calls = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            await add_tool_usage(db, counts)
+    except Exception as e:
+        # Keep the counts for the next flush rather than dropping them.
+        _usage_buffer.update(counts)
+        _buffered_calls += sum(counts.values())
+        logger.warning("tool_usage_flush_failed", error=str(e), tools=len(counts))
+
+
+async def usage_flush_loop() -> None:
+    """Flush buffered usage counts every ``USAGE_FLUSH_INTERVAL_SECONDS``."""
+    while True:
+        await asyncio.sleep(USAGE_FLUSH_INTERVAL_SECONDS)
+        await flush_tool_usage()
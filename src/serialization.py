@@ -0,0 +1,25 @@
+"""Compact JSON encoding shared by the request paths."""
+
+import json
+from typing import Any
+
+import orjson
+
+
+def json_dumps(value: Any) -> bytes:
+    """Encode ``value`` as compact UTF-8 JSON.
+    
+    Uses orjson and falls back to the stdlib encoder for the values orjson
+    rejects (e.g. ints beyond 64 bits). Non-string dict keys are converted
+    either way.
+    
+    Args:
+        value: JSON-serializable value.
+        
+    Returns:
+        Encoded JSON bytes.
+    """
+    try:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
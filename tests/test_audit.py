@@ -161,6 +161,13 @@ class TestAuditContext:
         # Duration should be at least 0
         assert ctx.duration_ms >= 0
 
+    def test_slots_prevent_ad_hoc_attributes(self):
+        """Context is slotted so per-invocation instances stay small."""
+        ctx = AuditContext("req-123", "user", "tool")
+        assert not hasattr(ctx, "__dict__")
+        with pytest.raises(AttributeError):
+            ctx.unexpected = True
+
 
 class TestRequireAdmin:
     """Tests for admin role requirement."""
@@ -258,6 +265,26 @@ class TestAuditLogResponse:
         assert response.request_id == "req-123"
         assert response.status == AuditStatus.success
 
+    def test_list_adapter_validates_orm_rows(self):
+        """Router's list adapter reads attributes from ORM rows."""
+        from src.audit.router import _AUDIT_LOG_LIST_ADAPTER
+
+        mock_log = MagicMock()
+        mock_log.id = 2
+        mock_log.timestamp = datetime.now(timezone.utc)
+        mock_log.request_id = "req-456"
+        mock_log.user_id = "user@example.com"
+        mock_log.tool_name = "read_file"
+        mock_log.endpoint_path = "/docs/sse"
+        mock_log.status = AuditStatus.error
+        mock_log.duration_ms = 10
+        mock_log.error_code = "BACKEND_ERROR"
+
+        items = _AUDIT_LOG_LIST_ADAPTER.validate_python([mock_log])
+        assert len(items) == 1
+        assert isinstance(items[0], AuditLogResponse)
+        assert items[0].error_code == "BACKEND_ERROR"
+
 
 class TestAuditToolInvocationContext:
     """Tests for the audit_tool_invocation context manager."""
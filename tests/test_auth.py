@@ -1,18 +1,48 @@
 """Unit tests for JWT authentication utilities."""
 
+import functools
+import json
+
 import pytest
 from datetime import datetime, timedelta, timezone
-from jose import jwt
+from jose import jwk, jwt
+from jose.utils import base64url_encode
 
 from src.auth.utils import decode_jwt, extract_user_claims, create_test_jwt
 from src.auth.exceptions import InvalidTokenError, ExpiredTokenError
-from src.auth.models import UserClaims
+from src.auth.models import AuthenticatedUser, UserClaims
 from src.config import get_settings
 
 
 settings = get_settings()
 
 
+@pytest.fixture(scope="session")
+def jwt_cfg() -> tuple[str, str]:
+    """Signing secret and algorithm of the default test settings."""
+    return settings.JWT_SECRET_KEY, settings.JWT_ALGORITHM
+
+
+@functools.lru_cache(maxsize=None)
+def _encoded_header(algorithm: str) -> bytes:
+    header = json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":"))
+    return base64url_encode(header.encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _signing_key(secret: str, algorithm: str):
+    return jwk.construct(secret, algorithm)
+
+
+def _encode(payload: dict, cfg: tuple[str, str]) -> str:
+    """Sign ``payload`` like ``jwt.encode``, reusing the header and key across tests."""
+    secret, algorithm = cfg
+    claims = base64url_encode(json.dumps(payload, separators=(",", ":")).encode())
+    signing_input = _encoded_header(algorithm) + b"." + claims
+    signature = base64url_encode(_signing_key(secret, algorithm).sign(signing_input))
+    return (signing_input + b"." + signature).decode()
+
+
 def _base_payload(user_id: str = "user123", settings_override=None) -> dict:
     local_settings = settings_override or get_settings()
     now = datetime.now(timezone.utc)
@@ -37,12 +67,12 @@ def _base_payload(user_id: str = "user123", settings_override=None) -> dict:
 class TestJWTDecoding:
     """Tests for JWT decode and validation."""
     
-    def test_decode_valid_token(self):
+    def test_decode_valid_token(self, jwt_cfg):
         """Test decoding a valid JWT token."""
         # Create a valid token
         payload = _base_payload()
         payload["email"] = "test@example.com"
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
         
         # Decode it
         decoded = decode_jwt(token)
@@ -50,7 +80,7 @@ class TestJWTDecoding:
         assert decoded[settings.JWT_USER_ID_CLAIM] == "user123"
         assert decoded["email"] == "test@example.com"
     
-    def test_decode_expired_token(self):
+    def test_decode_expired_token(self, jwt_cfg):
         """Test that expired tokens raise ExpiredTokenError."""
         # Create an expired token
         payload = _base_payload()
@@ -58,17 +88,17 @@ class TestJWTDecoding:
         payload[settings.JWT_EXP_CLAIM] = int((datetime.now(timezone.utc) - (skew + timedelta(minutes=1))).timestamp())
         if settings.JWT_MAX_TOKEN_AGE_MINUTES > 0:
             payload[settings.JWT_IAT_CLAIM] = int((datetime.now(timezone.utc) - timedelta(minutes=10)).timestamp())
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
         
         # Should raise ExpiredTokenError
         with pytest.raises(ExpiredTokenError, match="JWT token has expired"):
             decode_jwt(token)
     
-    def test_decode_invalid_signature(self):
+    def test_decode_invalid_signature(self, jwt_cfg):
         """Test that tokens with invalid signatures raise InvalidTokenError."""
         # Create a token with wrong secret
         payload = _base_payload()
-        token = jwt.encode(payload, "wrong_secret_key", algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, ("wrong_secret_key", jwt_cfg[1]))
         
         # Should raise InvalidTokenError
         with pytest.raises(InvalidTokenError, match="Invalid JWT token"):
@@ -110,38 +140,38 @@ class TestJWTDecoding:
         finally:
             get_settings.cache_clear()
 
-    def test_decode_missing_issuer(self):
+    def test_decode_missing_issuer(self, jwt_cfg):
         payload = _base_payload()
         payload["email"] = "test@example.com"
         payload.pop("iss", None)
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
 
         with pytest.raises(InvalidTokenError, match="Invalid issuer"):
             decode_jwt(token)
 
-    def test_decode_missing_audience(self):
+    def test_decode_missing_audience(self, jwt_cfg):
         payload = _base_payload()
         payload["email"] = "test@example.com"
         payload.pop("aud", None)
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
 
         with pytest.raises(InvalidTokenError, match="missing required 'aud'"):
             decode_jwt(token)
 
-    def test_decode_invalid_audience(self):
+    def test_decode_invalid_audience(self, jwt_cfg):
         payload = _base_payload()
         payload["email"] = "test@example.com"
         payload["aud"] = "some-other-audience"
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
 
         with pytest.raises(InvalidTokenError, match="Invalid JWT token"):
             decode_jwt(token)
 
-    def test_decode_list_audience(self):
+    def test_decode_list_audience(self, jwt_cfg):
         payload = _base_payload()
         payload["email"] = "test@example.com"
         payload["aud"] = [settings.JWT_AUDIENCE, "other"]
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
 
         decoded = decode_jwt(token)
         assert decoded[settings.JWT_USER_ID_CLAIM] == "user123"
@@ -168,21 +198,21 @@ class TestUserClaimsExtraction:
         assert claims.groups == ["engineering"]
         assert claims.workspace == "workspace-1"
     
-    def test_extract_claims_missing_user_id(self):
+    def test_extract_claims_missing_user_id(self, jwt_cfg):
         """Test that tokens without user_id/sub raise InvalidTokenError."""
         payload = _base_payload()
         payload["email"] = "test@example.com"
         payload.pop(settings.JWT_USER_ID_CLAIM, None)
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
         
         # Should raise InvalidTokenError (either from Pydantic validation or explicit check)
         with pytest.raises(InvalidTokenError):
             extract_user_claims(token)
     
-    def test_extract_claims_with_defaults(self):
+    def test_extract_claims_with_defaults(self, jwt_cfg):
         """Test that missing optional claims use default values."""
         payload = _base_payload(user_id="user456")
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
         
         claims = extract_user_claims(token)
         
@@ -191,6 +221,14 @@ class TestUserClaimsExtraction:
         assert claims.roles == []
         assert claims.groups == []
         assert claims.workspace is None
+    
+    def test_authenticated_user_roles_are_a_frozenset(self):
+        """Test that user roles are resolved once into a frozenset."""
+        claims = UserClaims(user_id="user123", roles=["admin", "user", "admin"])
+        user = AuthenticatedUser(claims=claims, allowed_tools={"*"})
+        
+        assert user.roles == frozenset({"admin", "user"})
+        assert user.roles is user.roles
 
 
 class TestJWTConfigValidation:
@@ -316,7 +354,7 @@ class TestCreateTestJWT:
         assert decoded["roles"] == ["viewer"]
         assert decoded[settings.JWT_TENANT_CLAIM] == "test-workspace"
     
-    def test_create_test_jwt_with_negative_expiration(self):
+    def test_create_test_jwt_with_negative_expiration(self, jwt_cfg):
         """Test that token with negative expiration is expired."""
         # Create a token that expired 1 minute ago
         payload = _base_payload(user_id="user")
@@ -324,7 +362,7 @@ class TestCreateTestJWT:
         payload[settings.JWT_EXP_CLAIM] = int((datetime.now(timezone.utc) - (skew + timedelta(minutes=1))).timestamp())
         if settings.JWT_MAX_TOKEN_AGE_MINUTES > 0:
             payload[settings.JWT_IAT_CLAIM] = int((datetime.now(timezone.utc) - timedelta(minutes=10)).timestamp())
-        token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        token = _encode(payload, jwt_cfg)
         
         # Should be expired
         with pytest.raises(ExpiredTokenError):
@@ -65,6 +65,14 @@ class TestMCPSchemas:
         assert response.result is None
         assert response.error.code == -32001
         assert response.error.message == "Tool not found"
+
+    def test_mcp_response_error_does_not_share_detail(self):
+        """Cached error templates are copied per response."""
+        first = MCPResponse.error_response(id=1, code=MCPErrorCodes.TOOL_NOT_FOUND, message="Tool not found")
+        second = MCPResponse.error_response(id=2, code=MCPErrorCodes.TOOL_NOT_FOUND, message="Tool not found")
+
+        assert first.error is not second.error
+        assert first.model_dump() == {**second.model_dump(), "id": 1}
     
     def test_invoke_tool_request(self):
         """Test InvokeToolRequest schema."""
@@ -270,8 +278,8 @@ class TestInvokeToolService:
         db.add = MagicMock()
         mock_client = AsyncMock()
         
-        with patch("src.gateway.service.get_all_tools_cached", new_callable=AsyncMock) as mock_get:
-            mock_get.return_value = []  # No tools in registry
+        with patch("src.gateway.service.get_tools_by_name_cached", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = {}  # No tools in registry
             
             with pytest.raises(ToolNotFoundError):
                 await invoke_tool(db=db, user=admin_user, request=request, client=mock_client)
@@ -314,13 +322,14 @@ class TestInvokeAuditLogging:
         """Test BackendTimeoutError is logged."""
         db, user, request, client = mock_deps
         
-        with patch("src.gateway.service.audit_tool_invocation") as mock_audit_ctx, \
+        with patch("src.gateway.service.AuditContext") as mock_audit_ctx, \
+             patch("src.gateway.service.log_tool_invocation", new_callable=AsyncMock) as mock_log, \
              patch("src.gateway.service.validate_payload_size"), \
-             patch("src.gateway.service.get_all_tools_cached") as mock_get_tools:
+             patch("src.gateway.service.get_tools_by_name_cached") as mock_get_tools:
             
             # Setup audit context mock
-            ctx_instance = AsyncMock()
-            mock_audit_ctx.return_value.__aenter__.return_value = ctx_instance
+            ctx_instance = MagicMock()
+            mock_audit_ctx.return_value = ctx_instance
             
             # Simulate generic error to trigger logging? 
             # No, we need to mock something that raises BackendTimeoutError
@@ -331,26 +340,72 @@ class TestInvokeAuditLogging:
             tool.name = "tool"
             tool.backend_url = "http://bad"
             tool.required_roles = None
-            mock_get_tools.return_value = [tool]
+            mock_get_tools.return_value = {"tool": tool}
             
             with patch("src.gateway.service.forward_tool_call", side_effect=BackendTimeoutError("url", 1.0)):
                 with pytest.raises(BackendTimeoutError):
                     await invoke_tool(db, user, request, client)
                 
                 ctx_instance.mark_timeout.assert_called_once()
+                mock_log.assert_awaited_once_with(db, ctx_instance)
+
+    @pytest.mark.asyncio
+    async def test_audit_logs_backend_error_with_its_code(self, mock_deps):
+        """Mapped gateway errors are recorded under the exception's code."""
+        db, user, request, client = mock_deps
+        
+        with patch("src.gateway.service.AuditContext") as mock_audit_ctx, \
+             patch("src.gateway.service.log_tool_invocation", new_callable=AsyncMock) as mock_log, \
+             patch("src.gateway.service.get_tools_by_name_cached") as mock_get_tools:
+            
+            ctx_instance = MagicMock()
+            mock_audit_ctx.return_value = ctx_instance
+            
+            tool = MagicMock()
+            tool.name = "tool"
+            tool.backend_url = "http://bad"
+            tool.required_roles = None
+            mock_get_tools.return_value = {"tool": tool}
+            
+            with patch("src.gateway.service.forward_tool_call", side_effect=BackendError("url", 500)):
+                with pytest.raises(BackendError):
+                    await invoke_tool(db, user, request, client)
+            
+            ctx_instance.mark_error.assert_called_once_with("BACKEND_ERROR")
+            ctx_instance.mark_timeout.assert_not_called()
+            mock_log.assert_awaited_once_with(db, ctx_instance)
+
+    @pytest.mark.asyncio
+    async def test_unexpected_error_is_logged_unmarked(self, mock_deps):
+        """Unmapped exceptions still produce one audit record."""
+        db, user, request, client = mock_deps
+        
+        with patch("src.gateway.service.AuditContext") as mock_audit_ctx, \
+             patch("src.gateway.service.log_tool_invocation", new_callable=AsyncMock) as mock_log, \
+             patch("src.gateway.service.get_tools_by_name_cached", side_effect=RuntimeError("db down")):
+            
+            ctx_instance = MagicMock()
+            mock_audit_ctx.return_value = ctx_instance
+            
+            with pytest.raises(RuntimeError):
+                await invoke_tool(db, user, request, client)
+            
+            ctx_instance.mark_error.assert_not_called()
+            mock_log.assert_awaited_once_with(db, ctx_instance)
 
     @pytest.mark.asyncio
     async def test_audit_logs_tool_not_found(self, mock_deps):
         """Test ToolNotFoundError is logged."""
         db, user, request, client = mock_deps
         
-        with patch("src.gateway.service.audit_tool_invocation") as mock_audit_ctx, \
-             patch("src.gateway.service.get_all_tools_cached") as mock_get_tools:
+        with patch("src.gateway.service.AuditContext") as mock_audit_ctx, \
+             patch("src.gateway.service.log_tool_invocation", new_callable=AsyncMock) as mock_log, \
+             patch("src.gateway.service.get_tools_by_name_cached") as mock_get_tools:
             
-            ctx_instance = AsyncMock()
-            mock_audit_ctx.return_value.__aenter__.return_value = ctx_instance
+            ctx_instance = MagicMock()
+            mock_audit_ctx.return_value = ctx_instance
             
-            mock_get_tools.return_value = []
+            mock_get_tools.return_value = {}
             
             with pytest.raises(ToolNotFoundError):
                 await invoke_tool(db, user, request, client)
@@ -363,17 +418,18 @@ class TestInvokeAuditLogging:
         request.tool_name = "tool"
         request.arguments = {}
 
-        with patch("src.gateway.service.audit_tool_invocation") as mock_audit_ctx, \
-             patch("src.gateway.service.get_all_tools_cached") as mock_get_tools:
-            ctx_instance = AsyncMock()
-            mock_audit_ctx.return_value.__aenter__.return_value = ctx_instance
+        with patch("src.gateway.service.AuditContext") as mock_audit_ctx, \
+             patch("src.gateway.service.log_tool_invocation", new_callable=AsyncMock) as mock_log, \
+             patch("src.gateway.service.get_tools_by_name_cached") as mock_get_tools:
+            ctx_instance = MagicMock()
+            mock_audit_ctx.return_value = ctx_instance
 
             tool = MagicMock()
             tool.name = "tool"
             tool.id = 1
             tool.backend_url = "http://ok"
             tool.required_roles = None
-            mock_get_tools.return_value = [tool]
+            mock_get_tools.return_value = {"tool": tool}
 
             mock_response = MagicMock()
             mock_response.error = None
@@ -392,4 +448,6 @@ class TestInvokeAuditLogging:
 
             _, kwargs = mock_audit_ctx.call_args
             assert kwargs["endpoint_path"] == "/calculator/sse"
+            ctx_instance.mark_error.assert_not_called()
+            mock_log.assert_awaited_once_with(db, ctx_instance)
 
@@ -98,6 +98,21 @@ class TestJobsRepository:
         db_mock.execute.assert_awaited_once()
         db_mock.commit.assert_awaited_once()
 
+    @pytest.mark.asyncio
+    async def test_cleanup_old_jobs_batches_until_drained(self):
+        """Cleanup keeps deleting full batches and stops on a short one."""
+        from src.jobs.repository import cleanup_old_jobs
+        
+        db_mock = AsyncMock()
+        full, partial = MagicMock(rowcount=3), MagicMock(rowcount=1)
+        db_mock.execute.side_effect = [full, full, partial]
+        
+        deleted_count = await cleanup_old_jobs(db_mock, retention_hours=24, batch_size=3)
+        
+        assert deleted_count == 7
+        assert db_mock.execute.await_count == 3
+        assert db_mock.commit.await_count == 3
+
 
 
 class TestJobsService:
@@ -197,3 +212,23 @@ class TestJobsService:
             final_call = calls[-1]
             assert final_call.args[2] == JobStatus.FAILED
             assert final_call.kwargs.get("error") == "Tool fail"
+
+    @pytest.mark.asyncio
+    async def test_process_job_reuses_shared_client(self, user):
+        """A supplied client is used instead of opening a new one per job."""
+        job_id = uuid4()
+        job_create = JobCreate(tool_name="test_tool", arguments={})
+        shared_client = MagicMock()
+        
+        with patch("src.jobs.service.AsyncSessionLocal") as mock_session_cls, \
+             patch("src.jobs.service.httpx.AsyncClient") as mock_client_cls, \
+             patch("src.jobs.service.update_job_status", new_callable=AsyncMock), \
+             patch("src.jobs.service.gateway_invoke_tool", new_callable=AsyncMock) as mock_invoke:
+            
+            mock_session_cls.return_value.__aenter__.return_value = AsyncMock()
+            mock_invoke.return_value = MCPResponse.success(id="req-1", result={})
+            
+            await process_job_task(job_id, user, job_create, client=shared_client)
+            
+            mock_client_cls.assert_not_called()
+            assert mock_invoke.await_args.kwargs["client"] is shared_client
@@ -111,3 +111,13 @@ def test_openapi_schema_generated():
     assert "openapi" in response.json()
     assert "paths" in response.json()
 
+
+
+def test_shared_http_client_uses_pool_limits():
+    from src.dependencies import HTTP_CLIENT_LIMITS, create_http_client
+
+    with patch("src.dependencies.httpx.AsyncClient") as client_cls:
+        create_http_client()
+
+    client_cls.assert_called_once_with(timeout=None, limits=HTTP_CLIENT_LIMITS)
+    assert HTTP_CLIENT_LIMITS.max_keepalive_connections == 64
@@ -4,7 +4,7 @@ from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 
 import pytest
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.testclient import TestClient
 from fastapi.responses import JSONResponse
 
@@ -13,6 +13,7 @@ from src.auth.models import AuthenticatedUser, UserClaims
 from src.auth.exceptions import AuthorizationError
 from src.database import get_db
 from src.dependencies import get_http_client
+from src.mcp_transport.schemas import MCPContent, MCPToolCallResult
 from src.mcp_transport.sse import router as mcp_router
 from src.ratelimit.exceptions import RateLimitExceededError
 from src.ratelimit.limiter import RateLimitResult
@@ -120,14 +121,14 @@ def test_meta_tool_call_returns_removed_error(client, meta_tool_name):
 
 
 def test_tool_call_outside_scope_returns_403(client):
-    with patch("src.mcp_transport.service.get_all_tools_cached", new_callable=AsyncMock) as mock_get_tools:
+    with patch("src.mcp_transport.service.get_tools_by_name_cached", new_callable=AsyncMock) as mock_get_tools:
         with patch("src.mcp_transport.service.log_denied_tool_invocation", new_callable=AsyncMock):
-            mock_get_tools.return_value = [
-                SimpleNamespace(
+            mock_get_tools.return_value = {
+                "document_generate": SimpleNamespace(
                     name="document_generate",
                     scope=SimpleNamespace(value="docs"),
                 )
-            ]
+            }
             response = client.post(
                 "/calculator/sse",
                 json=_tool_call_payload("document_generate", {"content": "x", "format": "pdf"}),
@@ -146,14 +147,20 @@ def test_tools_call_rate_limit_returns_429(client):
         reset_at=0,
         retry_after=1.2,
     )
-    with patch("src.mcp_transport.sse.check_rate_limit", return_value=denied):
+    with patch("src.mcp_transport.sse.check_rate_limit", new=AsyncMock(return_value=denied)):
         response = client.post(
             "/calculator/sse",
             json=_tool_call_payload("exact_calculate", {"operator": "add", "operands": ["1", "2"]}),
         )
 
     assert response.status_code == 429
-    assert response.json()["error"] == "RATE_LIMIT_EXCEEDED"
+    assert response.headers["Retry-After"] == "2"
+    assert response.headers["X-RateLimit-Limit"] == "100"
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+    body = response.json()
+    assert body["id"] == "req-2"
+    assert body["error"]["code"] == -32013
+    assert body["error"]["data"]["error"] == "RATE_LIMIT_EXCEEDED"
 
 
 def test_tools_call_checks_rate_limit_with_user_and_tool(client):
@@ -164,16 +171,206 @@ def test_tools_call_checks_rate_limit_with_user_and_tool(client):
         reset_at=0,
         retry_after=0.0,
     )
-    with patch("src.mcp_transport.sse.check_rate_limit", return_value=allowed) as mock_rate_limit:
+    with patch("src.mcp_transport.sse.check_rate_limit", new=AsyncMock(return_value=allowed)) as mock_rate_limit:
         with patch("src.mcp_transport.sse.handle_tools_call", new_callable=AsyncMock) as mock_call:
-            mock_call.return_value = SimpleNamespace(
-                model_dump=lambda: {"content": [{"type": "text", "text": "{}"}], "isError": False}
+            mock_call.return_value = MCPToolCallResult(
+                content=[MCPContent(type="text", text="{}")], isError=False
             )
-            client.post(
+            response = client.post(
                 "/calculator/sse",
                 json=_tool_call_payload("exact_calculate", {"operator": "add", "operands": ["1", "2"]}),
             )
 
+    assert response.json()["result"]["content"][0]["text"] == "{}"
     _, kwargs = mock_rate_limit.call_args
     assert kwargs["user_id"] == "u1"
     assert kwargs["tool_name"] == "exact_calculate"
+
+
+@pytest.mark.asyncio
+async def test_sse_get_emits_endpoint_event_as_bytes():
+    from src.mcp_transport.sse import _handle_sse_get
+
+    request = SimpleNamespace(url=SimpleNamespace(scheme="http", netloc="testserver"))
+    response = await _handle_sse_get(request, "calculator")
+
+    first = await response.body_iterator.__anext__()
+    await response.body_iterator.aclose()
+    assert first == b"event: endpoint\ndata: http://testserver/calculator/sse\n\n"
+    assert response.headers["x-accel-buffering"] == "no"
+    assert response.headers["cache-control"] == "no-cache"
+
+
+@pytest.mark.asyncio
+async def test_sse_heartbeat_shares_one_ticker_across_streams():
+    import asyncio
+
+    from src.mcp_transport.sse import _Heartbeat
+
+    heartbeat = _Heartbeat(0.01)
+    waiters = [asyncio.create_task(heartbeat.wait()) for _ in range(3)]
+    await asyncio.sleep(0)
+    ticker = heartbeat._task
+
+    await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+    assert heartbeat._task is ticker
+
+    # With no stream waiting, the ticker stops on its next tick.
+    await asyncio.wait_for(ticker, timeout=1)
+
+
+def test_scoped_sse_post_unknown_method_returns_method_not_found(client):
+    response = client.post(
+        "/calculator/sse",
+        json={"jsonrpc": "2.0", "id": "req-3", "method": "resources/list"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == "req-3"
+    assert body["error"]["code"] == -32601
+
+
+def test_scoped_sse_post_batch_returns_array_of_responses(client):
+    batch = [
+        _initialize_payload(),
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": "req-3", "method": "resources/list"},
+        {"jsonrpc": "2.0", "id": "req-4"},
+    ]
+    response = client.post("/calculator/sse", json=batch)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body] == ["req-1", "req-3", "req-4"]
+    assert body[0]["result"]["protocolVersion"]
+    assert body[1]["error"]["code"] == -32601
+    assert body[2]["error"]["code"] == -32600
+
+
+def test_scoped_sse_post_batch_isolates_rate_limited_entry(client):
+    denied = RateLimitResult(allowed=False, limit=1, remaining=0, reset_at=0, retry_after=5)
+    with patch("src.mcp_transport.sse.check_rate_limit", new=AsyncMock(return_value=denied)):
+        response = client.post(
+            "/calculator/sse",
+            json=[_initialize_payload(), _tool_call_payload("exact_calculate")],
+        )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body[0]["id"] == "req-1" and body[0]["error"] is None
+    assert body[1]["id"] == "req-2"
+    assert body[1]["error"]["code"] == -32013
+    assert body[1]["error"]["data"] == {"error": "RATE_LIMIT_EXCEEDED", "retry_after": 5}
+
+
+def test_scoped_sse_post_empty_batch_is_invalid_request(client):
+    response = client.post("/calculator/sse", json=[])
+    assert response.status_code == 200
+    assert response.json()["error"]["code"] == -32600
+
+
+def test_scoped_sse_post_malformed_batch_is_parse_error(client):
+    response = client.post(
+        "/calculator/sse", content=b"[{bad", headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] is None
+    assert body["error"]["code"] == -32700
+
+
+def test_scoped_sse_post_batch_drops_notification_errors(client):
+    batch = [
+        {"jsonrpc": "2.0", "method": "notifications/unknown"},
+        {"jsonrpc": "2.0", "id": "req-2", "method": "resources/list"},
+    ]
+    response = client.post("/calculator/sse", json=batch)
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == ["req-2"]
+
+
+def test_scoped_sse_post_oversized_batch_is_invalid_request(client):
+    from src.mcp_transport.sse import MAX_BATCH_SIZE
+
+    batch = [_initialize_payload()] * (MAX_BATCH_SIZE + 1)
+    response = client.post("/calculator/sse", json=batch)
+    assert response.status_code == 200
+    assert response.json()["error"]["code"] == -32600
+
+
+def test_sse_json_responses_fall_back_for_values_orjson_rejects():
+    from src.mcp_transport.sse import _ORJSONResponse
+
+    assert _ORJSONResponse(content={"id": "req-1"}).body == b'{"id":"req-1"}'
+    assert b"18446744073709551616" in _ORJSONResponse(content={"value": 2**64}).body
+
+
+@pytest.mark.asyncio
+async def test_dispatch_finishes_when_request_is_cancelled():
+    import asyncio
+
+    from src.mcp_transport.sse import _run_to_completion
+
+    release = asyncio.Event()
+    finished = []
+
+    async def tool_call():
+        await release.wait()
+        finished.append(True)
+        return "done"
+
+    outer = asyncio.create_task(_run_to_completion(tool_call()))
+    await asyncio.sleep(0)
+    outer.cancel()
+    await asyncio.sleep(0)
+    assert not outer.done()
+
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await outer
+    assert finished == [True]
+
+
+def test_unknown_scope_get_returns_404(client):
+    response = client.get("/invalid/sse")
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("method", ["get", "post"])
+def test_unknown_scope_requires_auth_before_404(client, method):
+    async def mock_auth_failure():
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    client.app.dependency_overrides[get_current_user] = mock_auth_failure
+    response = getattr(client, method)("/invalid/sse")
+
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_idle_sse_streams_hold_no_per_connection_timers():
+    import asyncio
+
+    from src.mcp_transport import sse
+
+    loop = asyncio.get_running_loop()
+    request = SimpleNamespace(url=SimpleNamespace(scheme="http", netloc="testserver"))
+    heartbeat = sse._Heartbeat(60)
+    streams = []
+    with patch.object(sse, "_heartbeat", heartbeat):
+        baseline = len(loop._scheduled)
+        for _ in range(10):
+            response = await sse._handle_sse_get(request, "calculator")
+            await response.body_iterator.__anext__()
+            streams.append(asyncio.ensure_future(response.body_iterator.__anext__()))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        # One shared ticker timer, however many streams are parked.
+        assert len(loop._scheduled) - baseline == 1
+
+        for stream in streams:
+            stream.cancel()
+        await asyncio.gather(*streams, return_exceptions=True)
+        heartbeat._task.cancel()
@@ -7,7 +7,13 @@ import pytest
 
 from src.auth.exceptions import ToolNotAllowedError
 from src.auth.models import AuthenticatedUser, UserClaims
-from src.mcp_transport.service import handle_tools_call, handle_tools_list
+from src.mcp_transport.service import (
+    handle_find_tools,
+    handle_tools_call,
+    handle_tools_list,
+    handle_tools_list_smart,
+    iter_tools_list,
+)
 
 
 def _user_all() -> AuthenticatedUser:
@@ -65,9 +71,9 @@ async def test_tools_call_outside_scope_raises_tool_not_allowed():
         scope=SimpleNamespace(value="docs"),
     )
 
-    with patch("src.mcp_transport.service.get_all_tools_cached", new_callable=AsyncMock) as mock_all_tools:
+    with patch("src.mcp_transport.service.get_tools_by_name_cached", new_callable=AsyncMock) as mock_tools_by_name:
         with patch("src.mcp_transport.service.log_denied_tool_invocation", new_callable=AsyncMock):
-            mock_all_tools.return_value = [scoped_mismatch_tool]
+            mock_tools_by_name.return_value = {"document_generate": scoped_mismatch_tool}
             with pytest.raises(ToolNotAllowedError):
                 await handle_tools_call(
                     db=db,
@@ -84,9 +90,9 @@ async def test_tools_call_not_found_logs_denied_reason():
     db = AsyncMock()
     client = AsyncMock()
 
-    with patch("src.mcp_transport.service.get_all_tools_cached", new_callable=AsyncMock) as mock_all_tools:
+    with patch("src.mcp_transport.service.get_tools_by_name_cached", new_callable=AsyncMock) as mock_tools_by_name:
         with patch("src.mcp_transport.service.log_denied_tool_invocation", new_callable=AsyncMock) as mock_log_denied:
-            mock_all_tools.return_value = []
+            mock_tools_by_name.return_value = {}
             result = await handle_tools_call(
                 db=db,
                 user=_user_all(),
@@ -122,10 +128,10 @@ async def test_tools_call_in_scope_invokes_gateway():
         result={"answer": "42"},
     )
 
-    with patch("src.mcp_transport.service.get_all_tools_cached", new_callable=AsyncMock) as mock_all_tools:
+    with patch("src.mcp_transport.service.get_tools_by_name_cached", new_callable=AsyncMock) as mock_tools_by_name:
         with patch("src.mcp_transport.service.invoke_tool", new_callable=AsyncMock) as mock_invoke:
-            with patch("src.mcp_transport.service.increment_tool_usage", new_callable=AsyncMock) as mock_increment:
-                mock_all_tools.return_value = [scoped_tool]
+            with patch("src.mcp_transport.service.record_tool_usage") as mock_record:
+                mock_tools_by_name.return_value = {scoped_tool.name: scoped_tool}
                 mock_invoke.return_value = gateway_response
 
                 result = await handle_tools_call(
@@ -138,5 +144,152 @@ async def test_tools_call_in_scope_invokes_gateway():
                 )
 
     assert result.isError is False
-    assert '"answer": "42"' in result.content[0].text
-    mock_increment.assert_awaited_once_with(db, 7)
+    assert result.content[0].text == '{"answer":"42"}'
+    mock_record.assert_called_once_with(7)
+
+
+@pytest.mark.asyncio
+async def test_find_tools_keyword_fallback_ranks_matches():
+    db = AsyncMock()
+    tools = [
+        SimpleNamespace(name="read_file", description="Read a file", input_schema=None,
+                        required_roles=None, categories=["file"]),
+        SimpleNamespace(name="exact_calculate", description="Add or multiply numbers",
+                        input_schema=None, required_roles=None, categories=["math"]),
+        SimpleNamespace(name="calculate_stats", description="Statistics", input_schema=None,
+                        required_roles=None, categories=["math"]),
+    ]
+
+    with patch(
+        "src.mcp_transport.service.search_tools_semantic_cached",
+        new=AsyncMock(side_effect=RuntimeError("no embeddings")),
+    ), patch("src.mcp_transport.service.get_all_tools_cached", new=AsyncMock(return_value=tools)):
+        result = await handle_find_tools(db, _user_all(), "Calculate numbers", max_results=5)
+
+    assert [tool["name"] for tool in result["tools"]] == ["exact_calculate", "calculate_stats"]
+
+
+@pytest.mark.asyncio
+async def test_find_tools_skips_fallback_when_semantic_search_fills_results():
+    db = AsyncMock()
+    semantic_hits = [
+        SimpleNamespace(name="exact_calculate", description="Calc", input_schema=None, required_roles=None),
+        SimpleNamespace(name="exact_statistics", description="Stats", input_schema=None, required_roles=None),
+    ]
+
+    with patch(
+        "src.mcp_transport.service.search_tools_semantic_cached",
+        new=AsyncMock(return_value=semantic_hits),
+    ), patch("src.mcp_transport.service.get_all_tools_cached", new_callable=AsyncMock) as mock_all_tools:
+        result = await handle_find_tools(db, _user_all(), "calculate", max_results=2)
+
+    assert result["found"] == 2
+    mock_all_tools.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_tools_list_smart_rag_uses_prefetched_embedding():
+    db = AsyncMock()
+    rag_tool = SimpleNamespace(name="exact_calculate", description="Calc", input_schema=None)
+
+    with patch("src.mcp_transport.service.get_core_tools_cached", new=AsyncMock(return_value=[])), \
+         patch("src.mcp_transport.service.generate_embedding", new=AsyncMock(return_value=[0.5])) as mock_embed, \
+         patch(
+             "src.mcp_transport.service.search_tools_by_embedding_cached",
+             new=AsyncMock(return_value=[rag_tool]),
+         ) as mock_search:
+        result = await handle_tools_list_smart(db, _user_all(), context="do math", strategy="rag")
+
+    mock_embed.assert_awaited_once_with("do math")
+    assert mock_search.await_args.args[1] == [0.5]
+    assert [tool.name for tool in result.tools] == ["find_tools", "call_tool", "exact_calculate"]
+
+
+@pytest.mark.asyncio
+async def test_iter_tools_list_yields_visible_tools_lazily():
+    db = AsyncMock()
+    tools = [
+        SimpleNamespace(name="exact_calculate", description="Calc", input_schema=None, required_roles=None),
+        SimpleNamespace(name="exact_statistics", description="Stats", input_schema=None, required_roles=None),
+    ]
+
+    with patch("src.mcp_transport.service.get_tools_by_scope_cached", new=AsyncMock(return_value=tools)):
+        stream = iter_tools_list(db, _user_limited(), scope="calculator")
+        first = await stream.__anext__()
+        assert first.name == "exact_calculate"
+        assert [tool.name async for tool in stream] == []
+
+
+@pytest.mark.asyncio
+async def test_tools_list_smart_all_filters_cached_tools_in_memory():
+    db = AsyncMock()
+    tools = [
+        SimpleNamespace(name="exact_calculate", description="Calc",
+                        input_schema={"type": "object", "properties": {"x": {}}}, required_roles=None),
+        SimpleNamespace(name="exact_statistics", description="Stats", input_schema=None, required_roles=None),
+    ]
+
+    with patch("src.mcp_transport.service.get_core_tools_cached", new=AsyncMock(return_value=[])), \
+         patch("src.mcp_transport.service.get_all_tools_cached", new=AsyncMock(return_value=tools)):
+        result = await handle_tools_list_smart(db, _user_limited(), strategy="all")
+
+    listed = {tool.name: tool for tool in result.tools}
+    assert set(listed) == {"find_tools", "call_tool", "exact_calculate"}
+    assert listed["exact_calculate"].inputSchema == {"type": "object", "properties": {"x": {}}}
+
+
+@pytest.mark.asyncio
+async def test_tools_list_smart_rule_dedupes_and_caps_category_tools():
+    db = AsyncMock()
+    core = [SimpleNamespace(name="core_a", description="", input_schema=None)]
+    category = [
+        SimpleNamespace(name=name, description="", input_schema=None)
+        for name in ("core_a", "cat_b", "cat_c", "cat_d")
+    ]
+
+    with patch("src.mcp_transport.service.get_core_tools_cached", new=AsyncMock(return_value=core)), \
+         patch("src.mcp_transport.service.get_tools_by_categories", new=AsyncMock(return_value=category)):
+        result = await handle_tools_list_smart(
+            db, _user_all(), context="calculate the sum", strategy="rule", max_tools=3
+        )
+
+    names = [tool.name for tool in result.tools]
+    assert names == ["find_tools", "call_tool", "core_a", "cat_b", "cat_c"]
+
+
+
+@pytest.mark.asyncio
+async def test_tools_list_smart_hybrid_skips_embedding_when_categories_suffice():
+    db = AsyncMock()
+    category = [
+        SimpleNamespace(name=f"cat_{i}", description="", input_schema=None) for i in range(10)
+    ]
+
+    with patch("src.mcp_transport.service.get_core_tools_cached", new=AsyncMock(return_value=[])), \
+         patch("src.mcp_transport.service.get_tools_by_categories", new=AsyncMock(return_value=category)), \
+         patch("src.mcp_transport.service.generate_embedding", new=AsyncMock()) as mock_embed:
+        result = await handle_tools_list_smart(
+            db, _user_all(), context="calculate the sum", strategy="hybrid"
+        )
+
+    mock_embed.assert_not_called()
+    assert len(result.tools) == 12
+
+def test_tool_payloads_are_memoized_per_tool_snapshot():
+    from src.mcp_transport.service import _to_mcp_tool, _tool_discovery_payload, _tool_views
+
+    tool = SimpleNamespace(name="exact_calculate", description="Calc", input_schema=None)
+    snapshot = [tool]
+    _tool_views(snapshot)
+
+    assert _to_mcp_tool(tool) is _to_mcp_tool(tool)
+    payload = _tool_discovery_payload(tool)
+    assert payload is _tool_discovery_payload(tool)
+    assert payload["name"] == "exact_calculate"
+    assert payload["inputSchema"]["type"] == "object"
+    assert "_mcp_tool" not in vars(tool)
+
+    # A new snapshot list rebuilds the payloads instead of reusing stale ones.
+    refreshed = SimpleNamespace(name="exact_calculate", description="Calc v2", input_schema=None)
+    _tool_views([refreshed])
+    assert _tool_discovery_payload(refreshed)["description"] == "Calc v2"
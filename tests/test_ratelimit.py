@@ -4,14 +4,18 @@ import pytest
 import time
 from unittest.mock import patch
 
+from pydantic import ValidationError
+
 from src.ratelimit.limiter import (
     RateLimitConfig,
     TokenBucket,
     RateLimiter,
     check_rate_limit,
     get_rate_limiter,
+    BUCKET_SHARDS,
 )
 from src.ratelimit.exceptions import RateLimitExceededError
+from src.ratelimit.redis_backend import RedisRateLimiter
 
 
 class TestRateLimitConfig:
@@ -36,6 +40,14 @@ class TestRateLimitConfig:
         
         assert config.requests_per_minute == 500
         assert config.burst_size == 1000
+    
+    def test_config_is_immutable(self):
+        """Test that a shared config cannot be changed after construction."""
+        config = RateLimitConfig(requests_per_minute=60)
+        
+        with pytest.raises(ValidationError):
+            config.requests_per_minute = 120
+        assert config.tokens_per_second == 1.0
 
 
 class TestTokenBucket:
@@ -90,13 +102,52 @@ class TestTokenBucket:
             bucket.consume(1)
         
         # Wait a bit for refill (simulate with time patch)
-        original_time = time.time
-        with patch("src.ratelimit.limiter.time.time", return_value=original_time() + 1):
+        original_time = time.monotonic_ns
+        with patch("src.ratelimit.limiter.time.monotonic_ns", return_value=original_time() + 1_000_000_000):
             result = bucket.consume(1)
         
         # Should have refilled some tokens
         # With 10 tokens/sec, after 1 second we should have ~10 tokens
         assert result.allowed
+    
+    def test_polling_faster_than_refill_step_still_refills(self):
+        """Checks closer together than one milli-token still accumulate refill."""
+        config = RateLimitConfig(burst_size=1, requests_per_minute=60)  # 1 milli-token/ms
+        bucket = TokenBucket(config)
+        bucket.consume(1)
+        
+        now_ns = bucket.last_update_ns
+        allowed = 0
+        # Poll every 0.5 ms for just over 3 seconds.
+        for _ in range(6010):
+            now_ns += 500_000
+            with patch("src.ratelimit.limiter.time.monotonic_ns", return_value=now_ns):
+                allowed += bucket.consume(1).allowed
+        
+        assert allowed == 3
+    
+    def test_reset_at_is_wall_clock_plus_window(self):
+        """reset_at is a Unix timestamp one window ahead, refreshed each second."""
+        bucket = TokenBucket(RateLimitConfig())
+        
+        with patch("src.ratelimit.limiter.time.time", return_value=1000.5):
+            first = bucket.consume(1)
+        assert first.reset_at == 1060
+        
+        with patch("src.ratelimit.limiter.time.time", return_value=1001.5), \
+             patch("src.ratelimit.limiter.time.monotonic_ns", return_value=bucket.last_update_ns + 2_000_000_000):
+            assert bucket.consume(1).reset_at == 1061
+    
+    def test_wall_clock_step_does_not_refill(self):
+        """Jumps in wall-clock time leave the bucket untouched."""
+        config = RateLimitConfig(burst_size=1, requests_per_minute=60)
+        bucket = TokenBucket(config)
+        bucket.consume(1)
+        
+        with patch("src.ratelimit.limiter.time.time", return_value=time.time() + 3600):
+            result = bucket.consume(1)
+        
+        assert not result.allowed
 
 
 class TestRateLimiter:
@@ -131,30 +182,290 @@ class TestRateLimiter:
         assert not result.allowed
 
 
+class TestRateLimiterConcurrency:
+    """Tests for concurrent checks on the multi-key limiter."""
+    
+    def test_concurrent_first_checks_share_one_bucket(self):
+        """Threads racing on a new key all debit the same bucket."""
+        import threading
+        
+        limiter = RateLimiter(RateLimitConfig(requests_per_minute=1, burst_size=50))
+        results = []
+        
+        def worker():
+            for _ in range(10):
+                results.append(limiter.check("shared").allowed)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        
+        assert sum(results) == 50
+    
+    def test_cleanup_drops_only_stale_buckets(self):
+        """Periodic sweep removes idle buckets and keeps active ones."""
+        limiter = RateLimiter()
+        limiter.check("idle")
+        limiter.check("active")
+        limiter._shard("idle")["idle"].last_update_ns -= 3600 * 1_000_000_000
+        
+        limiter.check("active")
+        assert "idle" in limiter._shard("idle")  # checks never sweep
+        
+        limiter._cleanup_old_buckets()
+        
+        assert "idle" not in limiter._shard("idle")
+        assert "active" in limiter._shard("active")
+    
+    def test_swept_buckets_are_reused_for_new_keys(self):
+        """New keys take a reset bucket from the pool instead of allocating."""
+        limiter = RateLimiter(RateLimitConfig(burst_size=5))
+        for _ in range(5):
+            limiter.check("idle")
+        stale = limiter._shard("idle")["idle"]
+        stale.last_update_ns -= 3600 * 1_000_000_000
+        limiter._cleanup_old_buckets()
+        
+        strict = RateLimitConfig(requests_per_minute=60, burst_size=2)
+        result = limiter.check("fresh", strict)
+        
+        assert limiter._shard("fresh")["fresh"] is stale
+        assert result.allowed
+        assert result.remaining == 1
+        assert result.limit == 60
+    
+    @pytest.mark.asyncio
+    async def test_cleanup_loop_sweeps_in_background(self):
+        """The background loop removes idle buckets each interval."""
+        import asyncio
+        
+        limiter = RateLimiter()
+        limiter._cleanup_interval = 0
+        limiter.check("idle")
+        limiter._shard("idle")["idle"].last_update_ns -= 3600 * 1_000_000_000
+        
+        task = asyncio.create_task(limiter.cleanup_loop())
+        for _ in range(BUCKET_SHARDS * 2):
+            await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        
+        assert "idle" not in limiter._shard("idle")
+
+
 class TestCheckRateLimit:
     """Tests for the check_rate_limit function."""
     
-    def test_user_level_limit(self):
+    @pytest.mark.asyncio
+    async def test_user_level_limit(self):
         """Test per-user rate limiting."""
         # Reset the global limiter
         import src.ratelimit.limiter as limiter_module
         limiter_module._rate_limiter = None
         
-        result = check_rate_limit(user_id="test_user")
+        result = await check_rate_limit(user_id="test_user")
         
         assert result.allowed
         assert result.limit == 1000  # Generous default
     
-    def test_tool_level_limit(self):
+    @pytest.mark.asyncio
+    async def test_tool_level_limit(self):
         """Test per-tool rate limiting."""
         # Reset the global limiter
         import src.ratelimit.limiter as limiter_module
         limiter_module._rate_limiter = None
         
-        result = check_rate_limit(user_id="test_user", tool_name="read_file")
+        result = await check_rate_limit(user_id="test_user", tool_name="read_file")
         
         assert result.allowed
         assert result.limit == 100  # Tool-level limit
+    
+    @pytest.mark.asyncio
+    async def test_repeat_checks_reuse_key_strings(self):
+        """Keys for repeat users and tools are built once."""
+        import src.ratelimit.limiter as limiter_module
+        limiter_module._rate_limiter = None
+        
+        await check_rate_limit(user_id="repeat_user", tool_name="read_file")
+        limiter = get_rate_limiter()
+        tool_key = limiter_module._tool_key("repeat_user", "read_file")
+        
+        assert tool_key == "user:repeat_user:tool:read_file"
+        assert tool_key is limiter_module._tool_key("repeat_user", "read_file")
+        assert tool_key in limiter._shard(tool_key)
+
+
+class _FakeRedis:
+    """Minimal stand-in for an asyncio redis client with a registered script."""
+    
+    def __init__(self, reply=None, error: Exception | None = None):
+        self.reply = reply
+        self.error = error
+        self.calls = []
+        self.script_source = None
+    
+    def register_script(self, source):
+        self.script_source = source
+        
+        async def run(keys, args):
+            self.calls.append((keys, args))
+            if self.error:
+                raise self.error
+            return self.reply
+        
+        return run
+
+
+class TestRedisRateLimiter:
+    """Tests for the Redis-backed limiter."""
+    
+    @pytest.mark.asyncio
+    async def test_check_runs_token_bucket_script(self):
+        """Check sends one script call with the bucket key and config."""
+        client = _FakeRedis(reply=[1, 59, 0, 1000, 1])
+        limiter = RedisRateLimiter(client)
+        config = RateLimitConfig(requests_per_minute=60, burst_size=60)
+        
+        with patch("src.ratelimit.redis_backend.time.time", return_value=1000.0):
+            result = await limiter.check("user:u1", config)
+        
+        assert "HMGET" in client.script_source
+        keys, args = client.calls[0]
+        assert keys == ["rl:user:u1"]
+        assert args[0] == 1_000_000
+        assert args[1] == 60
+        assert args[2] == pytest.approx(0.001)
+        assert result.allowed
+        assert result.remaining == 59
+        assert result.limit == 60
+        assert result.reset_at == 1001
+    
+    @pytest.mark.asyncio
+    async def test_user_and_tool_share_one_round_trip(self):
+        """check_many sends every key in one script call and reports the decider."""
+        client = _FakeRedis(reply=[0, 0, 2000, 60_000, 2])
+        limiter = RedisRateLimiter(client)
+        tool_config = RateLimitConfig(requests_per_minute=100, burst_size=200)
+        
+        result = await limiter.check_many([("user:u1", None), ("user:u1:tool:t", tool_config)])
+        
+        assert len(client.calls) == 1
+        keys, args = client.calls[0]
+        assert keys == ["rl:user:u1", "rl:user:u1:tool:t"]
+        assert args[1:4] == [2000, pytest.approx(1000 / 60 / 1000), 1]
+        assert args[4:7] == [200, pytest.approx(100 / 60 / 1000), 1]
+        assert not result.allowed
+        assert result.limit == 100
+        assert result.retry_after == 2.0
+    
+    @pytest.mark.asyncio
+    async def test_denied_reports_retry_after_seconds(self):
+        """Denied checks convert the script's retry delay to seconds."""
+        limiter = RedisRateLimiter(_FakeRedis(reply=[0, 0, 1500, 1500, 1]))
+        
+        result = await limiter.check("user:u1")
+        
+        assert not result.allowed
+        assert result.retry_after == 1.5
+    
+    @pytest.mark.asyncio
+    async def test_empty_bucket_short_circuits_until_retry_time(self):
+        """Rejected keys are refused locally until their retry deadline."""
+        client = _FakeRedis(reply=[0, 0, 1500, 3000, 1])
+        limiter = RedisRateLimiter(client)
+        
+        with patch("src.ratelimit.redis_backend.time.time", return_value=1000.0):
+            await limiter.check("user:u1")
+            result = await limiter.check("user:u1")
+        assert len(client.calls) == 1
+        assert not result.allowed
+        assert result.retry_after == pytest.approx(1.5)
+        assert result.reset_at == 1003
+        
+        client.reply = [1, 0, 0, 1000, 1]
+        with patch("src.ratelimit.redis_backend.time.time", return_value=1001.6):
+            assert (await limiter.check("user:u1")).allowed
+        assert len(client.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_zero_retry_denial_not_cached(self):
+        """A denial with no retry delay always goes back to Redis."""
+        client = _FakeRedis(reply=[0, 0, 0, 0, 1])
+        limiter = RedisRateLimiter(client, algorithm="sliding_window")
+
+        await limiter.check("user:u1")
+        await limiter.check("user:u1")
+
+        assert len(client.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_block_cache_is_keyed_by_limits(self):
+        """A key blocked under one config is still checked under another."""
+        client = _FakeRedis(reply=[0, 0, 1500, 1500, 1])
+        limiter = RedisRateLimiter(client)
+
+        await limiter.check("user:u1", RateLimitConfig(requests_per_minute=10, burst_size=10))
+        client.reply = [1, 99, 0, 600, 1]
+        result = await limiter.check(
+            "user:u1", RateLimitConfig(requests_per_minute=100, burst_size=100)
+        )
+
+        assert result.allowed
+        assert len(client.calls) == 2
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_to_memory_when_redis_unreachable(self):
+        """Connection errors fall back to the in-process limiter."""
+        limiter = RedisRateLimiter(_FakeRedis(error=ConnectionError("down")))
+        
+        result = await limiter.check("user:u1")
+        
+        assert result.allowed
+        assert result.limit == 1000
+    
+    @pytest.mark.asyncio
+    async def test_sliding_window_sends_window_log_args(self):
+        """Sliding window runs its own script with limit and window length."""
+        client = _FakeRedis(reply=[1, 99, 0, 60_000, 1])
+        limiter = RedisRateLimiter(client, algorithm="sliding_window")
+        config = RateLimitConfig(requests_per_minute=100, burst_size=200)
+        
+        result = await limiter.check("user:u1", config)
+        
+        assert "ZREMRANGEBYSCORE" in client.script_source
+        keys, args = client.calls[0]
+        assert keys == ["rl:user:u1"]
+        assert args[1].startswith(f"{args[0]}:")
+        assert args[2:] == [100, 60_000]
+        assert result.allowed
+        assert result.remaining == 99
+    
+    def test_unknown_algorithm_rejected(self):
+        """Unknown algorithms fail fast."""
+        with pytest.raises(ValueError):
+            RedisRateLimiter(_FakeRedis(), algorithm="fixed_window")
+    
+    def test_global_limiter_uses_redis_when_configured(self):
+        """RATE_LIMIT_REDIS_URL selects the Redis limiter."""
+        import src.ratelimit.limiter as limiter_module
+        limiter_module._rate_limiter = None
+        sentinel = RedisRateLimiter(_FakeRedis(reply=[1, 0, 0, 0, 1]))
+        settings = limiter_module.get_settings().model_copy(
+            update={"RATE_LIMIT_REDIS_URL": "redis://localhost:6379/0"}
+        )
+        
+        try:
+            with patch.object(limiter_module, "get_settings", return_value=settings), \
+                 patch.object(RedisRateLimiter, "from_url", return_value=sentinel) as from_url:
+                assert get_rate_limiter() is sentinel
+            from_url.assert_called_once_with(
+                "redis://localhost:6379/0", algorithm="token_bucket"
+            )
+        finally:
+            limiter_module._rate_limiter = None
 
 
 class TestRateLimitExceededError:
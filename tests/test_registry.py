@@ -1,14 +1,21 @@
 """Unit tests for the tool registry module."""
 
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch
 from pydantic import ValidationError
 
-from src.registry.models import Tool, RiskLevel, ToolScope
+from src.registry.models import Tool, RiskLevel, ToolScope, parse_risk_level
 from src.registry.schemas import ToolResponse, ToolListResponse
 from src.registry.service import (
+    get_all_tools_cached,
     get_tools_for_user,
+    get_tools_for_user_json,
     get_tools_by_scope_cached,
+    get_tools_by_name_cached,
+    get_core_tools_cached,
+    search_tools_by_embedding_cached,
+    search_tools_semantic_cached,
     clear_tool_cache,
     _tool_cache,
     sync_tools_from_config,
@@ -30,6 +37,12 @@ class TestRiskLevel:
         """Test creating RiskLevel from string."""
         assert RiskLevel("low") == RiskLevel.low
         assert RiskLevel("high") == RiskLevel.high
+    
+    def test_parse_risk_level(self):
+        """Test parsing a risk level string via the lookup table."""
+        assert parse_risk_level("medium") is RiskLevel.medium
+        with pytest.raises(ValueError):
+            parse_risk_level("critical")
 
 
 class TestToolModel:
@@ -48,6 +61,16 @@ class TestToolModel:
         
         assert "test_tool" in repr(tool)
         assert "medium" in repr(tool)
+    
+    def test_embedding_reads_back_as_floats(self):
+        """Test that halfvec embeddings are returned as plain float lists."""
+        from src.registry.models import PGVECTOR_AVAILABLE
+        if not PGVECTOR_AVAILABLE:
+            pytest.skip("pgvector not installed")
+        
+        process = Tool.__table__.c.embedding.type.result_processor(None, None)
+        assert process("[1,0.5,-2]") == [1.0, 0.5, -2.0]
+        assert process(None) is None
 
 
 class TestToolSchemas:
@@ -125,7 +148,7 @@ class TestToolFiltering:
         """Test that viewers only get their allowed tools."""
         clear_tool_cache()
         
-        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+        with patch("src.registry.service.get_all_active_tool_rows", new_callable=AsyncMock) as mock_get:
             mock_get.return_value = mock_tools
             
             db = AsyncMock()
@@ -141,7 +164,7 @@ class TestToolFiltering:
         """Test that admins with wildcard access get all tools."""
         clear_tool_cache()
         
-        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+        with patch("src.registry.service.get_all_active_tool_rows", new_callable=AsyncMock) as mock_get:
             mock_get.return_value = mock_tools
             
             db = AsyncMock()
@@ -159,7 +182,7 @@ class TestToolFiltering:
         developer_user.allowed_tools.add("admin_tool")
         clear_tool_cache()
         
-        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+        with patch("src.registry.service.get_all_active_tool_rows", new_callable=AsyncMock) as mock_get:
             mock_get.return_value = mock_tools
             
             db = AsyncMock()
@@ -189,7 +212,7 @@ class TestToolCache:
         claims = UserClaims(user_id="u1", roles=["viewer"])
         user = AuthenticatedUser(claims=claims, allowed_tools={"cached_tool"})
         
-        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+        with patch("src.registry.service.get_all_active_tool_rows", new_callable=AsyncMock) as mock_get:
             mock_get.return_value = mock_tools
             
             db = AsyncMock()
@@ -200,9 +223,120 @@ class TestToolCache:
             # Second call should use cache
             result2 = await get_tools_for_user(db, user)
             
-            # get_all_active_tools should only be called once
+            # get_all_active_tool_rows should only be called once
             assert mock_get.call_count == 1
             assert result1.count == result2.count
+            # The session is released once the tools are in memory
+            db.close.assert_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_tool_responses_are_reused(self):
+        """Test that cached ToolResponse objects are shared across requests."""
+        clear_tool_cache()
+        
+        mock_tools = [
+            Tool(id=1, name="cached_tool", description="Test", backend_url="http://x",
+                 scope=ToolScope.calculator, risk_level=RiskLevel.low, is_active=True, required_roles=None)
+        ]
+        user = AuthenticatedUser(claims=UserClaims(user_id="u1"), allowed_tools={"*"})
+        
+        with patch("src.registry.service.get_all_active_tool_rows", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = mock_tools
+            
+            db = AsyncMock()
+            result1 = await get_tools_for_user(db, user)
+            result2 = await get_tools_for_user(db, user)
+        
+        assert result1.tools[0] is result2.tools[0]
+        assert result1.tools[0].risk_level == "low"
+    
+    @pytest.mark.asyncio
+    async def test_explicit_tools_keep_registry_order(self):
+        """Test that name lookups for explicit allowed_tools keep registry order."""
+        clear_tool_cache()
+        
+        mock_tools = [
+            Tool(id=i, name=name, description="Test", backend_url="http://x",
+                 scope=ToolScope.calculator, risk_level=RiskLevel.low, is_active=True, required_roles=None)
+            for i, name in enumerate(["zeta", "alpha", "mid", "omega"], start=1)
+        ]
+        user = AuthenticatedUser(
+            claims=UserClaims(user_id="u1"),
+            allowed_tools={"omega", "zeta", "alpha", "missing"},
+        )
+        
+        with patch("src.registry.service.get_all_active_tool_rows", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = mock_tools
+            result = await get_tools_for_user(AsyncMock(), user)
+        
+        assert [t.name for t in result.tools] == ["zeta", "alpha", "omega"]
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_fetch_once(self):
+        """Test that concurrent cache misses share a single DB fetch."""
+        clear_tool_cache()
+        
+        async def slow_fetch(db):
+            await asyncio.sleep(0.01)
+            return []
+        
+        with patch("src.registry.service.get_all_active_tools", side_effect=slow_fetch) as mock_get:
+            results = await asyncio.gather(*(get_all_tools_cached(AsyncMock()) for _ in range(5)))
+        
+        assert mock_get.call_count == 1
+        assert all(result is results[0] for result in results)
+    
+    @pytest.mark.asyncio
+    async def test_stale_tools_served_while_refreshing(self):
+        """Test that an expired-but-stale snapshot is returned and refreshed in the background."""
+        from src.registry import service
+        
+        clear_tool_cache()
+        stale = [Tool(id=1, name="old", description="", backend_url="http://x")]
+        fresh = [Tool(id=1, name="new", description="", backend_url="http://x")]
+        now = service.time.monotonic()
+        service._all_tools_snapshot = (now - 1, now + 60, stale)
+        
+        session = AsyncMock()
+        session.__aenter__.return_value = session
+        with patch("src.registry.service.AsyncSessionLocal", return_value=session), \
+             patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = fresh
+            
+            assert await get_all_tools_cached(AsyncMock()) is stale
+            await service._all_tools_refresh
+            
+            mock_get.assert_awaited_once_with(session)
+            assert await get_all_tools_cached(AsyncMock()) is fresh
+        clear_tool_cache()
+    
+    @pytest.mark.asyncio
+    async def test_user_view_json_is_cached_per_principal(self):
+        """Test that serialized tool lists are reused for the same permissions."""
+        clear_tool_cache()
+        
+        mock_tools = [
+            Tool(id=1, name="open_tool", description="Open", backend_url="http://x",
+                 scope=ToolScope.calculator, risk_level=RiskLevel.low, is_active=True, required_roles=None),
+            Tool(id=2, name="admin_tool", description="Admin", backend_url="http://y",
+                 scope=ToolScope.git, risk_level=RiskLevel.high, is_active=True, required_roles=["admin"]),
+        ]
+        viewer = AuthenticatedUser(claims=UserClaims(user_id="u1", roles=["viewer"]), allowed_tools={"*"})
+        other_viewer = AuthenticatedUser(claims=UserClaims(user_id="u2", roles=["viewer"]), allowed_tools={"*"})
+        admin = AuthenticatedUser(claims=UserClaims(user_id="u3", roles=["admin"]), allowed_tools={"*"})
+        
+        with patch("src.registry.service.get_all_active_tool_rows", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = mock_tools
+            
+            body = await get_tools_for_user_json(AsyncMock(), viewer)
+            assert await get_tools_for_user_json(AsyncMock(), other_viewer) is body
+            assert body == (await get_tools_for_user(AsyncMock(), viewer)).model_dump_json().encode()
+            
+            admin_body = await get_tools_for_user_json(AsyncMock(), admin)
+            assert ToolListResponse.model_validate_json(admin_body).count == 2
+            
+            clear_tool_cache()
+            assert await get_tools_for_user_json(AsyncMock(), viewer) is not body
     
     def test_cache_clear(self):
         """Test that clear_tool_cache actually clears the cache."""
@@ -232,7 +366,7 @@ class TestToolCache:
             )
         ]
 
-        with patch("src.registry.service.get_active_tools_by_scope", new_callable=AsyncMock) as mock_get:
+        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
             mock_get.return_value = mock_tools
             db = AsyncMock()
 
@@ -240,12 +374,202 @@ class TestToolCache:
             result2 = await get_tools_by_scope_cached(db, "calculator")
 
             assert mock_get.call_count == 1
-            assert result1 == result2
+            assert result1 == result2 == mock_tools
+
+    @pytest.mark.asyncio
+    async def test_tools_by_name_index_is_cached(self):
+        """Name index is built once from the active tool list."""
+        clear_tool_cache()
+        tools = [
+            Tool(id=1, name="a", description="A", backend_url="http://x"),
+            Tool(id=2, name="b", description="B", backend_url="http://x"),
+        ]
+
+        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = tools
+            db = AsyncMock()
+
+            index1 = await get_tools_by_name_cached(db)
+            index2 = await get_tools_by_name_cached(db)
+
+            assert mock_get.call_count == 1
+            assert index1 is index2
+            assert index1["b"] is tools[1]
+
+    @pytest.mark.asyncio
+    async def test_tools_by_name_index_follows_snapshot_refresh(self):
+        """A background snapshot refresh is reflected in the name index."""
+        from src.registry import service
+        
+        clear_tool_cache()
+        a = Tool(id=1, name="a", description="A", backend_url="http://x")
+        b = Tool(id=2, name="b", description="B", backend_url="http://x")
+        now = service.time.monotonic()
+        service._all_tools_snapshot = (now - 1, now + 60, [a])
+        
+        session = AsyncMock()
+        session.__aenter__.return_value = session
+        with patch("src.registry.service.AsyncSessionLocal", return_value=session), \
+             patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = [a, b]
+            
+            assert list(await get_tools_by_name_cached(AsyncMock())) == ["a"]
+            await service._all_tools_refresh
+            
+            assert [tool.name for tool in await get_all_tools_cached(AsyncMock())] == ["a", "b"]
+            assert list(await get_tools_by_name_cached(AsyncMock())) == ["a", "b"]
+        clear_tool_cache()
+
+    @pytest.mark.asyncio
+    async def test_core_tools_cache_is_used(self):
+        """Core tool lookups are served from cache until it is cleared."""
+        clear_tool_cache()
+        core = Tool(id=1, name="core", description="Core", backend_url="http://x", categories=["core"])
+        other = Tool(id=2, name="other", description="Other", backend_url="http://x", categories=["math"])
+
+        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = [core, other]
+            db = AsyncMock()
+
+            assert await get_core_tools_cached(db) == [core]
+            await get_core_tools_cached(db)
+            assert mock_get.call_count == 1
+
+            clear_tool_cache()
+            await get_core_tools_cached(db)
+            assert mock_get.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_in_memory_embedding_search_ranks_and_thresholds(self):
+        """In-process vector search mirrors the pgvector query semantics."""
+        pytest.importorskip("numpy")
+        clear_tool_cache()
+        tools = [
+            Tool(id=1, name="near", description="", backend_url="http://x", embedding=[1.0, 0.1]),
+            Tool(id=2, name="exact", description="", backend_url="http://x", embedding=[2.0, 0.0]),
+            Tool(id=3, name="far", description="", backend_url="http://x", embedding=[0.0, 1.0]),
+            Tool(id=4, name="unindexed", description="", backend_url="http://x", embedding=None),
+        ]
+
+        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = tools
+            db = AsyncMock()
+
+            result = await search_tools_by_embedding_cached(db, [1.0, 0.0], top_k=5, threshold=0.5)
+            assert [tool.name for tool in result] == ["exact", "near"]
+
+            result = await search_tools_by_embedding_cached(db, [1.0, 0.0], top_k=1, threshold=0.5)
+            assert [tool.name for tool in result] == ["exact"]
+            assert mock_get.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_embedding_matrix_survives_refetch_of_unchanged_tools(self):
+        """Expired tool lists are refetched, but the matrix is rebuilt only on change."""
+        pytest.importorskip("numpy")
+        from src.registry import service
+
+        clear_tool_cache()
+
+        def fetch():
+            return [Tool(id=1, name="add", description="", backend_url="http://x", embedding=[1.0, 0.0])]
+
+        with patch("src.registry.service.get_all_active_tools", new_callable=AsyncMock) as mock_get:
+            mock_get.side_effect = lambda db: fetch()
+            db = AsyncMock()
+
+            await search_tools_by_embedding_cached(db, [1.0, 0.0], threshold=0.5)
+            matrix = service._tool_embedding_index.matrix
+
+            service._all_tools_snapshot = None
+            result = await search_tools_by_embedding_cached(db, [1.0, 0.0], threshold=0.5)
+            assert mock_get.call_count == 2
+            assert service._tool_embedding_index.matrix is matrix
+            assert result[0] is service._tool_embedding_index.source[0]
+
+            service._all_tools_snapshot = None
+            mock_get.side_effect = lambda db: fetch() + [
+                Tool(id=2, name="sub", description="", backend_url="http://x", embedding=[0.0, 1.0])
+            ]
+            await search_tools_by_embedding_cached(db, [1.0, 0.0], threshold=0.5)
+            assert service._tool_embedding_index.matrix is not matrix
+
+    @pytest.mark.asyncio
+    async def test_semantic_search_reuses_normalized_query(self):
+        """Repeated queries skip both embedding and vector search."""
+        clear_tool_cache()
+        tools = [Tool(id=1, name="add", description="Add", backend_url="http://x")]
+
+        with patch("src.registry.service.generate_embedding", new_callable=AsyncMock) as mock_embed, \
+             patch("src.registry.service.search_tools_by_embedding_cached", new_callable=AsyncMock) as mock_search:
+            mock_embed.return_value = [1.0, 0.0]
+            mock_search.return_value = tools
+            db = AsyncMock()
+
+            result1 = await search_tools_semantic_cached(db, "Add numbers", top_k=5)
+            result2 = await search_tools_semantic_cached(db, "  add   NUMBERS ", top_k=5)
+
+            assert result1 == result2 == tools
+            mock_embed.assert_awaited_once()
+            mock_search.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_semantic_search_reuses_similar_query(self):
+        """Paraphrases with near-identical embeddings skip the vector search."""
+        pytest.importorskip("numpy")
+        clear_tool_cache()
+        tools = [Tool(id=1, name="add", description="Add", backend_url="http://x")]
+
+        with patch("src.registry.service.generate_embedding", new_callable=AsyncMock) as mock_embed, \
+             patch("src.registry.service.search_tools_by_embedding_cached", new_callable=AsyncMock) as mock_search:
+            mock_embed.side_effect = [[1.0, 0.0], [0.99, 0.05], [0.0, 1.0]]
+            mock_search.return_value = tools
+            db = AsyncMock()
+
+            await search_tools_semantic_cached(db, "add numbers", top_k=5)
+            await search_tools_semantic_cached(db, "sum two numbers", top_k=5)
+            assert mock_search.await_count == 1
+
+            await search_tools_semantic_cached(db, "read a file", top_k=5)
+            assert mock_search.await_count == 2
 
 
+    def test_similar_query_index_is_bounded_and_expires(self):
+        """The paraphrase index overwrites its oldest row and ignores expired ones."""
+        np = pytest.importorskip("numpy")
+        from src.registry.service import _SimilarQueryIndex
+
+        index = _SimilarQueryIndex(capacity=2, ttl=300)
+        first, second, third = (np.eye(3, dtype=np.float32)[i] for i in range(3))
+        with patch("src.registry.service.time.monotonic", return_value=1000.0):
+            index.add(first, ["first"])
+            index.add(second, ["second"])
+            index.add(third, ["third"])
+            assert index.find(first) is None
+            assert index.find(third) == ["third"]
+        with patch("src.registry.service.time.monotonic", return_value=1301.0):
+            assert index.find(third) is None
+
 class TestToolSync:
     """Tests for syncing tool registry from config."""
 
+    def test_load_tool_registry_parses_shipped_config(self):
+        """The bundled tools.yaml loads and validates."""
+        from src.registry.config import load_tool_registry
+
+        config = load_tool_registry()
+
+        assert config.tools
+        assert {tool.scope for tool in config.tools} <= {"calculator", "git", "docs"}
+
+    def test_load_tool_registry_missing_or_empty_file(self, tmp_path):
+        """Missing and empty files give an empty registry."""
+        from src.registry.config import load_tool_registry
+
+        assert load_tool_registry(str(tmp_path / "missing.yaml")).tools == []
+        empty = tmp_path / "empty.yaml"
+        empty.write_text("")
+        assert load_tool_registry(str(empty)).tools == []
+
     @pytest.mark.asyncio
     async def test_sync_prunes_and_clears_cache(self):
         _tool_cache["stale_key"] = "stale"
@@ -263,16 +587,15 @@ class TestToolSync:
         )
 
         with patch("src.registry.service.load_tool_registry", return_value=config):
-            with patch("src.registry.service.get_tool_by_name", new_callable=AsyncMock) as mock_get:
-                mock_get.return_value = None
-                with patch("src.registry.service.create_tool", new_callable=AsyncMock) as mock_create:
-                    with patch("src.registry.service.deactivate_tools_not_in_list", new_callable=AsyncMock) as mock_prune:
-                        db = AsyncMock()
-                        await sync_tools_from_config(db)
+            with patch("src.registry.service.upsert_tools", new_callable=AsyncMock) as mock_upsert:
+                with patch("src.registry.service.deactivate_tools_not_in_list", new_callable=AsyncMock) as mock_prune:
+                    db = AsyncMock()
+                    await sync_tools_from_config(db)
 
-                        mock_create.assert_awaited_once()
-                        mock_prune.assert_awaited_once_with(db, {"tool_a"})
-                        assert len(_tool_cache) == 0
+                    mock_upsert.assert_awaited_once()
+                    mock_prune.assert_awaited_once_with(db, {"tool_a"})
+                    db.commit.assert_awaited_once()
+                    assert len(_tool_cache) == 0
 
     @pytest.mark.asyncio
     async def test_sync_empty_config_clears_cache_only(self):
@@ -288,7 +611,7 @@ class TestToolSync:
                 assert len(_tool_cache) == 0
 
     @pytest.mark.asyncio
-    async def test_sync_create_passes_input_schema(self):
+    async def test_sync_upsert_rows_carry_config(self):
         config = ToolRegistryConfig(
             tools=[
                 ToolConfig(
@@ -296,7 +619,7 @@ class TestToolSync:
                     description="Deterministic document generation.",
                     backend_url="http://document-generator:8000/mcp",
                     scope="docs",
-                    risk_level="low",
+                    risk_level="medium",
                     input_schema={
                         "type": "object",
                         "properties": {
@@ -310,102 +633,55 @@ class TestToolSync:
         )
 
         with patch("src.registry.service.load_tool_registry", return_value=config):
-            with patch("src.registry.service.get_tool_by_name", new_callable=AsyncMock) as mock_get:
-                mock_get.return_value = None
-                with patch("src.registry.service.create_tool", new_callable=AsyncMock) as mock_create:
-                    with patch("src.registry.service.deactivate_tools_not_in_list", new_callable=AsyncMock):
-                        db = AsyncMock()
-                        await sync_tools_from_config(db)
-
-                        _, kwargs = mock_create.await_args
-                        assert kwargs["name"] == "document_generate"
-                        assert kwargs["scope"] == "docs"
-                        assert kwargs["input_schema"]["properties"]["format"]["enum"] == ["docx", "pdf", "html"]
+            with patch("src.registry.service.upsert_tools", new_callable=AsyncMock) as mock_upsert:
+                with patch("src.registry.service.deactivate_tools_not_in_list", new_callable=AsyncMock):
+                    db = AsyncMock()
+                    await sync_tools_from_config(db)
+
+                    _, rows = mock_upsert.await_args.args
+                    assert len(rows) == 1
+                    assert rows[0]["name"] == "document_generate"
+                    assert rows[0]["scope"] is ToolScope.docs
+                    assert rows[0]["risk_level"] is RiskLevel.medium
+                    assert rows[0]["required_roles"] is None
+                    assert rows[0]["input_schema"]["properties"]["format"]["enum"] == ["docx", "pdf", "html"]
 
     @pytest.mark.asyncio
-    async def test_sync_updates_existing_input_schema(self):
-        existing = Tool(
-            id=1,
-            name="document_generate",
-            description="Old",
-            backend_url="http://document-generator:8000/mcp",
-            scope=ToolScope.docs,
-            risk_level=RiskLevel.low,
-            required_roles=None,
-            is_active=True,
-            input_schema={"type": "object", "properties": {}},
-        )
-        config = ToolRegistryConfig(
-            tools=[
-                ToolConfig(
-                    name="document_generate",
-                    description="New",
-                    backend_url="http://document-generator:8000/mcp",
-                    scope="docs",
-                    risk_level="low",
-                    input_schema={
-                        "type": "object",
-                        "properties": {
-                            "content": {"type": "string"},
-                            "format": {"type": "string", "enum": ["docx", "pdf", "html"]},
-                        },
-                        "required": ["content", "format"],
-                    },
-                )
-            ]
-        )
-
-        with patch("src.registry.service.load_tool_registry", return_value=config):
-            with patch("src.registry.service.get_tool_by_name", new_callable=AsyncMock) as mock_get:
-                mock_get.return_value = existing
-                with patch("src.registry.service.create_tool", new_callable=AsyncMock) as mock_create:
-                    with patch("src.registry.service.deactivate_tools_not_in_list", new_callable=AsyncMock):
-                        db = AsyncMock()
-                        await sync_tools_from_config(db)
-
-                        mock_create.assert_not_awaited()
-                        assert existing.description == "New"
-                        assert existing.input_schema["required"] == ["content", "format"]
-                        db.commit.assert_awaited()
-                        db.refresh.assert_awaited_with(existing)
+    async def test_upsert_only_rewrites_changed_rows(self):
+        from sqlalchemy.dialects import postgresql
+        from src.registry.repository import upsert_tools
+
+        db = AsyncMock()
+        await upsert_tools(db, [{
+            "name": "document_generate",
+            "description": "Doc generator",
+            "backend_url": "http://document-generator:8000/mcp",
+            "scope": ToolScope.docs,
+            "risk_level": RiskLevel.low,
+            "required_roles": None,
+            "is_active": True,
+            "input_schema": {"type": "object"},
+        }])
+
+        sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (name) DO UPDATE" in sql
+        assert "updated_at = now()" in sql
+        assert "tools.scope IS DISTINCT FROM excluded.scope" in sql
+        assert "CAST(tools.input_schema AS JSONB) IS DISTINCT FROM" in sql
+        db.commit.assert_not_awaited()
 
     @pytest.mark.asyncio
-    async def test_sync_updates_existing_scope(self):
-        existing = Tool(
-            id=1,
-            name="document_generate",
-            description="Doc generator",
-            backend_url="http://document-generator:8000/mcp",
-            scope=ToolScope.calculator,
-            risk_level=RiskLevel.low,
-            required_roles=None,
-            is_active=True,
-            input_schema={"type": "object"},
-        )
-        config = ToolRegistryConfig(
-            tools=[
-                ToolConfig(
-                    name="document_generate",
-                    description="Doc generator",
-                    backend_url="http://document-generator:8000/mcp",
-                    scope="docs",
-                    risk_level="low",
-                    input_schema={"type": "object"},
-                )
-            ]
-        )
+    async def test_deactivate_touches_only_active_rows(self):
+        from sqlalchemy.dialects import postgresql
+        from src.registry.repository import deactivate_tools_not_in_list
 
-        with patch("src.registry.service.load_tool_registry", return_value=config):
-            with patch("src.registry.service.get_tool_by_name", new_callable=AsyncMock) as mock_get:
-                mock_get.return_value = existing
-                with patch("src.registry.service.create_tool", new_callable=AsyncMock):
-                    with patch("src.registry.service.deactivate_tools_not_in_list", new_callable=AsyncMock):
-                        db = AsyncMock()
-                        await sync_tools_from_config(db)
+        db = AsyncMock()
+        await deactivate_tools_not_in_list(db, {"tool_b", "tool_a"})
 
-                        assert existing.scope == ToolScope.docs
-                        db.commit.assert_awaited()
-                        db.refresh.assert_awaited_with(existing)
+        compiled = db.execute.await_args.args[0].compile(dialect=postgresql.dialect())
+        assert "tools.is_active = true AND tools.name != ALL" in str(compiled)
+        assert compiled.params["param_1"] == ["tool_a", "tool_b"]
+        db.commit.assert_not_awaited()
 
     def test_tool_config_requires_scope(self):
         with pytest.raises(ValidationError):
@@ -415,3 +691,88 @@ class TestToolSync:
                 backend_url="http://a",
                 risk_level="low",
             )
+
+
+class TestEmbeddingBatcher:
+    """Tests for the embedding request batcher."""
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_encode_releases_waiters(self):
+        """Waiters are released even when the encode task is cancelled."""
+        import asyncio
+        from src.registry import embedding
+        
+        started = asyncio.Event()
+        
+        async def never_finishes(texts):
+            started.set()
+            await asyncio.Event().wait()
+        
+        batcher = embedding._EmbeddingBatcher(asyncio.get_running_loop())
+        with patch.object(embedding, "batch_generate_embeddings", never_finishes):
+            waiter = asyncio.ensure_future(batcher.embed("query"))
+            await started.wait()
+            (task,) = batcher._tasks
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        
+        await asyncio.sleep(0)
+        assert not batcher._tasks
+
+
+class TestToolUsage:
+    """Tests for buffered tool usage counters."""
+    
+    @pytest.fixture(autouse=True)
+    def _empty_buffer(self):
+        from src.registry import usage
+        usage._usage_buffer.clear()
+        usage._buffered_calls = 0
+        yield
+        usage._usage_buffer.clear()
+        usage._buffered_calls = 0
+    
+    @pytest.mark.asyncio
+    async def test_flush_writes_buffered_counts_once(self):
+        """Recorded calls are written as one batch and the buffer is emptied."""
+        from src.registry import usage
+        
+        for tool_id in (5, 7, 5):
+            usage.record_tool_usage(tool_id)
+        
+        session = AsyncMock()
+        session.__aenter__.return_value = session
+        with patch("src.registry.usage.AsyncSessionLocal", return_value=session), \
+             patch("src.registry.usage.add_tool_usage", new_callable=AsyncMock) as mock_add:
+            await usage.flush_tool_usage()
+            await usage.flush_tool_usage()
+        
+        mock_add.assert_awaited_once_with(session, {5: 2, 7: 1})
+        assert not usage._usage_buffer
+    
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_counts(self):
+        """Counts survive a failed flush and are retried on the next one."""
+        from src.registry import usage
+        
+        usage.record_tool_usage(5)
+        with patch("src.registry.usage.AsyncSessionLocal", side_effect=OSError("db down")):
+            await usage.flush_tool_usage()
+        
+        assert usage._usage_buffer == {5: 1}
+        assert usage._buffered_calls == 1
+    
+    @pytest.mark.asyncio
+    async def test_threshold_triggers_flush(self):
+        """A full buffer is flushed without waiting for the interval."""
+        from src.registry import usage
+        
+        with patch.object(usage, "USAGE_FLUSH_THRESHOLD", 2), \
+             patch("src.registry.usage.flush_tool_usage", new_callable=AsyncMock) as mock_flush:
+            usage.record_tool_usage(5)
+            mock_flush.assert_not_called()
+            usage.record_tool_usage(5)
+            await usage._flush_task
+        
+        mock_flush.assert_awaited_once()
@@ -1,5 +1,6 @@
 """Test suite for Smart Routing features (filtering, embeddings, RAG search)."""
 
+import asyncio
 import os
 from pathlib import Path
 import pytest
@@ -11,12 +12,21 @@ from src.registry.filtering import (
     should_include_tool,
     CATEGORY_KEYWORDS
 )
-from src.registry.embedding import generate_embedding, batch_generate_embeddings
+from src.registry.embedding import (
+    generate_embedding,
+    batch_generate_embeddings,
+    clear_embedding_cache,
+    get_embedding_model,
+)
 from src.registry.repository import (
+    get_all_active_tools,
+    get_all_active_tool_rows,
     get_tools_by_categories,
+    get_tools_by_names,
     get_core_tools,
     search_tools_by_embedding,
-    increment_tool_usage
+    search_tools_prefiltered,
+    add_tool_usage
 )
 from src.registry.models import Tool, RiskLevel, ToolScope
 
@@ -96,6 +106,25 @@ class TestCategoryExtraction:
         """Test prompts that don't match any categories."""
         categories = extract_categories_from_prompt("Hello, how are you?")
         assert len(categories) == 0
+    
+    def test_repeated_and_long_prompts(self):
+        """Cached and uncached (long) prompts give the same answer."""
+        first = extract_categories_from_prompt("Read a file")
+        assert extract_categories_from_prompt("READ a file") is first
+        
+        long_prompt = "please " * 200 + "read a file and compute the sum"
+        assert extract_categories_from_prompt(long_prompt) == {"filesystem", "math"}
+    
+    def test_punctuation_does_not_hide_keywords(self):
+        """Plain and punctuated prompts tokenize to the same keywords."""
+        assert extract_categories_from_prompt("compute sum") == {"math"}
+        assert extract_categories_from_prompt("compute: sum?") == {"math"}
+        assert extract_categories_from_prompt("sum_total") == set()
+    
+    def test_shared_keyword_maps_to_every_category(self):
+        """A keyword listed under several categories matches all of them."""
+        assert extract_categories_from_prompt("delete it") == {"filesystem", "database"}
+        assert extract_categories_from_prompt("standard deviation") == {"math"}
 
 
 class TestToolFiltering:
@@ -125,6 +154,107 @@ class TestToolFiltering:
 class TestEmbeddingGeneration:
     """Tests for embedding generation."""
     
+    @pytest.fixture(autouse=True)
+    def _fresh_embedding_cache(self):
+        clear_embedding_cache()
+        yield
+        clear_embedding_cache()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_encode(self):
+        """Concurrent generate_embedding calls are batched into one encode."""
+        class _Matrix(list):
+            def tolist(self):
+                return [list(row) for row in self]
+
+        model = MagicMock()
+        model.encode.side_effect = lambda texts, **kwargs: _Matrix([float(len(t))] for t in texts)
+
+        with patch("src.registry.embedding.get_embedding_model", return_value=model):
+            results = await asyncio.gather(
+                generate_embedding("a"),
+                generate_embedding("bb"),
+                generate_embedding("ccc"),
+            )
+
+        assert results == [[1.0], [2.0], [3.0]]
+        model.encode.assert_called_once()
+        assert model.encode.call_args.args == (["a", "bb", "ccc"],)
+        assert model.encode.call_args.kwargs["convert_to_numpy"] is True
+        assert model.encode.call_args.kwargs["show_progress_bar"] is False
+    
+    @pytest.mark.asyncio
+    async def test_full_batch_fills_one_forward_pass(self):
+        """Coalesced batches are capped at the encoder's batch size."""
+        from src.registry.embedding import EMBEDDING_ENCODE_BATCH_SIZE
+
+        class _Matrix(list):
+            def tolist(self):
+                return [list(row) for row in self]
+
+        model = MagicMock()
+        model.encode.side_effect = lambda texts, **kwargs: _Matrix([0.0] for _ in texts)
+
+        with patch("src.registry.embedding.get_embedding_model", return_value=model):
+            await asyncio.gather(
+                *(generate_embedding(str(i)) for i in range(EMBEDDING_ENCODE_BATCH_SIZE + 1))
+            )
+
+        batch_sizes = [len(call.args[0]) for call in model.encode.call_args_list]
+        assert batch_sizes == [EMBEDDING_ENCODE_BATCH_SIZE, 1]
+        assert model.encode.call_args.kwargs["batch_size"] == EMBEDDING_ENCODE_BATCH_SIZE
+    
+    @pytest.mark.asyncio
+    async def test_encode_runs_on_dedicated_executor(self):
+        """Model inference runs on the embedding pool, not the default executor."""
+        import threading
+
+        class _Matrix(list):
+            def tolist(self):
+                return [list(row) for row in self]
+
+        threads = []
+        model = MagicMock()
+
+        def encode(texts, **kwargs):
+            threads.append(threading.current_thread().name)
+            return _Matrix([0.0] for _ in texts)
+
+        model.encode.side_effect = encode
+
+        with patch("src.registry.embedding.get_embedding_model", return_value=model):
+            await batch_generate_embeddings(["a"])
+
+        assert threads[0].startswith("embed")
+    
+    @pytest.mark.asyncio
+    async def test_repeated_texts_skip_the_model(self):
+        """Cached and duplicate texts are encoded once."""
+        class _Matrix(list):
+            def tolist(self):
+                return [list(row) for row in self]
+
+        model = MagicMock()
+        model.encode.side_effect = lambda texts, **kwargs: _Matrix([float(len(t))] for t in texts)
+
+        with patch("src.registry.embedding.get_embedding_model", return_value=model):
+            first = await batch_generate_embeddings(["a", "bb", "a"])
+            second = await batch_generate_embeddings(["bb", "ccc"])
+
+        assert first == [[1.0], [2.0], [1.0]]
+        assert second == [[2.0], [3.0]]
+        assert [call.args[0] for call in model.encode.call_args_list] == [["a", "bb"], ["ccc"]]
+    
+    def test_embedding_model_loaded_once(self):
+        """The model is loaded on first use and reused afterwards."""
+        model = MagicMock()
+        with patch("src.registry.embedding._embedding_model", None), \
+             patch("src.registry.embedding._load_embedding_model", return_value=model) as load:
+            assert get_embedding_model() is model
+            assert get_embedding_model() is model
+        
+        load.assert_called_once_with()
+    
     @pytest.mark.asyncio
     async def test_generate_embedding_shape(self):
         """Test that embeddings have correct dimensionality."""
@@ -211,6 +341,37 @@ class TestRepositoryFunctions:
         assert "VARCHAR(50)[]" in compiled
         assert "TEXT[]" not in compiled
     
+    @pytest.mark.asyncio
+    async def test_get_all_active_tools_streams_rows(self):
+        """Active tools are streamed in batches instead of buffered at once."""
+        tools = [
+            Tool(id=1, name="calc", description="Calculator", backend_url="http://x",
+                 scope=ToolScope.calculator, risk_level=RiskLevel.low, is_active=True)
+        ]
+        
+        async def stream():
+            for tool in tools:
+                yield tool
+        
+        db = AsyncMock()
+        db.stream_scalars.return_value = stream()
+        
+        assert await get_all_active_tools(db) == tools
+        stmt = db.stream_scalars.await_args.args[0]
+        assert stmt.get_execution_options()["yield_per"] == 500
+    
+    @pytest.mark.asyncio
+    async def test_get_all_active_tool_rows_skips_heavy_columns(self):
+        """The listing query selects only the columns a tool listing shows."""
+        db = AsyncMock()
+        db.execute.return_value = MagicMock()
+        
+        await get_all_active_tool_rows(db)
+        compiled = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "tools.required_roles" in compiled
+        assert "embedding" not in compiled
+        assert "input_schema" not in compiled
+    
     @pytest.mark.asyncio
     async def test_get_core_tools(self):
         """Test core tool retrieval."""
@@ -232,16 +393,81 @@ class TestRepositoryFunctions:
         assert "TEXT[]" not in compiled
     
     @pytest.mark.asyncio
-    async def test_increment_tool_usage(self):
-        """Test usage counter increment."""
+    async def test_get_tools_by_names(self):
+        """Test batched name lookup in a single query."""
         db = AsyncMock()
+        mock_result = MagicMock()
+        mock_result.scalars.return_value = [
+            Tool(id=1, name="calc", description="Calculator", backend_url="http://x",
+                 scope=ToolScope.calculator, risk_level=RiskLevel.low, is_active=True)
+        ]
+        db.execute.return_value = mock_result
+        
+        tools = await get_tools_by_names(db, ["calc", "missing"])
+        assert list(tools) == ["calc"]
+        db.execute.assert_awaited_once()
+        
+        assert await get_tools_by_names(db, []) == {}
+        db.execute.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_search_tools_by_embedding_orders_then_filters(self):
+        """Vector search orders by distance with LIMIT and filters afterwards."""
+        near = Tool(id=1, name="near", description="Near", backend_url="http://x",
+                    scope=ToolScope.calculator, risk_level=RiskLevel.low, is_active=True)
+        far = Tool(id=2, name="far", description="Far", backend_url="http://x",
+                   scope=ToolScope.calculator, risk_level=RiskLevel.low, is_active=True)
+        db = AsyncMock()
+        mock_result = MagicMock()
+        mock_result.all.return_value = [(near, 0.1), (far, 0.5)]
+        db.execute.side_effect = [MagicMock(), mock_result]
+        
+        tools = await search_tools_by_embedding(db, [0.0] * 384, top_k=50, threshold=0.7)
+        assert tools == [near]
+        
+        set_stmt, search_stmt = (call.args[0] for call in db.execute.await_args_list)
+        assert str(set_stmt) == "SET LOCAL hnsw.ef_search = 50"
+        compiled = str(search_stmt.compile(dialect=postgresql.dialect()))
+        assert "ORDER BY distance" in compiled
+        assert "CAST(%(param_1)s AS HALFVEC(384))" in compiled
+        where_clause = compiled.split("WHERE", 1)[1].split("ORDER BY", 1)[0]
+        assert "<=>" not in where_clause
+    
+    @pytest.mark.asyncio
+    async def test_search_tools_prefiltered(self):
+        """Category prefilter and vector ordering run as one query."""
+        db = AsyncMock()
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = []
+        db.execute.return_value = mock_result
+        
+        assert await search_tools_prefiltered(db, [], [0.0] * 384) == []
+        db.execute.assert_not_awaited()
+        
+        await search_tools_prefiltered(db, ["math"], [0.0] * 384, top_k=3)
+        compiled = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+        assert "tools.categories && CAST" in compiled
+        assert "ORDER BY tools.embedding <=>" in compiled
+        assert "LIMIT" in compiled
+    
+    @pytest.mark.asyncio
+    async def test_add_tool_usage(self):
+        """Test batched usage counters in one UPDATE ... FROM (VALUES ...)."""
+        db = AsyncMock()
+        
+        await add_tool_usage(db, {5: 2, 7: 1})
         
-        await increment_tool_usage(db, tool_id=5)
+        compiled = str(db.execute.await_args.args[0].compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        ))
+        assert "FROM (VALUES (5, 2), (7, 1)) AS usage (id, calls)" in compiled
+        assert "usage_count=(tools.usage_count + usage.calls)" in compiled
+        assert "updated_at=tools.updated_at" in compiled
+        db.commit.assert_awaited_once()
         
-        # Verify execute was called
-        assert db.execute.called
-        # Verify commit was called
-        assert db.commit.called
+        db.reset_mock()
+        await add_tool_usage(db, {})
+        db.execute.assert_not_awaited()
 
 
 class TestSmartRoutingIntegration: